@@ -0,0 +1,346 @@
+"""
+解答履歴の保存
+各プレイヤーの解答（セッション・問題・選択肢・正誤・ヒント使用・解答時間）を SQLite に記録する
+解答の処理をディスク書き込みで待たせないよう、メモリ上のバッファに溜めてバックグラウンドでまとめて書き込む
+問題ごとの正答率やランキングは、書き込み時に更新する集計テーブルから取得する
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+
+
+############################################################
+# 解答イベント
+############################################################
+
+class AnswerEvent:
+    """
+    1人のプレイヤーの1問分の解答
+
+    Args:
+        session_id (str): セッションID
+        player (int): プレイヤーのインデックス
+        question_id (int): 問題ID（問題CSVの行番号、出題時点の記録用）
+        question_key (int): 問題キー（問題文と選択肢から求めた値、集計はこちらで行う）
+        choice (int): 選んだ選択肢（CSV上の順番、0〜3。時間切れ・未解答は -1）
+        is_correct (bool): 正解かどうか
+        hint_used (bool): ヒントを使用したかどうか
+        latency (float | None): 解答までの時間（秒、未解答は None）
+        points (float): 獲得点数
+        created_at (float | None): 解答時刻（UNIX時間、None は現在時刻）
+    """
+
+    __slots__ = (
+        "session_id", "player", "question_id", "question_key", "choice", "is_correct",
+        "hint_used", "latency", "points", "created_at",
+    )
+
+    def __init__(self, session_id, player, question_id, question_key, choice, is_correct, hint_used,
+                 latency, points, created_at=None):
+        self.session_id = session_id
+        self.player = player
+        self.question_id = question_id
+        self.question_key = question_key
+        self.choice = choice
+        self.is_correct = is_correct
+        self.hint_used = hint_used
+        self.latency = latency
+        self.points = points
+        self.created_at = time.time() if created_at is None else created_at
+
+    def as_row(self):
+        return (
+            self.session_id, self.player, self.question_id, self.question_key, self.choice, int(self.is_correct),
+            int(self.hint_used), self.latency, self.points, self.created_at,
+        )
+
+
+############################################################
+# 解答履歴ストア
+############################################################
+
+class AnswerStore:
+    """
+    解答イベントを SQLite（WAL モード）に保存し、集計テーブルを更新する
+
+    record はバッファに追加するだけで、書き込みはバックグラウンドのスレッドが
+    batch_size 件たまるか flush_interval 秒経つごとに1トランザクションで行う。
+
+    Args:
+        path (str): SQLite ファイルのパス
+        batch_size (int): この件数たまったらすぐに書き込む
+        flush_interval (float): バッファを書き込む間隔（秒）
+        max_buffer (int): バッファの上限（書き込みが追いつかない場合は古いイベントから捨てる）
+    """
+
+    def __init__(self, path, batch_size=100, flush_interval=1.0, max_buffer=10000):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.written = 0
+
+        self._buffer = deque(maxlen=max_buffer)
+        self._buffer_lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._migrate()
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS answers (
+                id INTEGER PRIMARY KEY,
+                session_id TEXT NOT NULL,
+                player INTEGER NOT NULL,
+                question_id INTEGER NOT NULL,
+                question_key INTEGER,
+                choice INTEGER NOT NULL,
+                correct INTEGER NOT NULL,
+                hint_used INTEGER NOT NULL,
+                latency REAL,
+                points REAL NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS question_stats (
+                question_key INTEGER PRIMARY KEY,
+                attempts INTEGER NOT NULL,
+                correct INTEGER NOT NULL,
+                hint_used INTEGER NOT NULL,
+                answered INTEGER NOT NULL,
+                total_latency REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS player_stats (
+                session_id TEXT NOT NULL,
+                player INTEGER NOT NULL,
+                answers INTEGER NOT NULL,
+                correct INTEGER NOT NULL,
+                points REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (session_id, player)
+            );
+            CREATE INDEX IF NOT EXISTS player_stats_points ON player_stats (points DESC);
+            """
+        )
+
+        self._flusher = threading.Thread(target=self._run, name="answer-store-flusher", daemon=True)
+        self._flusher.start()
+
+    def record(self, event):
+        """
+        解答イベントをバッファに追加する（ディスクへの書き込みは待たない）
+
+        Args:
+            event (AnswerEvent): 解答イベント
+        """
+        with self._buffer_lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.dropped += 1
+            self._buffer.append(event)
+            pending = len(self._buffer)
+        if pending >= self.batch_size:
+            self._wakeup.set()
+
+    def flush(self):
+        """
+        バッファのイベントをすべて書き込む
+
+        Returns:
+            int: 書き込んだ件数
+        """
+        with self._buffer_lock:
+            events = list(self._buffer)
+            self._buffer.clear()
+        if not events:
+            return 0
+
+        # 集計テーブルはバッチ内で先に足し合わせてから1行ずつ更新する
+        questions = {}
+        players = {}
+        for e in events:
+            q = questions.setdefault(e.question_key, [0, 0, 0, 0, 0.0])
+            q[0] += 1
+            q[1] += int(e.is_correct)
+            q[2] += int(e.hint_used)
+            if e.latency is not None:
+                q[3] += 1
+                q[4] += e.latency
+            p = players.setdefault((e.session_id, e.player), [0, 0, 0.0, 0.0])
+            p[0] += 1
+            p[1] += int(e.is_correct)
+            p[2] += e.points
+            p[3] = max(p[3], e.created_at)
+
+        with self._db_lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    """
+                    INSERT INTO answers (session_id, player, question_id, question_key, choice, correct,
+                        hint_used, latency, points, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    [e.as_row() for e in events],
+                )
+                self._conn.executemany(
+                    """
+                    INSERT INTO question_stats (question_key, attempts, correct, hint_used, answered, total_latency)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(question_key) DO UPDATE SET
+                        attempts = attempts + excluded.attempts,
+                        correct = correct + excluded.correct,
+                        hint_used = hint_used + excluded.hint_used,
+                        answered = answered + excluded.answered,
+                        total_latency = total_latency + excluded.total_latency
+                    """,
+                    [(key, *values) for key, values in questions.items()],
+                )
+                self._conn.executemany(
+                    """
+                    INSERT INTO player_stats (session_id, player, answers, correct, points, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(session_id, player) DO UPDATE SET
+                        answers = answers + excluded.answers,
+                        correct = correct + excluded.correct,
+                        points = points + excluded.points,
+                        updated_at = excluded.updated_at
+                    """,
+                    [(sid, player, *values) for (sid, player), values in players.items()],
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                # 書き込めなかったイベントはバッファに戻して次回に再試行する
+                with self._buffer_lock:
+                    self._buffer.extendleft(reversed(events))
+                raise
+            self.written += len(events)
+        return len(events)
+
+    def question_stats(self, question_key):
+        """
+        問題ごとの集計を取得
+
+        Args:
+            question_key (int): 問題キー
+
+        Returns:
+            dict | None: {"attempts", "correct", "accuracy", "hint_rate", "avg_latency"}（未解答の問題は None）
+        """
+        with self._db_lock:
+            row = self._conn.execute(
+                """
+                SELECT attempts, correct, hint_used, answered, total_latency
+                FROM question_stats WHERE question_key = ?
+                """,
+                (question_key,),
+            ).fetchone()
+        if row is None:
+            return None
+        return self._question_summary(*row)
+
+    def all_question_stats(self):
+        """
+        全問題の集計を取得
+
+        Returns:
+            dict: {問題キー: question_stats と同じ形式の辞書}
+        """
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT question_key, attempts, correct, hint_used, answered, total_latency FROM question_stats"
+            ).fetchall()
+        return {row[0]: self._question_summary(*row[1:]) for row in rows}
+
+    def question_counts(self):
+        """
+        全問題の集計を件数のまま取得（難易度補正の初期化用）
+
+        Returns:
+            list[tuple]: (問題キー, 解答数, 正解数, ヒント使用数, 解答時間の記録数, 解答時間の合計) のリスト
+        """
+        with self._db_lock:
+            return self._conn.execute(
+                "SELECT question_key, attempts, correct, hint_used, answered, total_latency FROM question_stats"
+            ).fetchall()
+
+    def leaderboard(self, limit=10):
+        """
+        全セッションを通した得点ランキングを取得
+
+        Args:
+            limit (int): 取得する件数
+
+        Returns:
+            list[dict]: {"session_id", "player", "answers", "correct", "points"} の得点順のリスト
+        """
+        with self._db_lock:
+            rows = self._conn.execute(
+                """
+                SELECT session_id, player, answers, correct, points FROM player_stats
+                ORDER BY points DESC, updated_at ASC LIMIT ?
+                """,
+                (limit,),
+            ).fetchall()
+        return [
+            {"session_id": sid, "player": player, "answers": answers, "correct": correct, "points": points}
+            for sid, player, answers, correct, points in rows
+        ]
+
+    def stats(self):
+        """
+        書き込み状況を取得
+
+        Returns:
+            dict: {"pending": int, "written": int, "dropped": int}
+        """
+        with self._buffer_lock:
+            pending = len(self._buffer)
+        return {"pending": pending, "written": self.written, "dropped": self.dropped}
+
+    def close(self):
+        """バッファを書き込んでからバックグラウンドのスレッドを止める"""
+        self._closed = True
+        self._wakeup.set()
+        self._flusher.join(timeout=5.0)
+        self.flush()
+
+    def _migrate(self):
+        # 問題キー導入前のデータベース：集計は行番号で持っていたため、CSVの並びが変わると
+        # 別の問題の集計になってしまう。行番号からキーは復元できないので集計は作り直す
+        # （解答履歴そのものは残し、以後の解答からキーを記録する）
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(answers)")}
+        if columns and "question_key" not in columns:
+            self._conn.execute("BEGIN")
+            self._conn.execute("ALTER TABLE answers ADD COLUMN question_key INTEGER")
+            self._conn.execute("DROP TABLE IF EXISTS question_stats")
+            self._conn.execute("COMMIT")
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except sqlite3.Error:
+                # ディスクが一時的にロックされている場合などは次の周期で再試行する
+                pass
+
+    @staticmethod
+    def _question_summary(attempts, correct, hint_used, answered, total_latency):
+        return {
+            "attempts": attempts,
+            "correct": correct,
+            "accuracy": correct / attempts if attempts > 0 else 0.0,
+            "hint_rate": hint_used / attempts if attempts > 0 else 0.0,
+            "avg_latency": total_latency / answered if answered > 0 else None,
+        }
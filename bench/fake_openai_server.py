@@ -0,0 +1,229 @@
+"""
+OpenAI 互換の疑似 API サーバー（負荷試験・動作確認用）
+/v1/chat/completions に対して、指定した遅延分布・エラー率で固定的なヒントを返す
+stream=true の場合は Server-Sent Events で数文字ずつ返す
+
+使い方:
+    python bench/fake_openai_server.py --port 8765 --latency-ms 800 --distribution lognormal
+    OPENAI_API_KEY=dummy OPENAI_BASE_URL=http://127.0.0.1:8765/v1 streamlit run main.py
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# 返却するヒント（ストリーミング時は CHUNK_SIZE 文字ずつ分割）
+FAKE_HINT = "解説の中で繰り返し出てくるキーワードに注目してみましょう。"
+CHUNK_SIZE = 4
+
+
+############################################################
+# 遅延・エラーの設定
+############################################################
+
+class FakeServerConfig:
+    """
+    疑似サーバーの応答設定
+
+    Args:
+        latency_ms (float): 応答までの遅延の平均（ミリ秒）
+        distribution (str): 遅延の分布（fixed / uniform / exponential / lognormal）
+        chunk_delay_ms (float): ストリーミング時の断片ごとの遅延（ミリ秒）
+        error_rate (float): エラーを返す確率（0〜1）
+        error_status (int): エラー時のステータスコード（429 など）
+    """
+
+    def __init__(self, latency_ms=500.0, distribution="fixed", chunk_delay_ms=30.0,
+                 error_rate=0.0, error_status=429):
+        self.latency_ms = latency_ms
+        self.distribution = distribution
+        self.chunk_delay_ms = chunk_delay_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+
+    def sample_latency(self):
+        """1リクエスト分の遅延（秒）を分布に従って決める"""
+        mean = self.latency_ms / 1000.0
+        if self.distribution == "uniform":
+            return random.uniform(0, 2 * mean)
+        if self.distribution == "exponential":
+            return random.expovariate(1 / mean) if mean > 0 else 0.0
+        if self.distribution == "lognormal":
+            # 平均が mean になるよう sigma=0.75 の対数正規分布を使う（裾の重い遅延）
+            sigma = 0.75
+            return random.lognormvariate(0, sigma) * mean / (2.718281828 ** (sigma ** 2 / 2)) if mean > 0 else 0.0
+        return mean
+
+
+class FakeServerStats:
+    """受け付けたリクエスト数などの集計（/stats で取得できる）"""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.streams = 0
+        self._lock = threading.Lock()
+
+    def record(self, streamed, failed):
+        with self._lock:
+            self.requests += 1
+            self.streams += int(streamed)
+            self.errors += int(failed)
+
+    def as_dict(self):
+        with self._lock:
+            return {"requests": self.requests, "errors": self.errors, "streams": self.streams}
+
+
+############################################################
+# リクエスト処理
+############################################################
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/stats":
+            self._send_json(200, self.server.stats.as_dict())
+        else:
+            self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+
+        config = self.server.config
+        streamed = bool(body.get("stream"))
+        time.sleep(config.sample_latency())
+
+        if random.random() < config.error_rate:
+            self.server.stats.record(streamed, failed=True)
+            self._send_json(
+                config.error_status,
+                {"error": {"message": "fake error", "type": "rate_limit_error"}},
+                headers={"Retry-After": "0"},
+            )
+            return
+
+        self.server.stats.record(streamed, failed=False)
+        model = body.get("model", "fake-model")
+        if streamed:
+            self._send_stream(model, config.chunk_delay_ms / 1000.0)
+        else:
+            self._send_json(200, {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": FAKE_HINT},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            })
+
+    def _send_json(self, status, payload, headers=None):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_stream(self, model, chunk_delay):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        pieces = [FAKE_HINT[i:i + CHUNK_SIZE] for i in range(0, len(FAKE_HINT), CHUNK_SIZE)]
+        try:
+            for i, piece in enumerate(pieces):
+                if i > 0:
+                    time.sleep(chunk_delay)
+                self._write_event({
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+                })
+            self._write_chunk(b"data: [DONE]\n\n")
+            self._write_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            # クライアントが途中で切断した（キャンセル）
+            pass
+
+    def _write_event(self, payload):
+        self._write_chunk(f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode("utf-8"))
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+############################################################
+# 起動
+############################################################
+
+def start_fake_server(host="127.0.0.1", port=0, config=None):
+    """
+    疑似サーバーをバックグラウンドスレッドで起動する
+
+    Args:
+        host (str): 待ち受けアドレス
+        port (int): 待ち受けポート（0 は空きポートを自動選択）
+        config (FakeServerConfig | None): 応答設定
+
+    Returns:
+        ThreadingHTTPServer: 起動したサーバー（base_url は f"http://{host}:{server.server_port}/v1"）
+    """
+    server = ThreadingHTTPServer((host, port), FakeOpenAIHandler)
+    server.daemon_threads = True
+    server.config = config or FakeServerConfig()
+    server.stats = FakeServerStats()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI 互換の疑似 API サーバー")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=500.0, help="応答遅延の平均（ミリ秒）")
+    parser.add_argument("--distribution", default="fixed",
+                        choices=["fixed", "uniform", "exponential", "lognormal"], help="遅延の分布")
+    parser.add_argument("--chunk-delay-ms", type=float, default=30.0, help="ストリーミング時の断片ごとの遅延")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="エラーを返す確率（0〜1）")
+    parser.add_argument("--error-status", type=int, default=429, help="エラー時のステータスコード")
+    args = parser.parse_args()
+
+    config = FakeServerConfig(args.latency_ms, args.distribution, args.chunk_delay_ms,
+                              args.error_rate, args.error_status)
+    server = ThreadingHTTPServer((args.host, args.port), FakeOpenAIHandler)
+    server.daemon_threads = True
+    server.config = config
+    server.stats = FakeServerStats()
+    print(f"疑似 API サーバー: http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
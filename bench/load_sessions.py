@@ -0,0 +1,519 @@
+"""
+同時セッションの負荷試験（ヒントは疑似 OpenAI サーバーに送る）
+streamlit run で起動したアプリに、ブラウザの代わりに WebSocket で多数のセッションを同時に接続してプレイし、
+同時実行数ごとにスループット・スクリプト実行中のセッションの割合・サーバーのスレッド数・
+セッションあたりのメモリ・Tips ボタンの応答時間（p50 / p95 / p99）を計測して、キャパシティレポートを作成する
+
+同時実行数ごとにアプリのサーバーを起動し直して計測し（キャッシュ・メモリは毎回空の状態から）、
+疑似サーバーは全体で共有する。--report で保存した JSON を次のバージョンで --baseline に渡すと、差分を表示する。
+
+使い方:
+    python bench/load_sessions.py [--concurrency 10 50 100] [--sessions 100] [--rows 10000]
+        [--latency-ms 800] [--distribution lognormal] [--hint-rate 0.3] [--target-p95-ms 2000]
+        [--report capacity.json] [--baseline previous.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+from fake_openai_server import FakeServerConfig, start_fake_server
+from question_loop_bench import ROOT, percentile, prepare_workspace
+
+
+# レポートで比較する指標（名前, 説明, 大きいほど良いか）
+COMPARED_METRICS = (
+    ("runs_per_second", "スクリプト実行/秒", True),
+    ("p95_ms", "実行 p95", False),
+    ("tips_p95_ms", "Tips p95", False),
+    ("memory_per_session_kb", "KB/セッション", False),
+)
+
+# アプリのサーバーの起動を待つ上限（秒）
+SERVER_START_TIMEOUT = 60.0
+
+# サーバーのメモリ・スレッド数を調べる間隔（秒）
+SAMPLE_INTERVAL = 0.1
+
+
+############################################################
+# アプリのサーバー
+############################################################
+
+def _free_port():
+    # 空いているポートを OS に選ばせる
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_app_server(workspace, env):
+    """
+    作業ディレクトリで streamlit run を起動し、応答するまで待つ
+
+    Args:
+        workspace (str): 作業ディレクトリ（prepare_workspace の戻り値）
+        env (dict): 環境変数
+
+    Returns:
+        tuple[subprocess.Popen, int]: (サーバーのプロセス, ポート番号)
+
+    Raises:
+        RuntimeError: サーバーが起動しなかった場合
+    """
+    port = _free_port()
+    log_path = os.path.join(workspace, "server.log")
+    with open(log_path, "w", encoding="utf-8") as log:
+        process = subprocess.Popen(
+            [
+                sys.executable, "-m", "streamlit", "run", os.path.join(ROOT, "main.py"),
+                "--server.headless", "true", "--server.address", "127.0.0.1", "--server.port", str(port),
+                "--server.fileWatcherType", "none", "--browser.gatherUsageStats", "false",
+            ],
+            cwd=workspace, env=env, stdout=log, stderr=subprocess.STDOUT,
+        )
+
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            break
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as response:
+                if response.status == 200:
+                    return process, port
+        except (OSError, urllib.error.URLError):
+            time.sleep(0.2)
+
+    stop_app_server(process)
+    with open(log_path, encoding="utf-8") as f:
+        raise RuntimeError(f"アプリのサーバーが起動しませんでした:\n{f.read()[-2000:]}")
+
+
+def stop_app_server(process):
+    """サーバーを終了する（応答しない場合は強制終了）"""
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def process_status(pid):
+    """
+    プロセスの常駐メモリとスレッド数を取得
+
+    Returns:
+        tuple[int, int] | None: (常駐メモリ[バイト], スレッド数)（Linux の /proc を使えない環境では None）
+    """
+    rss = threads = None
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    rss = int(line.split()[1]) * 1024
+                elif line.startswith("Threads:"):
+                    threads = int(line.split()[1])
+    except (OSError, ValueError):
+        return None
+    if rss is None or threads is None:
+        return None
+    return rss, threads
+
+
+############################################################
+# セッション（ブラウザの代わり）
+############################################################
+
+class SessionClient:
+    """
+    Streamlit の WebSocket プロトコルでアプリを操作する1セッション分のクライアント
+
+    スクリプトの実行を依頼して script_finished を受け取るまでを1回の実行として時間を記録する。
+    画面のウィジェットは実行のたびに届く要素から集め、key（なければラベル）で探す。
+    run_every の fragment（タイマー表示）の再実行は依頼しない。
+
+    Args:
+        url (str): アプリの WebSocket の URL（ws://.../_stcore/stream）
+        timeout (float): スクリプト実行1回の上限（秒）
+    """
+
+    def __init__(self, url, timeout):
+        self.url = url
+        self.timeout = timeout
+        self.ws = None
+        self.values = {}  # 選択済みのウィジェットの状態 {ウィジェットID: WidgetState}
+        self.widgets = {}  # 直近の実行で表示されたウィジェット {ウィジェットID: (key, ラベル, 要素)}
+        self.run_times = []
+
+    async def connect(self):
+        import websockets
+
+        self.ws = await websockets.connect(self.url, subprotocols=["streamlit"], max_size=None)
+
+    async def close(self):
+        if self.ws is not None:
+            await self.ws.close()
+
+    async def run(self, trigger=None):
+        """
+        スクリプトを1回実行（trigger を指定するとそのボタンを押して実行）
+
+        Returns:
+            float: 実行にかかった時間（秒）
+
+        Raises:
+            RuntimeError: スクリプトで例外が発生した場合
+        """
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        message = BackMsg()
+        message.rerun_script.query_string = ""
+        message.rerun_script.page_script_hash = ""
+        states = message.rerun_script.widget_states.widgets
+        states.extend(self.values.values())
+        if trigger is not None:
+            states.append(WidgetState(id=trigger, trigger_value=True))
+
+        start = time.perf_counter()
+        await self.ws.send(message.SerializeToString())
+        widgets = {}
+        error = None
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(await asyncio.wait_for(self.ws.recv(), self.timeout))
+            kind = forward.WhichOneof("type")
+            if kind == "script_finished":
+                break
+            if kind != "delta" or forward.delta.WhichOneof("type") != "new_element":
+                continue
+            element = forward.delta.new_element
+            element_type = element.WhichOneof("type")
+            if element_type == "exception":
+                error = element.exception.message
+                continue
+            widget = getattr(element, element_type)
+            widget_id = getattr(widget, "id", "")
+            if widget_id.startswith("$$ID-"):
+                # ID は "$$ID-<ハッシュ>-<key>"（key がなければ "None"）
+                widgets[widget_id] = (widget_id.split("-", 2)[2], getattr(widget, "label", ""), widget)
+
+        elapsed = time.perf_counter() - start
+        self.run_times.append(elapsed)
+        self.widgets = widgets
+        if error is not None:
+            raise RuntimeError(f"スクリプトの実行に失敗しました: {error}")
+        return elapsed
+
+    def find(self, key=None, label=None):
+        """key が一致する（または label を含む）ウィジェットの ID を探す（なければ None）"""
+        for widget_id, (widget_key, widget_label, _) in self.widgets.items():
+            if (key is not None and widget_key == key) or (label is not None and label in widget_label):
+                return widget_id
+        return None
+
+    def select(self, key, option):
+        """selectbox / radio の選択肢を選ぶ（次の実行で送る）"""
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        widget_id = self.find(key=key)
+        if widget_id is None or option not in self.widgets[widget_id][2].options:
+            raise RuntimeError(f"{key} で {option} を選択できません")
+        self.values[widget_id] = WidgetState(id=widget_id, string_value=option)
+
+
+async def play_session(client, config, rng):
+    """
+    New Game から最終結果まで1ゲームをプレイ（プレイヤーは順番に解答する）
+
+    Returns:
+        tuple[int, list[float]]: (出題された問題数, Tips ボタンを押した実行の時間のリスト)
+    """
+    import constants as ct
+
+    hint_times = []
+    await client.run()
+    client.select("player_count_select", str(config["players"]))
+    client.select("time_limit_select", next(k for k, v in ct.TIME_LIMIT_OPTIONS.items() if v == config["time_limit"]))
+    client.select("question_limit_select",
+                  next(k for k, v in ct.QUESTION_LIMIT_OPTIONS.items() if v == config["questions"]))
+    await client.run(client.find(label=ct.BTN_NEW_GAME))
+
+    asked = 0
+    while client.find(key="opt_0") is not None:
+        asked += 1
+        for _ in range(config["players"]):
+            if rng.random() < config["hint_rate"]:
+                hint_times.append(await client.run(client.find(key="hint_before_answer")))
+            await client.run(client.find(key=f"opt_{rng.randrange(4)}"))
+            # 次のプレイヤーへ / 解答を表示
+            await client.run(client.find(label="次のプレイヤーへ") or client.find(label="解答を表示"))
+        await client.run(client.find(label=ct.BTN_NEXT))
+    return asked, hint_times
+
+
+############################################################
+# 計測
+############################################################
+
+async def run_level(port, pid, config):
+    """
+    1つの同時実行数でセッションをプレイし、計測結果を返す
+
+    Args:
+        port (int): アプリのサーバーのポート
+        pid (int): アプリのサーバーのプロセスID
+        config (dict): concurrency / sessions / players / questions / time_limit / hint_rate / timeout
+
+    Returns:
+        dict: 計測結果
+    """
+    url = f"ws://127.0.0.1:{port}/_stcore/stream"
+
+    # 問題バンクの読み込みなど、最初の1回だけの処理は計測に含めない
+    warmup = SessionClient(url, config["timeout"])
+    await warmup.connect()
+    await play_session(warmup, {**config, "hint_rate": 0.0}, random.Random(-1))
+    await warmup.close()
+    await asyncio.sleep(0.5)
+    status_base = process_status(pid)
+
+    # サーバーの常駐メモリとスレッド数の最大値を記録
+    peak = {"rss": 0, "threads": 0}
+    sampling = True
+
+    async def sample():
+        while sampling:
+            status = process_status(pid)
+            if status is not None:
+                peak["rss"] = max(peak["rss"], status[0])
+                peak["threads"] = max(peak["threads"], status[1])
+            await asyncio.sleep(SAMPLE_INTERVAL)
+
+    sampler = asyncio.create_task(sample())
+    slots = asyncio.Semaphore(config["concurrency"])
+    clients = []
+
+    async def session(seed):
+        async with slots:
+            client = SessionClient(url, config["timeout"])
+            clients.append(client)
+            await client.connect()
+            asked, hint_times = await play_session(client, config, random.Random(seed))
+        return client, asked, hint_times
+
+    start = time.perf_counter()
+    try:
+        # セッションは最後まで接続したままにし、セッションあたりのメモリを測る
+        results = await asyncio.gather(*(session(seed) for seed in range(config["sessions"])))
+        wall = time.perf_counter() - start
+        status_end = process_status(pid)
+    finally:
+        sampling = False
+        await sampler
+        for client in clients:
+            await client.close()
+
+    run_times = [t for client, _, _ in results for t in client.run_times]
+    hint_times = [t for _, _, times in results for t in times]
+    questions = sum(asked for _, asked, _ in results)
+    memory_per_session = None
+    if status_base is not None and status_end is not None:
+        memory_per_session = max(0, status_end[0] - status_base[0]) / len(results)
+
+    def ms(value):
+        return None if value is None else value * 1000
+
+    def mb(value):
+        return None if value is None else value / 1024 / 1024
+
+    return {
+        "concurrency": config["concurrency"],
+        "sessions": len(results),
+        "wall_seconds": wall,
+        "script_runs": len(run_times),
+        "runs_per_second": len(run_times) / wall,
+        "questions_per_second": questions / wall,
+        # スクリプト実行中だった時間の合計 / (経過時間 × 同時実行数)
+        "thread_occupancy": sum(run_times) / (wall * config["concurrency"]),
+        "threads_base": None if status_base is None else status_base[1],
+        "threads_peak": peak["threads"] or None,
+        "p50_ms": ms(percentile(run_times, 50)),
+        "p95_ms": ms(percentile(run_times, 95)),
+        "p99_ms": ms(percentile(run_times, 99)),
+        "tips_clicks": len(hint_times),
+        "tips_p50_ms": ms(percentile(hint_times, 50)),
+        "tips_p95_ms": ms(percentile(hint_times, 95)),
+        "tips_p99_ms": ms(percentile(hint_times, 99)),
+        "rss_base_mb": mb(None if status_base is None else status_base[0]),
+        "rss_end_mb": mb(None if status_end is None else status_end[0]),
+        "rss_peak_mb": mb(peak["rss"] or None),
+        "memory_per_session_kb": None if memory_per_session is None else memory_per_session / 1024,
+    }
+
+
+############################################################
+# レポート
+############################################################
+
+def git_version():
+    """現在のコミット（取得できない場合は None）"""
+    try:
+        result = subprocess.run(
+            ["git", "describe", "--always", "--dirty"], cwd=ROOT, capture_output=True, text=True, check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def print_report(report, baseline=None):
+    """キャパシティレポートを表形式で表示（baseline があれば同じ同時実行数どうしの差分も表示）"""
+    def fmt(value, spec):
+        return "-" if value is None else format(value, spec)
+
+    print(f"バージョン: {report['version'] or '不明'}　条件: {report['config']}")
+    print(f"{'同時':>5} {'実行/秒':>8} {'問題/秒':>7} {'実行中':>6} {'スレッド':>7} {'p50':>8} {'p95':>8} {'p99':>8} "
+          f"{'Tips回数':>7} {'Tips p50':>9} {'Tips p95':>9} {'Tips p99':>9} {'KB/セッション':>12} {'API':>5}")
+    for level in report["levels"]:
+        print(
+            f"{level['concurrency']:>5} {level['runs_per_second']:>8.1f} {level['questions_per_second']:>7.2f} "
+            f"{level['thread_occupancy']:>6.0%} {fmt(level['threads_peak'], '>7')} "
+            f"{fmt(level['p50_ms'], '>6.0f')}ms {fmt(level['p95_ms'], '>6.0f')}ms "
+            f"{fmt(level['p99_ms'], '>6.0f')}ms {level['tips_clicks']:>7} {fmt(level['tips_p50_ms'], '>7.0f')}ms "
+            f"{fmt(level['tips_p95_ms'], '>7.0f')}ms {fmt(level['tips_p99_ms'], '>7.0f')}ms "
+            f"{fmt(level['memory_per_session_kb'], '>12.0f')} {level['api_requests']:>5}"
+        )
+
+    capacity = report["capacity"]
+    target = report["config"]["target_p95_ms"]
+    if capacity is None:
+        print(f"\n実行 p95 {target:.0f}ms 以内で処理できた同時実行数: なし")
+    else:
+        print(f"\n実行 p95 {target:.0f}ms 以内で処理できた最大の同時実行数: {capacity}")
+
+    if baseline is None:
+        return
+    print(f"\n比較（基準: {baseline.get('version') or '不明'}）")
+    previous = {level["concurrency"]: level for level in baseline.get("levels", [])}
+    for level in report["levels"]:
+        base = previous.get(level["concurrency"])
+        if base is None:
+            continue
+        changes = []
+        for key, label, higher_is_better in COMPARED_METRICS:
+            if level.get(key) is None or not base.get(key):
+                continue
+            change = (level[key] - base[key]) / base[key]
+            better = change > 0 if higher_is_better else change < 0
+            changes.append(f"{label} {change:+.0%}{'' if abs(change) < 0.05 else ('（改善）' if better else '（悪化）')}")
+        print(f"  同時 {level['concurrency']:>4}: " + "、".join(changes))
+    print(f"  最大の同時実行数: {baseline.get('capacity')} → {capacity}")
+
+
+############################################################
+# 実行
+############################################################
+
+def main():
+    parser = argparse.ArgumentParser(description="多数のセッションを同時にプレイしてキャパシティを計測します")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 50, 100], help="同時実行数（複数指定可）")
+    parser.add_argument("--sessions", type=int, default=100, help="同時実行数ごとにプレイするセッション数")
+    parser.add_argument("--players", type=int, default=1, help="1セッションのプレイヤー数")
+    parser.add_argument("--questions", type=int, default=10, help="1ゲームの問題数（10 / 20 / 30）")
+    parser.add_argument("--time-limit", type=int, default=None, help="制限時間（秒、省略時は無制限）")
+    parser.add_argument("--rows", type=int, default=10000, help="合成する問題数")
+    parser.add_argument("--hint-rate", type=float, default=0.3, help="解答前に Tips ボタンを押す確率（0〜1）")
+    parser.add_argument("--latency-ms", type=float, default=800.0, help="疑似サーバーの応答遅延の平均（ミリ秒）")
+    parser.add_argument("--distribution", default="lognormal",
+                        choices=["fixed", "uniform", "exponential", "lognormal"], help="応答遅延の分布")
+    parser.add_argument("--chunk-delay-ms", type=float, default=30.0, help="ストリーミング時の断片ごとの遅延")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="疑似サーバーがエラーを返す確率（0〜1）")
+    parser.add_argument("--target-p95-ms", type=float, default=2000.0, help="キャパシティの判定に使う実行 p95")
+    parser.add_argument("--timeout", type=float, default=120.0, help="スクリプト実行1回の上限（秒）")
+    parser.add_argument("--workdir", default=None, help="合成CSVの保存先（指定すると次回も再利用）")
+    parser.add_argument("--report", default=None, help="キャパシティレポートを JSON で保存するパス")
+    parser.add_argument("--baseline", default=None, help="比較する以前のレポート（JSON）")
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    server = start_fake_server(config=FakeServerConfig(
+        args.latency_ms, args.distribution, args.chunk_delay_ms, args.error_rate,
+    ))
+    env = dict(os.environ)
+    env.update({
+        "HINT_PROVIDER": "openai",
+        "OPENAI_API_KEY": "dummy",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{server.server_port}/v1",
+    })
+
+    config = {
+        "sessions": max(1, args.sessions), "players": args.players, "questions": args.questions,
+        "time_limit": args.time_limit, "rows": args.rows, "hint_rate": args.hint_rate,
+        "latency_ms": args.latency_ms, "distribution": args.distribution, "error_rate": args.error_rate,
+        "target_p95_ms": args.target_p95_ms, "timeout": args.timeout,
+    }
+    workdir = args.workdir or tempfile.mkdtemp(prefix="load_sessions_")
+    levels = []
+    try:
+        for concurrency in args.concurrency:
+            workspace = prepare_workspace(workdir, args.rows, compiled=True)
+            # ヒントのキャッシュ・解答履歴は同時実行数ごとに空の状態から始める
+            for name in os.listdir(os.path.join(workspace, "data")):
+                if name.startswith(("hint_cache.sqlite3", "answers.sqlite3")):
+                    os.remove(os.path.join(workspace, "data", name))
+
+            print(f"同時実行数 {concurrency} で {config['sessions']} セッションをプレイしています…", file=sys.stderr)
+            process, port = start_app_server(workspace, env)
+            before = server.stats.as_dict()
+            try:
+                level = asyncio.run(run_level(port, process.pid, {**config, "concurrency": concurrency}))
+            except (OSError, RuntimeError, asyncio.TimeoutError) as e:
+                print(f"失敗: 同時実行数 {concurrency}: {e}", file=sys.stderr)
+                return 2
+            finally:
+                stop_app_server(process)
+            after = server.stats.as_dict()
+            level["api_requests"] = after["requests"] - before["requests"]
+            level["api_errors"] = after["errors"] - before["errors"]
+            levels.append(level)
+    finally:
+        server.shutdown()
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    passing = [level["concurrency"] for level in levels if level["p95_ms"] <= args.target_p95_ms]
+    report = {
+        "version": git_version(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": config,
+        "levels": levels,
+        "capacity": max(passing) if passing else None,
+    }
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,380 @@
+"""
+出題ループのエンドツーエンド・ベンチマーク（Streamlit の AppTest でブラウザなしに実行）
+合成した問題CSVで main.py を New Game → 選択肢 → 次の問題へ → 最終結果 まで繰り返しプレイし、
+スクリプト実行1回ごとの時間（p50 / p95 / p99）、load_next_question の時間、
+1問あたりのスクリプト実行回数、セッションあたりのメモリを表示する
+
+条件（問題数・プレイヤー数・制限時間）の組み合わせごとに別プロセスで計測するため、
+問題バンクのキャッシュやメモリ使用量が他の条件の影響を受けない
+
+使い方:
+    python bench/question_loop_bench.py [--rows 100 10000 1000000] [--players 1 4] [--time-limit none 30]
+        [--answer-mode sequential] [--sessions 3] [--questions 10] [--compiled] [--workdir DIR]
+        [--json result.json] [--max-p95-ms 200]
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+
+# リポジトリのルート（アプリのモジュールを import するため）
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 合成する問題のジャンル数
+SYNTHETIC_GENRES = 20
+
+
+############################################################
+# 合成データ
+############################################################
+
+def generate_questions_csv(path, rows, seed=0):
+    """
+    問題CSVと同じ列構成の合成データを書き出す（1行ずつ書き込むため行数によらず省メモリ）
+
+    Args:
+        path (str): 出力先のパス
+        rows (int): 問題数
+        seed (int): 乱数のシード
+    """
+    rng = random.Random(seed)
+    difficulties = ("easy", "normal", "hard")
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow([
+            "question", "option1", "option2", "option3", "option4",
+            "correct_option", "genre", "difficulty", "hint", "option_explanations",
+        ])
+        for i in range(rows):
+            writer.writerow([
+                f"合成問題 {i}: 次のうち正しいものはどれでしょうか？",
+                f"選択肢 {i}-1", f"選択肢 {i}-2", f"選択肢 {i}-3", f"選択肢 {i}-4",
+                rng.randint(1, 4),
+                f"ジャンル{rng.randrange(SYNTHETIC_GENRES):02d}",
+                rng.choice(difficulties),
+                "",
+                "|".join(f"選択肢 {i}-{n} の解説です。" for n in range(1, 5)),
+            ])
+
+
+def prepare_workspace(workdir, rows, compiled):
+    """
+    問題数ごとの作業ディレクトリ（data/questions.csv と static/ へのリンク）を用意する
+
+    アプリは data/・static/ を相対パスで読むため、計測はこのディレクトリで実行する。
+    同じ問題数の CSV が既にあれば再利用する。
+
+    Returns:
+        str: 作業ディレクトリのパス
+    """
+    import constants as ct
+
+    workspace = os.path.join(workdir, f"rows_{rows}")
+    csv_path = os.path.join(workspace, ct.QUESTIONS_CSV)
+    os.makedirs(os.path.dirname(csv_path), exist_ok=True)
+    if not os.path.exists(csv_path):
+        start = time.perf_counter()
+        generate_questions_csv(csv_path, rows)
+        print(f"合成CSVを作成しました: {rows}問（{time.perf_counter() - start:.1f}秒）", file=sys.stderr)
+
+    static_link = os.path.join(workspace, ct.STATIC_DIR)
+    if not os.path.exists(static_link):
+        os.symlink(os.path.join(ROOT, ct.STATIC_DIR), static_link)
+
+    compiled_path = os.path.join(workspace, ct.QUESTIONS_BANK)
+    if compiled and not os.path.exists(compiled_path):
+        from question_bank import compile_question_bank
+        compile_question_bank(csv_path, compiled_path)
+    elif not compiled and os.path.exists(compiled_path):
+        os.remove(compiled_path)
+    return workspace
+
+
+############################################################
+# 計測（子プロセス）
+############################################################
+
+def _rss_bytes():
+    # 現在の常駐メモリ（Linux の /proc を使えない環境では None）
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def percentile(values, p):
+    """
+    パーセンタイルを求める（最近傍法）
+
+    Args:
+        values (list[float]): 値のリスト
+        p (float): 0〜100
+
+    Returns:
+        float | None: パーセンタイル値（値がない場合は None）
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(p / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+class GameDriver:
+    """
+    AppTest で1セッション分のゲームを操作し、スクリプト実行ごとの時間を記録する
+
+    Args:
+        players (int): プレイヤー数
+        time_limit (int | None): 制限時間（秒）
+        answer_mode (str): 解答方法（constants.ANSWER_MODE_*）
+        questions (int): 問題数（constants.QUESTION_LIMIT_OPTIONS の値）
+        timeout (float): スクリプト実行1回の上限（秒）
+    """
+
+    def __init__(self, players, time_limit, answer_mode, questions, timeout):
+        from streamlit.testing.v1 import AppTest
+
+        self.players = players
+        self.time_limit = time_limit
+        self.answer_mode = answer_mode
+        self.questions = questions
+        self.run_times = []
+        self.at = AppTest.from_file(os.path.join(ROOT, "main.py"), default_timeout=timeout)
+        self.rng = random.Random(0)
+
+    def run(self, element=None):
+        """ウィジェットを操作して（element が None なら操作なしで）スクリプトを1回実行"""
+        start = time.perf_counter()
+        if element is None:
+            self.at.run()
+        else:
+            element.run()
+        self.run_times.append(time.perf_counter() - start)
+        if self.at.exception:
+            raise RuntimeError(f"スクリプトの実行に失敗しました: {self.at.exception[0].value}")
+
+    def play(self):
+        """
+        New Game から最終結果まで1ゲームをプレイ
+
+        Returns:
+            int: 出題された問題数
+        """
+        import constants as ct
+
+        at = self.at
+        self.run()
+        self.run(at.sidebar.selectbox(key="player_count_select").select(self.players))
+        if self.players > 1:
+            label = next(k for k, v in ct.ANSWER_MODE_OPTIONS.items() if v == self.answer_mode)
+            self.run(at.sidebar.radio(key="answer_mode_select").set_value(label))
+        label = next(k for k, v in ct.TIME_LIMIT_OPTIONS.items() if v == self.time_limit)
+        self.run(at.sidebar.selectbox(key="time_limit_select").select(label))
+        label = next(k for k, v in ct.QUESTION_LIMIT_OPTIONS.items() if v == self.questions)
+        self.run(at.sidebar.selectbox(key="question_limit_select").select(label))
+        self.run(next(b for b in at.sidebar.button if b.label == ct.BTN_NEW_GAME).click())
+
+        asked = 0
+        while not at.session_state.game_finished:
+            if at.session_state.no_questions_available:
+                break
+            asked += 1
+            self.answer_question()
+            self.run(next(b for b in at.button if b.label == ct.BTN_NEXT).click())
+        return asked
+
+    def answer_question(self):
+        import constants as ct
+
+        at = self.at
+        if self.players > 1 and self.answer_mode == ct.ANSWER_MODE_SIMULTANEOUS:
+            # 1ページ目のプレイヤーが解答し、残りは締め切りで時間切れにする
+            for player in range(min(self.players, ct.SCOREBOARD_COLUMNS)):
+                self.run(at.button(key=f"sim_opt_{player}_{self.rng.randrange(4)}").click())
+                if at.session_state.all_players_answered:
+                    return
+            self.run(next(b for b in at.button if "締め切って" in b.label).click())
+            return
+
+        for player in range(self.players):
+            self.run(at.button(key=f"opt_{self.rng.randrange(4)}").click())
+            # 次のプレイヤーへ / 解答を表示
+            self.run(next(b for b in at.button if "次のプレイヤーへ" in b.label or "解答を表示" in b.label).click())
+
+
+def run_scenario(scenario):
+    """
+    1つの条件で複数セッションのゲームを実行し、計測結果を返す（作業ディレクトリで実行すること）
+
+    Args:
+        scenario (dict): rows / players / time_limit / answer_mode / sessions / questions / timeout
+
+    Returns:
+        dict: 計測結果
+    """
+    sys.path.insert(0, ROOT)
+    import components
+
+    # load_next_question の時間を計る（components は起動後も同じモジュールが使われる）
+    next_question_times = []
+    original = components.load_next_question
+
+    def timed_load_next_question(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            next_question_times.append(time.perf_counter() - start)
+
+    components.load_next_question = timed_load_next_question
+
+    drivers = []
+    run_times = []
+    asked = 0
+    first_run = None
+    rss_base = None
+    for _ in range(scenario["sessions"]):
+        driver = GameDriver(
+            scenario["players"], scenario["time_limit"], scenario["answer_mode"],
+            scenario["questions"], scenario["timeout"],
+        )
+        asked += driver.play()
+        if first_run is None:
+            # 1セッション目の最初の実行には問題バンクの読み込みが含まれる
+            first_run = driver.run_times[0]
+            run_times.extend(driver.run_times[1:])
+            rss_base = _rss_bytes()
+        else:
+            run_times.extend(driver.run_times)
+        # セッションを保持したままにして、セッションあたりのメモリを測る
+        drivers.append(driver)
+    rss_end = _rss_bytes()
+
+    extra_sessions = len(drivers) - 1
+    memory_per_session = None
+    if rss_base is not None and rss_end is not None and extra_sessions > 0:
+        memory_per_session = max(0, rss_end - rss_base) / extra_sessions
+
+    runs = sum(len(driver.run_times) for driver in drivers)
+    return {
+        **{key: scenario[key] for key in ("rows", "players", "time_limit", "answer_mode", "sessions")},
+        "questions_asked": asked,
+        "script_runs": runs,
+        "runs_per_question": runs / asked if asked else None,
+        "first_run_ms": first_run * 1000,
+        "p50_ms": percentile(run_times, 50) * 1000,
+        "p95_ms": percentile(run_times, 95) * 1000,
+        "p99_ms": percentile(run_times, 99) * 1000,
+        "max_ms": max(run_times) * 1000,
+        "next_question_p50_ms": (percentile(next_question_times, 50) or 0.0) * 1000,
+        "next_question_p95_ms": (percentile(next_question_times, 95) or 0.0) * 1000,
+        "memory_per_session_kb": None if memory_per_session is None else memory_per_session / 1024,
+        "peak_rss_mb": None if rss_end is None else rss_end / 1024 / 1024,
+    }
+
+
+############################################################
+# 実行
+############################################################
+
+def parse_time_limit(value):
+    return None if value.lower() in ("none", "0") else int(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="出題ループをブラウザなしでプレイして時間を計測します")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 10000], help="合成する問題数（複数指定可）")
+    parser.add_argument("--players", type=int, nargs="+", default=[1, 4], help="プレイヤー数（複数指定可）")
+    parser.add_argument("--time-limit", type=parse_time_limit, nargs="+", default=[None],
+                        help="制限時間（秒、none は無制限、複数指定可）")
+    parser.add_argument("--answer-mode", default="sequential", choices=["sequential", "simultaneous"],
+                        help="2人以上の解答方法")
+    parser.add_argument("--sessions", type=int, default=3, help="条件ごとにプレイするセッション数")
+    parser.add_argument("--questions", type=int, default=10, help="1ゲームの問題数（10 / 20 / 30）")
+    parser.add_argument("--timeout", type=float, default=120.0, help="スクリプト実行1回の上限（秒）")
+    parser.add_argument("--compiled", action="store_true", help="コンパイル済み問題バンクを使う")
+    parser.add_argument("--workdir", default=None, help="合成CSVの保存先（指定すると次回も再利用）")
+    parser.add_argument("--json", default=None, help="結果を JSON で保存するパス")
+    parser.add_argument("--max-p95-ms", type=float, default=None, help="p95 の上限（超えた条件があれば失敗）")
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # 子プロセス: 1条件を計測して結果を JSON で出力
+    if args.worker is not None:
+        result = run_scenario(json.loads(args.worker))
+        print(json.dumps(result))
+        return 0
+
+    sys.path.insert(0, ROOT)
+    import constants as ct
+
+    if args.questions not in ct.QUESTION_LIMIT_OPTIONS.values():
+        parser.error(f"--questions は {[v for v in ct.QUESTION_LIMIT_OPTIONS.values() if v]} のいずれかです")
+    for time_limit in args.time_limit:
+        if time_limit not in ct.TIME_LIMIT_OPTIONS.values():
+            parser.error(f"--time-limit は {list(ct.TIME_LIMIT_OPTIONS.values())} のいずれかです")
+    for players in args.players:
+        if players not in ct.PLAYER_COUNT_OPTIONS:
+            parser.error(f"--players は {ct.PLAYER_COUNT_OPTIONS} のいずれかです")
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="question_loop_bench_")
+    results = []
+    try:
+        for rows, players, time_limit in itertools.product(args.rows, args.players, args.time_limit):
+            workspace = prepare_workspace(workdir, rows, args.compiled)
+            scenario = {
+                "rows": rows, "players": players, "time_limit": time_limit,
+                "answer_mode": args.answer_mode, "sessions": max(1, args.sessions),
+                "questions": args.questions, "timeout": args.timeout,
+            }
+            completed = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--worker", json.dumps(scenario)],
+                cwd=workspace, capture_output=True, text=True, check=False,
+            )
+            if completed.returncode != 0:
+                print(f"失敗: {scenario}\n{completed.stderr[-2000:]}", file=sys.stderr)
+                return 2
+            results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    finally:
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    header = (f"{'問題数':>9} {'人数':>4} {'制限':>4} {'実行':>5} {'実行/問':>7} {'初回':>8} "
+              f"{'p50':>7} {'p95':>7} {'p99':>7} {'次問p95':>7} {'KB/セッション':>12}")
+    print(header)
+    for r in results:
+        memory = "-" if r["memory_per_session_kb"] is None else f"{r['memory_per_session_kb']:.0f}"
+        print(
+            f"{r['rows']:>9} {r['players']:>4} {str(r['time_limit'] or '-'):>4} {r['script_runs']:>5} "
+            f"{r['runs_per_question']:>7.1f} {r['first_run_ms']:>7.0f}ms {r['p50_ms']:>5.1f}ms "
+            f"{r['p95_ms']:>5.1f}ms {r['p99_ms']:>5.1f}ms {r['next_question_p95_ms']:>5.2f}ms {memory:>12}"
+        )
+    print("（時間はスクリプト実行1回あたり。初回は問題バンクの読み込みを含み、p50〜p99 には含めない）")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    if args.max_p95_ms is not None:
+        slow = [r for r in results if r["p95_ms"] > args.max_p95_ms]
+        if slow:
+            for r in slow:
+                print(f"失敗: {r['rows']}問・{r['players']}人で p95 {r['p95_ms']:.1f}ms が上限 "
+                      f"{args.max_p95_ms:.1f}ms を超えています", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
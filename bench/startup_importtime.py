@@ -0,0 +1,125 @@
+"""
+起動時の import 時間を計測するベンチマーク（python -X importtime を利用）
+アプリが最初の画面を表示するまでに読み込むモジュールを別プロセスで import し、
+累積時間の中央値と、時間のかかっているパッケージを表示する
+重いパッケージ（pandas・openai）が起動時に読み込まれていたら失敗として終了コード 1 を返す
+
+使い方:
+    python bench/startup_importtime.py [--runs 5] [--max-ms 400] [--with-bank] [--with-api-key]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+
+# リポジトリのルート（アプリのモジュールを import するため、ここで実行する）
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 起動時に読み込まれてはいけないパッケージ（ヒント生成・CSV解析の時点で読み込む）
+FORBIDDEN_PACKAGES = ("pandas", "openai")
+
+# main.py が最初の描画までに import するモジュール
+STARTUP_IMPORTS = "import initialize, components, utils"
+
+# 問題バンクの読み込み（コンパイル済みファイルがあれば pandas を使わない）
+BANK_LOAD = (
+    "; import constants as ct; from question_bank import load_question_bank"
+    "; load_question_bank(ct.QUESTIONS_CSV, ct.QUESTIONS_BANK)"
+)
+
+
+############################################################
+# 計測
+############################################################
+
+def parse_importtime(stderr):
+    """
+    -X importtime の出力を解析
+
+    Args:
+        stderr (str): 子プロセスの標準エラー出力
+
+    Returns:
+        list[tuple[str, int, int, int]]: (モジュール名, 自身の時間[μs], 累積時間[μs], 階層の深さ) のリスト
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return entries
+
+
+def run_once(code, env):
+    """
+    別プロセスで import を1回実行し、結果を解析
+
+    Returns:
+        list[tuple[str, int, int, int]]: parse_importtime の結果
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=False,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import に失敗しました:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="起動時の import 時間を計測します")
+    parser.add_argument("--runs", type=int, default=5, help="計測回数（中央値を使用）")
+    parser.add_argument("--max-ms", type=float, default=None, help="累積時間の上限（超えた場合は失敗）")
+    parser.add_argument("--top", type=int, default=10, help="表示するパッケージ数")
+    parser.add_argument("--with-bank", action="store_true", help="問題バンクの読み込みも含める")
+    parser.add_argument("--with-api-key", action="store_true",
+                        help="ダミーの OPENAI_API_KEY を設定する（OpenAI プロバイダーの初期化も含める）")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if args.with_api_key:
+        env["OPENAI_API_KEY"] = "dummy"
+    else:
+        env.pop("OPENAI_API_KEY", None)
+    code = STARTUP_IMPORTS + (BANK_LOAD if args.with_bank else "")
+
+    totals = []
+    packages = {}
+    imported = set()
+    for _ in range(max(1, args.runs)):
+        entries = run_once(code, env)
+        # 最上位（深さ0）のモジュールの累積時間の合計が、起動時の import 時間
+        totals.append(sum(cumulative for _, _, cumulative, depth in entries if depth == 0) / 1000)
+        for name, _, cumulative, depth in entries:
+            imported.add(name.split(".")[0])
+            if depth == 0:
+                packages.setdefault(name, []).append(cumulative / 1000)
+
+    median = statistics.median(totals)
+    print(f"import 時間: 中央値 {median:.1f}ms（最小 {min(totals):.1f}ms / 最大 {max(totals):.1f}ms, {len(totals)}回）")
+    print(f"\n時間のかかっている最上位モジュール（上位 {args.top}）")
+    ranking = sorted(packages.items(), key=lambda item: statistics.median(item[1]), reverse=True)
+    for name, times in ranking[:args.top]:
+        print(f"  {statistics.median(times):8.1f}ms  {name}")
+
+    failed = False
+    loaded = [name for name in FORBIDDEN_PACKAGES if name in imported]
+    if loaded:
+        print(f"\n失敗: 起動時に {', '.join(loaded)} が読み込まれています", file=sys.stderr)
+        if args.with_bank and "pandas" in loaded:
+            print("（問題CSVを解析しています。python compile_questions.py で問題バンクをコンパイルしてください）",
+                  file=sys.stderr)
+        failed = True
+    if args.max_ms is not None and median > args.max_ms:
+        print(f"\n失敗: import 時間 {median:.1f}ms が上限 {args.max_ms:.1f}ms を超えています", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
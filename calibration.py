@@ -0,0 +1,165 @@
+"""
+解答実績による難易度の補正
+問題ごとの正答率・ヒント使用率・解答時間から難易度スコアを求め、easy / normal / hard に振り分け直す
+集計は解答1件ごとに O(1) で更新し、過去の履歴を読み直すことはない
+"""
+
+import random
+import threading
+from array import array
+
+
+# 補正後の難易度（スコアの低い順）
+DIFFICULTY_LEVELS = ("easy", "normal", "hard")
+
+
+class DifficultyCalibrator:
+    """
+    問題ごとの解答集計を保持し、難易度スコアと補正後の難易度を求める
+
+    難易度スコア（0〜1、高いほど難しい）は次の加重和:
+      - 誤答率（CSV の難易度に応じた事前の正答率で平滑化）
+      - ヒント使用率
+      - 平均解答時間 / latency_reference（1 を上限とする）
+    解答数が min_attempts に満たない問題は CSV の難易度をそのまま使う。
+
+    Args:
+        labels (Sequence[str]): 各問題の CSV 上の難易度（行番号順）
+        prior_accuracy (dict): {難易度: 事前の正答率}
+        prior_weight (float): 事前の正答率を何回分の解答とみなすか
+        min_attempts (int): 補正を使い始める解答数
+        latency_reference (float): 解答時間のスコアが最大になる秒数
+        weights (tuple[float, float, float]): (誤答率, ヒント使用率, 解答時間) の重み
+        bands (tuple[float, float]): easy / normal、normal / hard の境界となるスコア
+    """
+
+    def __init__(self, labels, prior_accuracy, prior_weight=5.0, min_attempts=5,
+                 latency_reference=30.0, weights=(0.6, 0.2, 0.2), bands=(0.35, 0.55)):
+        self.labels = list(labels)
+        self.prior_weight = prior_weight
+        self.min_attempts = min_attempts
+        self.latency_reference = latency_reference
+        self.weights = weights
+        self.bands = bands
+
+        size = len(self.labels)
+        default_accuracy = prior_accuracy.get("normal", 0.6)
+        self._prior = array("d", (prior_accuracy.get(label, default_accuracy) for label in self.labels))
+        self._attempts = array("i", bytes(4 * size))
+        self._correct = array("i", bytes(4 * size))
+        self._hints = array("i", bytes(4 * size))
+        self._answered = array("i", bytes(4 * size))
+        self._latency_sum = array("d", bytes(8 * size))
+        self._scores = array("d", bytes(8 * size))
+        self._calibrated = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.labels)
+
+    def load(self, question_id, attempts, correct, hints, answered, total_latency):
+        """
+        保存済みの集計をまとめて反映する（起動時の初期化用）
+
+        Args:
+            question_id (int): 問題ID（行番号）
+            attempts (int): 解答数
+            correct (int): 正解数
+            hints (int): ヒント使用数
+            answered (int): 解答時間を記録できた解答数
+            total_latency (float): 解答時間の合計（秒）
+        """
+        if not 0 <= question_id < len(self.labels):
+            return
+        with self._lock:
+            before = self._attempts[question_id]
+            self._attempts[question_id] += attempts
+            if before < self.min_attempts <= before + attempts:
+                self._calibrated += 1
+            self._correct[question_id] += correct
+            self._hints[question_id] += hints
+            self._answered[question_id] += answered
+            self._latency_sum[question_id] += total_latency
+            self._rescore(question_id)
+
+    def update(self, question_id, is_correct, hint_used, latency):
+        """
+        解答1件を反映する
+
+        Args:
+            question_id (int): 問題ID（行番号）
+            is_correct (bool): 正解かどうか
+            hint_used (bool): ヒントを使用したかどうか
+            latency (float | None): 解答までの時間（秒、未解答は None）
+        """
+        answered = 0 if latency is None else 1
+        self.load(question_id, 1, int(is_correct), int(hint_used), answered, latency or 0.0)
+
+    def score(self, question_id):
+        """
+        難易度スコアを取得
+
+        Returns:
+            float | None: 0〜1 のスコア（解答数が足りない場合は None）
+        """
+        if self._attempts[question_id] < self.min_attempts:
+            return None
+        return self._scores[question_id]
+
+    def level(self, question_id):
+        """
+        補正後の難易度を取得
+
+        Returns:
+            str: "easy" / "normal" / "hard"（解答数が足りない場合は CSV の難易度）
+        """
+        score = self.score(question_id)
+        if score is None:
+            return self.labels[question_id]
+        if score < self.bands[0]:
+            return DIFFICULTY_LEVELS[0]
+        if score < self.bands[1]:
+            return DIFFICULTY_LEVELS[1]
+        return DIFFICULTY_LEVELS[2]
+
+    def calibrated_count(self):
+        """
+        補正済み（解答数が min_attempts 以上）の問題数
+
+        Returns:
+            int: 問題数
+        """
+        return self._calibrated
+
+    def new_deck(self, candidates, difficulty):
+        """
+        候補の行番号から補正後の難易度が一致するものを選び、シャッフルした山札を作成
+
+        Args:
+            candidates (Iterable[int]): 候補の行番号（ジャンルで絞り込み済み）
+            difficulty (str): 補正後の難易度
+
+        Returns:
+            array: シャッフル済みの行番号配列
+        """
+        deck = array("i", (row_id for row_id in candidates if self.level(row_id) == difficulty))
+        random.shuffle(deck)
+        return deck
+
+    def _rescore(self, question_id):
+        attempts = self._attempts[question_id]
+        if attempts == 0:
+            return
+        accuracy = (
+            (self._correct[question_id] + self.prior_weight * self._prior[question_id])
+            / (attempts + self.prior_weight)
+        )
+        hint_rate = self._hints[question_id] / attempts
+        answered = self._answered[question_id]
+        if answered > 0:
+            slowness = min(1.0, self._latency_sum[question_id] / answered / self.latency_reference)
+        else:
+            # 全員時間切れの問題は最も遅い扱いにする
+            slowness = 1.0
+        w_error, w_hint, w_latency = self.weights
+        self._scores[question_id] = w_error * (1.0 - accuracy) + w_hint * hint_rate + w_latency * slowness
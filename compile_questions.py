@@ -0,0 +1,53 @@
+"""
+問題CSVをコンパイル済み問題バンク（バイナリ形式）に変換するコマンド
+アプリは CSV と一致するコンパイル済みファイルがあれば、CSV を解析せずにメモリマップで開く
+CSV を更新した場合は再度実行する（古いファイルは自動的に使われなくなる）
+
+使い方:
+    python compile_questions.py [--csv data/questions.csv] [--output data/questions.qbank]
+"""
+
+import argparse
+import os
+import sys
+import time
+import constants as ct
+from question_bank import compile_question_bank, open_question_bank
+
+
+def main():
+    parser = argparse.ArgumentParser(description="問題CSVをコンパイル済み問題バンクに変換します")
+    parser.add_argument("--csv", default=ct.QUESTIONS_CSV, help="問題CSVファイル")
+    parser.add_argument("--output", default=ct.QUESTIONS_BANK, help="コンパイル済みファイルの出力先")
+    parser.add_argument("--chunk-rows", type=int, default=ct.QUESTIONS_CHUNK_ROWS, help="1回に読み込む行数")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        bank = compile_question_bank(args.csv, args.output, chunk_rows=max(1, args.chunk_rows))
+    except FileNotFoundError:
+        print(f"エラー: {args.csv} が見つかりません", file=sys.stderr)
+        return 2
+    except ValueError as e:
+        print(f"エラー: {e}", file=sys.stderr)
+        return 2
+    elapsed = time.perf_counter() - start
+
+    # 書き出したファイルを開き直して、全問題が同じ内容で読めるか確認する
+    compiled = open_question_bank(args.output, source_path=args.csv)
+    if compiled is None or any((
+        bytes(compiled.correct) != bank.correct.tobytes(),
+        bytes(compiled.genre_codes) != bank.genre_codes.tobytes(),
+        bytes(compiled.difficulty_codes) != bank.difficulty_codes.tobytes(),
+        any(compiled.texts.get(row_id) != bank.texts.get(row_id) for row_id in range(len(bank))),
+    )):
+        print(f"エラー: {args.output} の検証に失敗しました", file=sys.stderr)
+        return 1
+
+    size_mb = os.path.getsize(args.output) / (1024 * 1024)
+    print(f"完了: {len(bank)}問 / ジャンル {len(bank.genres)}種類 / {size_mb:.1f}MB / {elapsed:.1f}秒 → {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,83 @@
+import html
+import json
+import time
+import uuid
 import streamlit as st
 import constants as ct
-from utils import get_hint, load_next_question, update_player_score, get_next_player
-import time
+from utils import (
+    get_hint, load_next_question, load_questions_csv, load_static_asset, prefetch_upcoming_hint,
+    update_player_score, record_player_answer, get_difficulty_calibrator, get_next_player,
+    start_question_timer, get_elapsed_time, get_remaining_time, handle_time_up, is_simultaneous,
+    get_player_points, get_player_name, get_scoreboard, create_room, get_room_hub,
+)
+from rooms import PHASE_WAITING, PHASE_QUESTION, PHASE_RESULT, RoomError
+
+
+############################################################
+# 静的ファイル（CSS・JavaScript）
+############################################################
+
+# ページの <head> に、まだ読み込まれていない（または更新された）ファイルだけを追加する
+# <head> に追加した要素は再実行で消えないため、送信はセッションごとに1回で済む
+_ASSET_LOADER_JS = """
+(function () {
+    const assets = %s;
+
+    function addOnce(id, version, create) {
+        const current = document.getElementById(id);
+        if (current && current.dataset.version === version) {
+            return;
+        }
+        const el = create();
+        el.id = id;
+        el.dataset.version = version;
+        if (current) {
+            current.replaceWith(el);
+        } else {
+            document.head.appendChild(el);
+        }
+    }
+
+    // 自動翻訳防止
+    addOnce('app-notranslate-meta', '1', () => {
+        const meta = document.createElement('meta');
+        meta.name = 'google';
+        meta.content = 'notranslate';
+        return meta;
+    });
+
+    addOnce('app-theme', assets.css.version, () => {
+        const style = document.createElement('style');
+        style.textContent = assets.css.text;
+        return style;
+    });
+
+    addOnce('notranslate-script', assets.js.version, () => {
+        const script = document.createElement('script');
+        script.textContent = assets.js.text;
+        return script;
+    });
+})();
+"""
+
+
+def _static_asset_source(name):
+    version, text = load_static_asset(name)
+    return {"version": str(version), "text": text}
+
+
+def load_static_assets():
+    """テーマのCSSと翻訳防止のJavaScriptをページの <head> に読み込む（セッションごとに1回）"""
+    if st.session_state.get("static_assets_loaded"):
+        return
+    assets = {
+        "css": _static_asset_source(ct.THEME_CSS),
+        "js": _static_asset_source(ct.ANTI_TRANSLATION_JS),
+    }
+    # ファイルの内容に "</script>" が含まれていてもスクリプトが途中で閉じないようにする
+    payload = json.dumps(assets, ensure_ascii=False).replace("</", "<\\/")
+    st.html(f"<script>{_ASSET_LOADER_JS % payload}</script>", unsafe_allow_javascript=True)
+    st.session_state.static_assets_loaded = True
 
 
 ############################################################
@@ -39,52 +115,71 @@ def show_start_guide():
 # フィルター
 ############################################################
 
-def show_sidebar_filters(df):
-    # サイドバー全体の翻訳を防止とフォントサイズ調整
-    st.sidebar.markdown("""
-    <style>
-        [data-testid="stSidebar"], [data-testid="stSidebar"] * {
-            translate: no !important;
-        }
-        .stSelectbox, .stButton {
-            translate: no !important;
-        }
-        /* サイドバーのフォントサイズを小さく調整 */
-        [data-testid="stSidebar"] h3 {
-            font-size: 1.1rem !important;
-        }
-        [data-testid="stSidebar"] h4 {
-            font-size: 0.95rem !important;
-            margin-top: 0.8rem !important;
-            margin-bottom: 0.3rem !important;
-        }
-        [data-testid="stSidebar"] .stSelectbox label {
-            font-size: 0.9rem !important;
-        }
-        [data-testid="stSidebar"] button {
-            font-size: 1rem !important;
-        }
-    </style>
-    """, unsafe_allow_html=True)
-    
+def show_sidebar_filters(bank):
     st.sidebar.markdown(f"### {ct.TITLE_CUSTOMIZE}")
 
-    genres = ["ランダム"] + sorted(df["genre"].unique())
-    diffs = ["ランダム", "easy", "normal", "hard"]
+    genres = [ct.FILTER_RANDOM] + bank.genres
+    diffs = [ct.FILTER_RANDOM, "easy", "normal", "hard"]
 
     genre = st.sidebar.selectbox("ジャンル", genres)
     difficulty = st.sidebar.selectbox("難易度", diffs)
+    difficulty_mode_label = st.sidebar.radio(
+        "難易度の基準",
+        list(ct.DIFFICULTY_MODE_OPTIONS.keys()),
+        horizontal=True,
+        key="difficulty_mode_select",
+    )
+    difficulty_mode = ct.DIFFICULTY_MODE_OPTIONS[difficulty_mode_label]
+    if difficulty_mode == ct.DIFFICULTY_MODE_CALIBRATED:
+        calibrated = get_difficulty_calibrator(bank).calibrated_count()
+        st.sidebar.caption(
+            f"解答実績で判定済み: {calibrated} / {len(bank)}問（{ct.CALIBRATION_MIN_ATTEMPTS}回未満の問題は設定どおり）"
+        )
     
-    # プレイヤー数選択
+    # プレイ方法（この端末で交代 / 各自の端末でルームに参加）
     st.sidebar.markdown("---")
-    st.sidebar.markdown(f"#### {ct.ICON_PLAYER} プレイヤー数")
-    player_count = st.sidebar.selectbox(
-        "人数を選択",
-        ct.PLAYER_COUNT_OPTIONS,
-        key="player_count_select",
-        label_visibility="collapsed"
+    play_mode_label = st.sidebar.radio(
+        "プレイ方法",
+        list(ct.PLAY_MODE_OPTIONS.keys()),
+        key="play_mode_select",
     )
+    play_mode = ct.PLAY_MODE_OPTIONS[play_mode_label]
+
+    # プレイヤー数選択（ルームでは参加した人数になる）
+    if play_mode == ct.PLAY_MODE_LOCAL:
+        st.sidebar.markdown(f"#### {ct.ICON_PLAYER} プレイヤー数")
+        player_count = st.sidebar.selectbox(
+            "人数を選択",
+            ct.PLAYER_COUNT_OPTIONS,
+            key="player_count_select",
+            label_visibility="collapsed"
+        )
+    else:
+        player_count = st.session_state.player_count
+
+    # 解答方法（この端末での2人以上のプレイのみ、全員同時に解答できる）
+    if play_mode == ct.PLAY_MODE_LOCAL and player_count > 1:
+        answer_mode_label = st.sidebar.radio(
+            "解答方法",
+            list(ct.ANSWER_MODE_OPTIONS.keys()),
+            horizontal=True,
+            key="answer_mode_select",
+        )
+        answer_mode = ct.ANSWER_MODE_OPTIONS[answer_mode_label]
+    else:
+        answer_mode = ct.ANSWER_MODE_SEQUENTIAL
     
+    # 出題順（この端末での1人プレイのみ苦手優先を選べる）
+    if play_mode == ct.PLAY_MODE_LOCAL and player_count == 1:
+        question_order_label = st.sidebar.radio(
+            "出題順",
+            list(ct.QUESTION_ORDER_OPTIONS.keys()),
+            key="question_order_select",
+        )
+        question_order = ct.QUESTION_ORDER_OPTIONS[question_order_label]
+    else:
+        question_order = ct.QUESTION_ORDER_RANDOM
+
     # 問題数制限
     st.sidebar.markdown(f"#### {ct.ICON_SCOREBOARD} 問題数")
     question_limit_label = st.sidebar.selectbox(
@@ -104,16 +199,31 @@ def show_sidebar_filters(df):
         label_visibility="collapsed"
     )
     time_limit = ct.TIME_LIMIT_OPTIONS[time_limit_label]
+
+    # 得点の計算方法
+    scoring_label = st.sidebar.radio(
+        "得点",
+        list(ct.SCORING_OPTIONS.keys()),
+        horizontal=True,
+        key="scoring_select",
+    )
+    scoring = ct.SCORING_OPTIONS[scoring_label]
     
-    # NEW GAME ボタン（制限時間の下に配置）
-    st.sidebar.markdown("---")
-    if st.sidebar.button(ct.BTN_NEW_GAME, use_container_width=True):
-        reset_game()
+    # NEW GAME ボタン（制限時間の下に配置、ルームは画面上で作成する）
+    if play_mode == ct.PLAY_MODE_LOCAL:
+        st.sidebar.markdown("---")
+        if st.sidebar.button(ct.BTN_NEW_GAME, use_container_width=True):
+            reset_game()
 
     # セッションに保存
     st.session_state.genre = genre
     st.session_state.difficulty = difficulty
+    st.session_state.difficulty_mode = difficulty_mode
+    st.session_state.play_mode = play_mode
     st.session_state.player_count = player_count
+    st.session_state.answer_mode = answer_mode
+    st.session_state.scoring = scoring
+    st.session_state.question_order = question_order
     st.session_state.question_limit = question_limit
     st.session_state.time_limit = time_limit
 
@@ -128,76 +238,118 @@ def reset_game():
     st.session_state.user_answer = None
     st.session_state.show_result = False
     st.session_state.question_number = 1
-    st.session_state.asked_questions = {}  # 出題履歴もリセット
+    st.session_state.deck = None  # 山札もリセット（次の出題時に作り直す）
+    st.session_state.deck_cursor = 0
+    st.session_state.scheduler = None
     st.session_state.all_questions_done = False  # 全問完了フラグもリセット
     st.session_state.no_questions_available = False  # 問題なしフラグもリセット
     st.session_state.game_started = True  # ゲーム開始
     
     # マルチプレイヤー関連のリセット
     st.session_state.current_player = 0
-    st.session_state.player_scores = {}
+    st.session_state.player_scores = None  # 次の採点時にプレイヤー数分のスコアボードを作る
     st.session_state.hint_used = False
     st.session_state.player_hints_used = {}  # 各プレイヤーのヒント使用状態をリセット
     st.session_state.question_start_time = None
+    st.session_state.question_deadline = None
+    st.session_state.timeout_notice = None
     st.session_state.game_finished = False
     st.session_state.player_answers = {}
+    st.session_state.player_latencies = {}
     st.session_state.all_players_answered = False
     st.session_state.result_processed = False  # スコア更新フラグもリセット
+    st.session_state.session_id = uuid.uuid4().hex  # 解答履歴はゲームごとに別セッションとして記録
 
 
 ############################################################
 # スコアボード表示（問題上部に横並び）
 ############################################################
 def show_scoreboard():
-    """全プレイヤーのスコアを横並びで表示"""
+    """全プレイヤーのスコアを横並びで表示（1行に収まらない人数は得点順にページ分け）"""
     player_count = st.session_state.player_count
     
     if player_count == 1:
         return  # 1人プレイ時は表示しない
     
     st.markdown(f"### {ct.ICON_SCOREBOARD} スコアボード")
+    board = get_scoreboard()
     
-    # プレイヤー数に応じてカラムを作成
-    cols = st.columns(player_count)
+    # 1行に収まる人数は席順、それ以上は得点順の上位からページ単位で表示
+    if player_count <= ct.SCOREBOARD_COLUMNS:
+        entries = [(None, i) for i in range(player_count)]
+    else:
+        offset = show_page_selector("scoreboard_page", player_count, ct.SCOREBOARD_PAGE_SIZE)
+        entries = board.page(offset, ct.SCOREBOARD_PAGE_SIZE)
     
-    for i in range(player_count):
-        player_name = ct.PLAYER_NAMES[i]
-        score_data = st.session_state.player_scores.get(i, {"correct": 0, "total": 0, "points": 0.0})
-        
-        # 正解率計算
-        if score_data["total"] > 0:
-            percentage = (score_data["correct"] / score_data["total"]) * 100
-            score_text = f"{score_data['correct']}/{score_data['total']} ({percentage:.0f}%)"
-        else:
-            score_text = "0/0 (0%)"
-        
-        # ポイント表示
-        points = score_data['points']
-        
-        # 現在の解答者かどうかで表示を変更
-        is_current = (i == st.session_state.current_player)
-        
-        with cols[i]:
-            if is_current:
-                st.markdown(f"""
-                <div style='padding: 1.2rem; background-color: {ct.THEME_SUB_COLOR}; border: 3px solid {ct.THEME_COLOR}; border-radius: 10px; text-align: center;'>
-                    <div style='font-size: 1.8rem; font-weight: bold; color: {ct.THEME_COLOR};'>{player_name}</div>
-                    <div style='font-size: 1.1rem; color: #666; margin: 0.5rem 0;'>{score_text}</div>
-                    <div style='font-size: 1.5rem; font-weight: bold; color: {ct.THEME_COLOR};'>{points:.1f}点</div>
-                </div>
-                """, unsafe_allow_html=True)
-            else:
-                st.markdown(f"""
-                <div style='padding: 1.2rem; background-color: white; border: 1px solid #ddd; border-radius: 10px; text-align: center;'>
-                    <div style='font-size: 1.6rem; font-weight: bold; color: {ct.THEME_COLOR};'>{player_name}</div>
-                    <div style='font-size: 1.1rem; color: #666; margin: 0.5rem 0;'>{score_text}</div>
-                    <div style='font-size: 1.3rem; font-weight: bold; color: {ct.THEME_COLOR};'>{points:.1f}点</div>
-                </div>
-                """, unsafe_allow_html=True)
+    for row_start in range(0, len(entries), ct.SCOREBOARD_COLUMNS):
+        row = entries[row_start:row_start + ct.SCOREBOARD_COLUMNS]
+        cols = st.columns(min(player_count, ct.SCOREBOARD_COLUMNS))
+        for col, (rank, i) in zip(cols, row):
+            with col:
+                show_score_card(board, rank, i)
     
     st.write("")
 
 
+def show_score_card(board, rank, i):
+    """1人分のスコアカード（rank を指定した場合は順位も表示）"""
+    player_name = get_player_name(i)
+    if rank is not None:
+        player_name = f"{rank}位 {player_name}"
+    correct, total, points = board.score(i)
+    
+    # 正解率計算
+    if total > 0:
+        percentage = (correct / total) * 100
+        score_text = f"{correct}/{total} ({percentage:.0f}%)"
+    else:
+        score_text = "0/0 (0%)"
+    
+    # 現在の解答者かどうかで表示を変更（全員同時に解答する場合は解答済みのプレイヤー）
+    if is_simultaneous():
+        is_current = i in st.session_state.player_answers
+    else:
+        is_current = (i == st.session_state.current_player)
+    
+    if is_current:
+        st.markdown(f"""
+        <div style='padding: 1.2rem; background-color: {ct.THEME_SUB_COLOR}; border: 3px solid {ct.THEME_COLOR}; border-radius: 10px; text-align: center;'>
+            <div style='font-size: 1.8rem; font-weight: bold; color: {ct.THEME_COLOR};'>{player_name}</div>
+            <div style='font-size: 1.1rem; color: #666; margin: 0.5rem 0;'>{score_text}</div>
+            <div style='font-size: 1.5rem; font-weight: bold; color: {ct.THEME_COLOR};'>{points:.1f}点</div>
+        </div>
+        """, unsafe_allow_html=True)
+    else:
+        st.markdown(f"""
+        <div style='padding: 1.2rem; background-color: white; border: 1px solid #ddd; border-radius: 10px; text-align: center;'>
+            <div style='font-size: 1.6rem; font-weight: bold; color: {ct.THEME_COLOR};'>{player_name}</div>
+            <div style='font-size: 1.1rem; color: #666; margin: 0.5rem 0;'>{score_text}</div>
+            <div style='font-size: 1.3rem; font-weight: bold; color: {ct.THEME_COLOR};'>{points:.1f}点</div>
+        </div>
+        """, unsafe_allow_html=True)
+
+
+def show_page_selector(key, total, page_size):
+    """
+    ページ番号の選択を表示し、表示を始める位置を返す
+    
+    Args:
+        key (str): ウィジェットのキー
+        total (int): 全件数
+        page_size (int): 1ページあたりの件数
+        
+    Returns:
+        int: 表示を始める位置（0始まり）
+    """
+    pages = (total + page_size - 1) // page_size
+    if pages <= 1:
+        return 0
+    page = st.number_input(
+        f"ページ（全{pages}ページ / {total}人）", min_value=1, max_value=pages, value=1, step=1, key=key,
+    )
+    return (int(page) - 1) * page_size
+
+
 ############################################################
 # 現在の解答者表示
 ############################################################
@@ -205,10 +357,10 @@ def show_current_player():
     """現在の解答者を大きく表示"""
     player_count = st.session_state.player_count
     
-    if player_count == 1:
-        return  # 1人プレイ時は表示しない
+    if player_count == 1 or is_simultaneous():
+        return  # 1人プレイ時・全員同時に解答する場合は表示しない
     
-    current_player_name = ct.PLAYER_NAMES[st.session_state.current_player]
+    current_player_name = get_player_name(st.session_state.current_player)
     
     # HTML背景 + Streamlitアイコンを分離
     st.markdown(f"""
@@ -222,6 +374,50 @@ def show_current_player():
     st.markdown("</div>", unsafe_allow_html=True)
 
 
+############################################################
+# 残り時間（1秒ごとにこの部分だけ再描画）
+############################################################
+
+@st.fragment(run_every=1)
+def show_timer():
+    """残り時間を表示し、期限を過ぎたら時間切れの処理を行う"""
+    if st.session_state.all_players_answered:
+        return
+
+    remaining_time = get_remaining_time()
+    if remaining_time is None:
+        return
+
+    # 時間切れ（現在のプレイヤーの解答を-1にして次へ、ゲーム画面を再描画）
+    # 次の解答者・結果を表示するには親のフラグメント（show_game_area）を再実行する必要があるが、
+    # 入れ子のフラグメントから親だけを再実行する手段はない（scope="fragment" はこのフラグメント自身、
+    # キー指定の再実行はコールバック内からのみ）。ゲーム画面に run_every を付けると、毎秒の再実行で
+    # ストリーミング中のヒントが中断される。そのため、期限を過ぎた1回に限ってアプリ全体を再実行する
+    # （毎秒の更新はこのフラグメントだけで行い、期限は単調時計で判定するので待機はしない）
+    if remaining_time <= 0:
+        if handle_time_up():
+            st.rerun(scope="app")
+        return
+
+    # 残り時間を表示
+    st.markdown(f"""
+    <div style='text-align: center; margin-bottom: 1rem;'>
+        <span style='font-size: 1.2rem; color: {ct.THEME_COLOR}; font-weight: bold;'>
+            {ct.ICON_TIMER.replace(':', '').replace('material/', '')} 残り時間: {int(remaining_time)}秒
+        </span>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    if remaining_time <= 10:  # 残り10秒以下は警告色
+        st.markdown(f"""
+        <div style='text-align: center; margin-bottom: 1rem; padding: 0.5rem; background-color: #fff3cd; border-radius: 5px;'>
+            <span style='font-size: 1rem; color: #856404;'>
+                {ct.ICON_WARNING.replace(':', '').replace('material/', '')} 制限時間が迫っています！
+            </span>
+        </div>
+        """, unsafe_allow_html=True)
+
+
 ############################################################
 # 問題文
 ############################################################
@@ -232,18 +428,135 @@ def show_question():
 
     html = (
         f"<h3 style='line-height:1.6; word-wrap:break-word;'>"
-        f"<span style='color:{ct.THEME_COLOR}; font-size:inherit; font-weight:bold;'>Q{num}</span>　{q['question']}"
+        f"<span style='color:{ct.THEME_COLOR}; font-size:inherit; font-weight:bold;'>Q{num}</span>　{q.question}"
         f"</h3>"
     )
     st.markdown(html, unsafe_allow_html=True)
     st.write("")
 
 
+############################################################
+# ゲーム操作（ボタンのコールバック）
+############################################################
+# コールバックは再描画の前に実行されるため、st.rerun() を呼ばずに
+# ゲーム画面のフラグメントだけを最新の状態で再描画できる
+
+def select_option(player, index):
+    """選択肢を選ぶ（期限切れの場合は時間切れとして扱い、選択は無視する）"""
+    if handle_time_up():
+        return
+    if is_simultaneous():
+        # 全員同時に解答する場合は最初に押した選択肢で確定し、全員そろったら結果を表示
+        if player in st.session_state.player_answers:
+            return
+        st.session_state.player_answers[player] = index
+        st.session_state.player_latencies[player] = get_elapsed_time()
+        if len(st.session_state.player_answers) >= st.session_state.player_count:
+            reveal_results()
+        return
+    st.session_state.player_answers[player] = index
+    st.session_state.player_latencies[player] = get_elapsed_time()
+
+
+def advance_player(next_player):
+    """次のプレイヤーへ交代"""
+    st.session_state.current_player = next_player
+    # タイマーリセット
+    start_question_timer()
+
+
+def reveal_results():
+    """全員の解答結果を表示"""
+    st.session_state.all_players_answered = True
+    st.session_state.show_result = True
+
+
+def finish_game():
+    """ゲームを終了して最終結果へ"""
+    st.session_state.game_finished = True
+
+
+def go_to_next_question():
+    """次の問題へ進む（全問出題済み・問題数制限に達した場合はゲーム終了）"""
+    st.session_state.question_number += 1
+    load_next_question(
+        load_questions_csv(),
+        st.session_state.genre,
+        st.session_state.difficulty,
+    )
+    
+    # 全問出題完了時
+    if st.session_state.all_questions_done:
+        st.session_state.game_finished = True
+        return
+    
+    # 問題数制限チェック（出題された問題数でカウント）
+    if st.session_state.question_limit is not None:
+        if st.session_state.question_number > st.session_state.question_limit:
+            st.session_state.game_finished = True
+            return
+    
+    # 次の問題の準備
+    st.session_state.current_player = 0  # 最初のプレイヤーに戻す
+    st.session_state.player_answers = {}  # 解答記録をクリア
+    st.session_state.player_latencies = {}
+    st.session_state.player_hints_used = {}  # ヒント使用記録をクリア
+    st.session_state.all_players_answered = False
+    st.session_state.show_result = False
+    start_question_timer()
+    st.session_state.result_processed = False
+
+
+############################################################
+# ゲーム画面（ボタン操作時はこの部分だけ再描画）
+############################################################
+
+@st.fragment
+def show_game_area(bank, genre, difficulty):
+    """スコアボード・解答者・残り時間・問題・選択肢をまとめて表示"""
+    # ゲーム終了時は最終結果画面へ（アプリ全体を再実行）
+    if st.session_state.game_finished:
+        st.rerun()
+
+    # 時間切れの確認（期限はサーバー側で判定）
+    if st.session_state.time_limit is not None and not st.session_state.all_players_answered:
+        handle_time_up()
+
+    # 時間切れの通知（待機せずにトーストで表示）
+    if st.session_state.timeout_notice is not None:
+        st.toast(f"{st.session_state.timeout_notice}さんの時間切れです！", icon=ct.ICON_TIMER)
+        st.session_state.timeout_notice = None
+
+    # スコアボード表示（マルチプレイ時のみ、問題の上部）
+    show_scoreboard()
+
+    # 現在の解答者表示（マルチプレイ時のみ）
+    show_current_player()
+
+    # 初回ロード
+    if st.session_state.current_question is None:
+        load_next_question(bank, genre, difficulty)
+        start_question_timer()
+
+    # 問題が存在しない場合のメッセージ表示
+    if st.session_state.no_questions_available:
+        st.warning("この組み合わせの問題は存在しません", icon=ct.ICON_WARNING)
+        st.info("サイドバーから別のジャンルや難易度を選択してください", icon=ct.ICON_INFO)
+        return
+
+    # 残り時間（全員解答前のみ）
+    if st.session_state.time_limit is not None and not st.session_state.all_players_answered:
+        show_timer()
+
+    show_question()
+    show_answer_area(bank)
+
+
 ############################################################
 # 選択肢 ＆ Tips
 ############################################################
 
-def show_answer_area():
+def show_answer_area(bank):
     q = st.session_state.current_question
     options = st.session_state.shuffled_options
     correct_index = st.session_state.correct_index
@@ -252,7 +565,11 @@ def show_answer_area():
 
     # 全員解答済みの場合は結果表示
     if st.session_state.all_players_answered:
-        show_all_players_result(q, correct_index)
+        show_all_players_result(bank, q, correct_index)
+        return
+
+    if is_simultaneous():
+        show_simultaneous_answer_area()
         return
 
     st.markdown(f"### {ct.TITLE_SELECT_OPTIONS}")
@@ -268,9 +585,10 @@ def show_answer_area():
         label = ct.CHOICE_LABELS[i]
         # 現在の選択をハイライト
         button_type = "primary" if current_player in st.session_state.player_answers and st.session_state.player_answers[current_player] == i else "secondary"
-        if st.button(f"{label}: {opt}", key=f"opt_{i}", use_container_width=True, type=button_type):
-            st.session_state.player_answers[current_player] = i
-            st.rerun()
+        st.button(
+            f"{label}: {opt}", key=f"opt_{i}", use_container_width=True, type=button_type,
+            on_click=select_option, args=(current_player, i),
+        )
 
     st.write("---")
 
@@ -281,10 +599,12 @@ def show_answer_area():
             # 現在のプレイヤーのヒント使用フラグを立てる
             st.session_state.player_hints_used[current_player] = True
             # 正解の解説を取得してヒント生成
-            explanations = str(q.get("option_explanations", "")).split("|")
-            correct_explanation = explanations[int(q["correct_option"]) - 1] if len(explanations) >= int(q["correct_option"]) else "解説がありません"
-            hint = get_hint(correct_explanation, q["difficulty"])
-            st.info(hint, icon=ct.ICON_HINT)
+            # 届いた断片から順に表示（解答・時間切れで中断される）
+            hint_box = st.empty()
+            hint = ""
+            for chunk in get_hint(q.correct_explanation, q.difficulty, answer=q.options[q.correct]):
+                hint += chunk
+                hint_box.info(hint, icon=ct.ICON_HINT)
             st.warning("ヒントを使用すると正解時の得点が0.5点になります", icon=ct.ICON_INFO)
         except ValueError as e:
             st.error(str(e), icon=":material/error:")
@@ -300,35 +620,73 @@ def show_answer_area():
         
         if is_last_player:
             # 最後のプレイヤーは「解答を表示」ボタン
-            if st.button(f"{ct.ICON_CHART} 解答を表示", use_container_width=True, type="primary"):
-                st.session_state.all_players_answered = True
-                st.session_state.show_result = True
-                st.rerun()
+            st.button(f"{ct.ICON_CHART} 解答を表示", use_container_width=True, type="primary",
+                      on_click=reveal_results)
         else:
             # 次のプレイヤー名を取得
             next_player_idx = current_player + 1
-            next_player_name = ct.PLAYER_NAMES[next_player_idx]
+            next_player_name = get_player_name(next_player_idx)
             
-            if st.button(f"{ct.ICON_ARROW_NEXT} 次のプレイヤーへ（{next_player_name}）", use_container_width=True, type="primary"):
-                st.session_state.current_player = next_player_idx
-                # タイマーリセット
-                st.session_state.question_start_time = time.time()
-                st.rerun()
+            st.button(f"{ct.ICON_ARROW_NEXT} 次のプレイヤーへ（{next_player_name}）", use_container_width=True, type="primary",
+                      on_click=advance_player, args=(next_player_idx,))
     else:
-        st.warning(f"{ct.ICON_WARNING} {ct.PLAYER_NAMES[current_player]}さん、選択肢を選んでください")
+        st.warning(f"{ct.ICON_WARNING} {get_player_name(current_player)}さん、選択肢を選んでください")
+
+
+############################################################
+# 選択肢（全員同時に解答）
+############################################################
+
+def show_simultaneous_answer_area():
+    """全員が同じ制限時間内に、プレイヤーごとのボタンで解答する"""
+    options = st.session_state.shuffled_options
+    player_count = st.session_state.player_count
+
+    st.markdown(f"### {ct.TITLE_SELECT_OPTIONS}")
+    for i, opt in enumerate(options):
+        st.markdown(f"**{ct.CHOICE_LABELS[i]}**: {opt}")
+    st.caption("各プレイヤーは自分の列のボタンを押してください（最初に押した選択肢で確定、ヒントは使えません）")
+
+    # プレイヤーごとの列に選択肢ボタンを並べる（1行に収まらない人数はページ分け）
+    offset = show_page_selector("simultaneous_page", player_count, ct.SCOREBOARD_COLUMNS)
+    players = range(offset, min(offset + ct.SCOREBOARD_COLUMNS, player_count))
+    cols = st.columns(min(player_count, ct.SCOREBOARD_COLUMNS))
+    for col, player in zip(cols, players):
+        answered = player in st.session_state.player_answers
+        with col:
+            st.markdown(f"#### {ct.ICON_PLAYER} {get_player_name(player)}")
+            for i in range(len(options)):
+                selected = answered and st.session_state.player_answers[player] == i
+                st.button(
+                    ct.CHOICE_LABELS[i], key=f"sim_opt_{player}_{i}", use_container_width=True,
+                    type="primary" if selected else "secondary", disabled=answered,
+                    on_click=select_option, args=(player, i),
+                )
+
+    st.write("---")
+    answered_count = len(st.session_state.player_answers)
+    st.progress(answered_count / player_count, text=f"解答済み {answered_count} / {player_count}人")
+    st.button(f"{ct.ICON_CHART} 締め切って解答を表示", use_container_width=True, on_click=close_answers)
+
+
+def close_answers():
+    """全員同時に解答する場合に、未解答のプレイヤーを時間切れにして結果を表示"""
+    for player in range(st.session_state.player_count):
+        st.session_state.player_answers.setdefault(player, -1)
+    reveal_results()
 
 
 ############################################################
 # 全選択肢の解説表示
 ############################################################
 
-def show_all_options_explanation(q, options, correct_index):
-    """全選択肢の解説をカード形式で表示"""
+def show_all_options_explanation(q, options, correct_index, shuffled_indices=None):
+    """全選択肢の解説をカード形式で表示（shuffled_indices を省略した場合はセッションの並び順）"""
     st.markdown(f"### {ct.ICON_BOOK} 全選択肢の解説")
     
-    # option_explanationsを|で分割
-    if "option_explanations" in q and q["option_explanations"]:
-        explanations = str(q["option_explanations"]).split("|")
+    # 読込時に分割済みの解説を使用
+    if q.explanations:
+        explanations = q.explanations
         
         # 解説が4つない場合のエラー処理
         if len(explanations) < 4:
@@ -336,7 +694,8 @@ def show_all_options_explanation(q, options, correct_index):
             return
         
         # シャッフルされた選択肢の元のインデックスを取得（存在しない場合はデフォルト値）
-        shuffled_indices = st.session_state.get('shuffled_indices', [0, 1, 2, 3])
+        if shuffled_indices is None:
+            shuffled_indices = st.session_state.get('shuffled_indices', [0, 1, 2, 3])
         
         for i in range(4):
             label = ct.CHOICE_LABELS[i]
@@ -379,7 +738,7 @@ def show_all_options_explanation(q, options, correct_index):
 # 全員の解答結果表示
 ############################################################
 
-def show_all_players_result(q, correct_index):
+def show_all_players_result(bank, q, correct_index):
     """全プレイヤーの解答と結果を一覧表示"""
     player_count = st.session_state.player_count
     options = st.session_state.shuffled_options
@@ -390,6 +749,7 @@ def show_all_players_result(q, correct_index):
     
     # スコア更新を先に一括処理（初回のみ）
     if "result_processed" not in st.session_state or not st.session_state.result_processed:
+        calibrator = get_difficulty_calibrator(bank)
         # 実際に解答したプレイヤーのみスコア更新
         for player_idx in st.session_state.player_answers.keys():
             answer_idx = st.session_state.player_answers[player_idx]
@@ -397,11 +757,16 @@ def show_all_players_result(q, correct_index):
             # 各プレイヤーのヒント使用状態を取得
             hint_used = st.session_state.player_hints_used.get(player_idx, False)
             update_player_score(player_idx, is_correct, hint_used)
+            record_player_answer(calibrator, q, player_idx, answer_idx, is_correct, hint_used)
         st.session_state.result_processed = True
+        
+        # 結果を見ている間に次の問題のヒントを先読み
+        prefetch_upcoming_hint(bank)
     
-    # 各プレイヤーの結果を表示
-    for i in range(player_count):
-        player_name = ct.PLAYER_NAMES[i]
+    # 各プレイヤーの結果を表示（人数が多い場合はページ分け）
+    offset = show_page_selector("result_page", player_count, ct.RESULTS_PAGE_SIZE)
+    for i in range(offset, min(offset + ct.RESULTS_PAGE_SIZE, player_count)):
+        player_name = get_player_name(i)
         answer_index = st.session_state.player_answers.get(i, -1)
         
         # 時間切れまたは未解答
@@ -413,10 +778,16 @@ def show_all_players_result(q, correct_index):
             answer_label = ct.CHOICE_LABELS[answer_index]
             answer_text = f"{answer_label}: {options[answer_index]}"
         
-        # 結果表示（ヒント使用時は0.5点）
+        # 解答時間（全員同時に解答する場合・早く答えるほど高得点の場合）
+        latency = st.session_state.player_latencies.get(i)
+        show_latency = is_simultaneous() or st.session_state.scoring == ct.SCORING_TIME_WEIGHTED
+        if show_latency and latency is not None and answer_index != -1:
+            answer_text += f"（{latency:.1f}秒）"
+
+        # 結果表示（ヒント使用時は0.5点、早く答えるほど高得点の場合は解答時間に応じて減点）
         if is_correct:
             hint_used = st.session_state.player_hints_used.get(i, False)
-            points_text = "+0.5点" if hint_used else "+1点"
+            points_text = f"+{get_player_points(i, True, hint_used):g}点"
             st.success(f"**{player_name}**: {answer_text} → **正解！ ({points_text})**", icon=ct.ICON_CORRECT)
         else:
             st.error(f"**{player_name}**: {answer_text} → **不正解**", icon=ct.ICON_WRONG)
@@ -437,40 +808,10 @@ def show_all_players_result(q, correct_index):
     col1, col2 = st.columns([1, 1])
     
     with col1:
-        if st.button("ゲーム終了", use_container_width=True, type="secondary"):
-            st.session_state.game_finished = True
-            st.rerun()
+        st.button("ゲーム終了", use_container_width=True, type="secondary", on_click=finish_game)
     
     with col2:
-        if st.button(ct.BTN_NEXT, use_container_width=True, type="primary"):
-            st.session_state.question_number += 1
-            load_next_question(
-                st.session_state.full_df,
-                st.session_state.genre,
-                st.session_state.difficulty,
-            )
-            
-            # 全問出題完了時
-            if st.session_state.all_questions_done:
-                st.session_state.game_finished = True
-                st.rerun()
-            
-            # 問題数制限チェック（出題された問題数でカウント）
-            if st.session_state.question_limit is not None:
-                if st.session_state.question_number > st.session_state.question_limit:
-                    st.session_state.game_finished = True
-                    st.rerun()
-            
-            # 次の問題の準備
-            st.session_state.current_player = 0  # 最初のプレイヤーに戻す
-            st.session_state.player_answers = {}  # 解答記録をクリア
-            st.session_state.player_hints_used = {}  # ヒント使用記録をクリア
-            st.session_state.all_players_answered = False
-            st.session_state.show_result = False
-            st.session_state.question_start_time = time.time()
-            st.session_state.result_processed = False
-            
-            st.rerun()
+        st.button(ct.BTN_NEXT, use_container_width=True, type="primary", on_click=go_to_next_question)
 
 
 ############################################################
@@ -481,26 +822,16 @@ def show_final_results():
     """ゲーム終了時の最終結果を表示"""
     st.markdown(f"## {ct.ICON_TROPHY} ゲーム終了！")
     
-    # ランキング生成
-    rankings = []
-    for i in range(st.session_state.player_count):
-        score_data = st.session_state.player_scores.get(i, {"correct": 0, "total": 0, "points": 0.0})
-        rankings.append({
-            "player": ct.PLAYER_NAMES[i],
-            "points": score_data["points"],
-            "correct": score_data["correct"],
-            "total": score_data["total"],
-            "percentage": (score_data["correct"] / score_data["total"] * 100) if score_data["total"] > 0 else 0
-        })
-    
-    # ポイント順にソート
-    rankings.sort(key=lambda x: x["points"], reverse=True)
-    
-    # ランキング表示
+    # ランキング表示（得点順、人数が多い場合はページ分け）
     st.markdown(f"### {ct.ICON_TROPHY} ランキング")
+    board = get_scoreboard()
+    offset = show_page_selector("final_results_page", len(board), ct.RESULTS_PAGE_SIZE)
     
-    for rank, data in enumerate(rankings, 1):
-        # メダル表示
+    for rank, i in board.page(offset, ct.RESULTS_PAGE_SIZE):
+        correct, total, points = board.score(i)
+        percentage = (correct / total * 100) if total > 0 else 0
+        
+        # メダル表示（同点は同順位）
         if rank == 1:
             medal = "1位"
             color = "#FFD700"
@@ -518,10 +849,10 @@ def show_final_results():
         st.markdown(f"""
         <div style='margin: 1rem 0; padding: 2rem; border-radius: 10px; background-color: #f8f9fa; border-left: 5px solid {color};'>
             <div style='display: flex; justify-content: space-between; align-items: center; flex-wrap: wrap;'>
-                <div style='font-size: 1.8rem; font-weight: bold; color: {color};'>{medal} {data['player']}</div>
+                <div style='font-size: 1.8rem; font-weight: bold; color: {color};'>{medal} {get_player_name(i)}</div>
                 <div style='text-align: right;'>
-                    <div style='font-size: 2.2rem; font-weight: bold; color: {ct.THEME_COLOR};'>{data['points']:.1f}点</div>
-                    <div style='font-size: 1.2rem; color: #666;'>{data['correct']}/{data['total']} ({data['percentage']:.0f}%)</div>
+                    <div style='font-size: 2.2rem; font-weight: bold; color: {ct.THEME_COLOR};'>{points:.1f}点</div>
+                    <div style='font-size: 1.2rem; color: #666;'>{correct}/{total} ({percentage:.0f}%)</div>
                 </div>
             </div>
         </div>
@@ -542,4 +873,252 @@ def show_final_results():
         if st.button("カスタマイズに戻る", use_container_width=True):
             st.session_state.game_started = False
             st.session_state.game_finished = False
-            st.rerun()
\ No newline at end of file
+            st.rerun()
+
+
+############################################################
+# ルーム（各自の端末で同時に解答するマルチプレイ）
+############################################################
+# ルームの状態はサーバープロセス内のハブが持ち、各端末の画面は
+# ROOM_POLL_SECONDS ごとにフラグメントだけを再描画してスナップショットを読む
+
+def show_room(bank, genre, difficulty):
+    """ルームの作成・参加画面、または参加中のルームのホスト・参加者画面を表示"""
+    code = st.session_state.room_code
+    room = get_room_hub().get(code) if code else None
+    if room is None:
+        if code is not None:
+            st.warning("ルームが見つかりません（終了したか、しばらく操作がなかったため削除されました）", icon=ct.ICON_WARNING)
+            st.session_state.room_code = None
+            st.session_state.room_is_host = False
+        show_room_entry(bank, genre, difficulty)
+        return
+
+    if st.session_state.room_is_host:
+        show_room_host(room.code)
+    else:
+        show_room_player(room.code)
+
+
+def show_room_entry(bank, genre, difficulty):
+    """ルームの作成（ホスト）・参加フォームを表示"""
+    st.markdown(f"### {ct.ICON_PLAYER} ルーム")
+    st.caption("ホストが作成したルームに、各自のスマートフォンやPCからルームコードを入力して参加します")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("#### ルームを作成")
+        st.caption("サイドバーのジャンル・難易度・問題数・制限時間で出題します")
+        if st.button("ルームを作成", use_container_width=True, type="primary"):
+            try:
+                room = create_room(bank, genre, difficulty)
+            except RoomError as e:
+                st.error(str(e), icon=ct.ICON_WARNING)
+            else:
+                st.session_state.room_code = room.code
+                st.session_state.room_is_host = True
+                st.rerun()
+
+    with col2:
+        st.markdown("#### ルームに参加")
+        with st.form("room_join_form", border=False):
+            code = st.text_input("ルームコード", max_chars=ct.ROOM_CODE_LENGTH)
+            name = st.text_input("名前", max_chars=20)
+            submitted = st.form_submit_button("参加する", use_container_width=True)
+        if submitted:
+            room = get_room_hub().get(code)
+            if room is None:
+                st.error("ルームコードが見つかりません", icon=ct.ICON_WARNING)
+                return
+            try:
+                room.join(st.session_state.room_player_id, name)
+            except RoomError as e:
+                st.error(str(e), icon=ct.ICON_WARNING)
+                return
+            st.session_state.room_code = room.code
+            st.session_state.room_is_host = False
+            st.rerun()
+
+
+def leave_room():
+    """ルームの画面を抜ける（ホストの場合はルームを削除する）"""
+    if st.session_state.room_is_host:
+        get_room_hub().close(st.session_state.room_code)
+    st.session_state.room_code = None
+    st.session_state.room_is_host = False
+
+
+@st.fragment(run_every=ct.ROOM_POLL_SECONDS)
+def show_room_host(code):
+    """ホストの画面（ルームコード・解答状況・進行ボタン）"""
+    room = get_room_hub().get(code)
+    if room is None:
+        st.rerun()
+    room.tick()
+    snapshot = room.snapshot
+
+    st.markdown(f"""
+    <div style='text-align:center; padding:1rem; background-color:{ct.THEME_SUB_COLOR}; border-radius:10px; margin-bottom:1rem;'>
+        <div style='font-size:1rem; color:#666;'>ルームコード</div>
+        <div style='font-size:2.4rem; font-weight:bold; letter-spacing:0.3rem; color:{ct.THEME_COLOR};'>{room.code}</div>
+        <div style='font-size:1rem; color:#666;'>参加者 {snapshot.player_count}人</div>
+    </div>
+    """, unsafe_allow_html=True)
+
+    if snapshot.phase == PHASE_WAITING:
+        st.info("参加者がそろったら「問題を出す」を押してください", icon=ct.ICON_INFO)
+        st.button(f"{ct.ICON_NEXT} 問題を出す", use_container_width=True, type="primary",
+                  disabled=snapshot.player_count == 0, on_click=room.next_question)
+        show_room_ranking(room, snapshot)
+
+    elif snapshot.phase == PHASE_QUESTION:
+        q = show_room_question(room, snapshot)
+        for position, original_index in enumerate(snapshot.option_order):
+            st.markdown(f"**{ct.CHOICE_LABELS[position]}**: {q.options[original_index]}")
+        show_room_timer(snapshot)
+        st.progress(
+            snapshot.answered / max(1, snapshot.player_count),
+            text=f"解答済み {snapshot.answered} / {snapshot.player_count}人",
+        )
+        st.button(f"{ct.ICON_CHART} 締め切って結果を表示", use_container_width=True, type="primary",
+                  on_click=room.reveal)
+
+    elif snapshot.phase == PHASE_RESULT:
+        q = show_room_question(room, snapshot)
+        show_room_result(q, snapshot)
+        show_room_ranking(room, snapshot)
+        col1, col2 = st.columns(2)
+        with col1:
+            st.button(ct.BTN_NEXT, use_container_width=True, type="primary", on_click=room.next_question)
+        with col2:
+            st.button(f"{ct.ICON_TROPHY} ゲーム終了", use_container_width=True, on_click=room.finish)
+
+    else:
+        st.markdown(f"## {ct.ICON_TROPHY} ゲーム終了！")
+        show_room_ranking(room, snapshot)
+
+    st.write("---")
+    st.button("ルームを閉じる", use_container_width=True, on_click=leave_room)
+
+
+@st.fragment(run_every=ct.ROOM_POLL_SECONDS)
+def show_room_player(code):
+    """参加者の画面（問題・選択肢・結果・ランキング）"""
+    room = get_room_hub().get(code)
+    if room is None:
+        st.rerun()
+    room.tick()
+    snapshot = room.snapshot
+    player_id = st.session_state.room_player_id
+    player_index = room.player_index(player_id)
+    correct, total, points = room.player_score(player_index)
+    rank = snapshot.ranks[player_index] if player_index < len(snapshot.ranks) else snapshot.player_count
+
+    st.markdown(
+        f"#### {ct.ICON_PLAYER} {html.escape(room.player_name(player_index))}さん　"
+        f"{points:.1f}点（{correct}/{total}）　{rank}位 / {snapshot.player_count}人",
+        unsafe_allow_html=True,
+    )
+
+    if snapshot.phase == PHASE_WAITING:
+        st.info("ホストが問題を出すのを待っています", icon=ct.ICON_INFO)
+
+    elif snapshot.phase == PHASE_QUESTION:
+        q = show_room_question(room, snapshot)
+        show_room_timer(snapshot)
+        answer = room.answer_of(player_id)
+        st.markdown(f"### {ct.TITLE_SELECT_OPTIONS}")
+        for position, original_index in enumerate(snapshot.option_order):
+            selected = answer is not None and answer[0] == original_index
+            st.button(
+                f"{ct.CHOICE_LABELS[position]}: {q.options[original_index]}",
+                key=f"room_opt_{position}", use_container_width=True,
+                type="primary" if selected else "secondary", disabled=answer is not None,
+                on_click=room.submit, args=(player_id, original_index),
+            )
+        if answer is not None:
+            st.success(f"解答しました。結果発表を待っています（{snapshot.answered} / {snapshot.player_count}人が解答済み）")
+
+    elif snapshot.phase == PHASE_RESULT:
+        q = show_room_question(room, snapshot)
+        answer = room.answer_of(player_id)
+        if answer is None:
+            st.warning("時間切れ", icon=ct.ICON_TIMER)
+        elif answer[0] == q.correct:
+            st.success("正解！", icon=ct.ICON_CORRECT)
+        else:
+            st.error("不正解", icon=ct.ICON_WRONG)
+        show_room_result(q, snapshot)
+        show_room_ranking(room, snapshot, player_index)
+
+    else:
+        st.markdown(f"## {ct.ICON_TROPHY} ゲーム終了！")
+        show_room_ranking(room, snapshot, player_index)
+
+    st.write("---")
+    st.button("ルームを抜ける", use_container_width=True, on_click=leave_room)
+
+
+def show_room_question(room, snapshot):
+    """ルームで出題中の問題文を表示し、問題を返す"""
+    q = room.bank.question(snapshot.question_id)
+    st.markdown(
+        f"<h3 style='line-height:1.6; word-wrap:break-word;'>"
+        f"<span style='color:{ct.THEME_COLOR}; font-size:inherit; font-weight:bold;'>Q{snapshot.round}</span>　{q.question}"
+        f"</h3>",
+        unsafe_allow_html=True,
+    )
+    return q
+
+
+def show_room_timer(snapshot):
+    """ルームの解答期限までの残り時間を表示"""
+    if snapshot.deadline is None:
+        return
+    remaining_time = max(0.0, snapshot.deadline - time.monotonic())
+    st.markdown(f"""
+    <div style='text-align: center; margin-bottom: 1rem;'>
+        <span style='font-size: 1.2rem; color: {ct.THEME_COLOR}; font-weight: bold;'>
+            {ct.ICON_TIMER.replace(':', '').replace('material/', '')} 残り時間: {int(remaining_time)}秒
+        </span>
+    </div>
+    """, unsafe_allow_html=True)
+
+
+def show_room_result(q, snapshot):
+    """正解・選択肢ごとの解答数・解説を表示"""
+    correct_position = snapshot.option_order.index(q.correct)
+    options = [q.options[i] for i in snapshot.option_order]
+    st.markdown(f"### {ct.ICON_CHART} 解答結果")
+    st.markdown(f"**正解: {ct.CHOICE_LABELS[correct_position]} - {options[correct_position]}**")
+    answered = max(1, sum(snapshot.choice_counts))
+    for position, original_index in enumerate(snapshot.option_order):
+        count = snapshot.choice_counts[original_index]
+        mark = ct.ICON_CORRECT if original_index == q.correct else ""
+        st.progress(count / answered, text=f"{ct.CHOICE_LABELS[position]}: {count}人 {mark}")
+    show_all_options_explanation(q, options, correct_position, list(snapshot.option_order))
+
+
+def show_room_ranking(room, snapshot, player_index=None):
+    """得点ランキング（上位 ROOM_RANKING_TOP 人と自分の順位）を表示"""
+    if not snapshot.ranking:
+        return
+    st.markdown(f"### {ct.ICON_SCOREBOARD} ランキング")
+    rows = [
+        (rank, name, correct, total, points, index == player_index)
+        for rank, name, correct, total, points, index in snapshot.ranking
+    ]
+    if player_index is not None and player_index < len(snapshot.ranks) and not any(row[5] for row in rows):
+        # 上位に入っていない場合は自分の行を最後に追加する
+        correct, total, points = room.player_score(player_index)
+        rows.append((snapshot.ranks[player_index], room.player_name(player_index), correct, total, points, True))
+
+    body = "".join(
+        f"<tr style='{'font-weight:bold; background-color:' + ct.THEME_SUB_COLOR + ';' if is_me else ''}'>"
+        f"<td>{rank}位</td><td>{html.escape(name)}</td><td>{correct}/{total}</td><td>{points:.1f}点</td></tr>"
+        for rank, name, correct, total, points, is_me in rows
+    )
+    st.markdown(
+        f"<table style='width:100%;'><tr><th>順位</th><th>名前</th><th>正解</th><th>得点</th></tr>{body}</table>",
+        unsafe_allow_html=True,
+    )
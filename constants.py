@@ -13,6 +13,30 @@ SUBTITLE = "4択クイズ × 生成AI × 学習アプリ"
 # CSVファイルのパス
 QUESTIONS_CSV = "data/questions.csv"
 
+# コンパイル済み問題バンクのパス（python compile_questions.py で作成、CSVと一致する場合のみ使用）
+QUESTIONS_BANK = "data/questions.qbank"
+
+# 問題CSVを1回に読み込む行数（大きな問題バンクでもメモリを抑えるため）
+QUESTIONS_CHUNK_ROWS = 50000
+
+# ヒントキャッシュ（SQLite）のパス
+HINT_CACHE_PATH = "data/hint_cache.sqlite3"
+
+# 事前生成ヒント（JSON Lines）のパス
+PRECOMPUTED_HINTS_PATH = "data/hints.jsonl"
+
+# 解答履歴（SQLite）のパス
+ANSWER_STORE_PATH = "data/answers.sqlite3"
+
+# 静的ファイル（CSS・JavaScript）の置き場所
+# 内容はセッションごとに1回だけページの <head> に読み込む（components.load_static_assets）
+STATIC_DIR = "static"
+THEME_CSS = "theme.css"
+ANTI_TRANSLATION_JS = "anti_translation.js"
+
+# フィルターで「すべて」を表す選択肢
+FILTER_RANDOM = "ランダム"
+
 
 ############################################################
 # カラー設定
@@ -70,8 +94,14 @@ CHOICE_LABELS = ["A", "B", "C", "D"]
 ############################################################
 
 # プレイヤー数オプション
-PLAYER_COUNT_OPTIONS = [1, 2, 3, 4]
-PLAYER_NAMES = ["A", "B", "C", "D"]
+PLAYER_COUNT_OPTIONS = [1, 2, 3, 4, 5, 6, 8, 10, 20, 30, 40, 50, 100, 200, 300]
+PLAYER_NAMES = [chr(ord("A") + i) for i in range(26)]  # 27人目以降は P27, P28, ...
+
+# スコアボード・最終結果の1ページあたりの人数と、横に並べるカードの数
+# （プレイヤー数が SCOREBOARD_COLUMNS 以下なら全員を席順に並べる）
+SCOREBOARD_COLUMNS = 4
+SCOREBOARD_PAGE_SIZE = 8
+RESULTS_PAGE_SIZE = 10
 
 # 問題数制限オプション
 QUESTION_LIMIT_OPTIONS = {
@@ -81,6 +111,28 @@ QUESTION_LIMIT_OPTIONS = {
     "全問": None
 }
 
+# 解答方法（この端末での2人以上のプレイ）
+ANSWER_MODE_SEQUENTIAL = "sequential"
+ANSWER_MODE_SIMULTANEOUS = "simultaneous"
+ANSWER_MODE_OPTIONS = {
+    "順番に解答": ANSWER_MODE_SEQUENTIAL,
+    "全員同時に解答": ANSWER_MODE_SIMULTANEOUS,
+}
+
+# 得点の計算方法（早く答えるほど高得点にするかどうか）
+SCORING_FLAT = "flat"
+SCORING_TIME_WEIGHTED = "time_weighted"
+SCORING_OPTIONS = {
+    "正解で1点": SCORING_FLAT,
+    "早く答えるほど高得点": SCORING_TIME_WEIGHTED,
+}
+
+# 早く答えるほど高得点の場合、制限時間ちょうどで正解したときの得点の割合
+TIME_WEIGHT_MIN_RATIO = 0.5
+
+# 時間制限なしで早く答えるほど高得点にする場合の基準時間（秒）
+TIME_WEIGHT_REFERENCE_SECONDS = 30.0
+
 # 時間制限オプション（秒）
 TIME_LIMIT_OPTIONS = {
     "無制限": None,
@@ -98,4 +150,129 @@ ICON_ARROW_NEXT = ":material/arrow_forward:"  # 次のプレイヤーへ
 ICON_MEDAL_1 = ":material/looks_one:"  # 1位
 ICON_MEDAL_2 = ":material/looks_two:"  # 2位
 ICON_MEDAL_3 = ":material/looks_3:"  # 3位
-ICON_BULLSEYE = ":material/adjust:"  # 正解マーク用
\ No newline at end of file
+ICON_BULLSEYE = ":material/adjust:"  # 正解マーク用
+
+
+############################################################
+# AIヒント設定
+############################################################
+
+# ヒントの生成方式（openai: OpenAI API / local: 解説文から生成 / auto: APIキーがあれば openai）
+HINT_PROVIDER = "auto"
+
+HINT_MODEL = "gpt-4o-mini"
+HINT_MAX_TOKENS = 50
+HINT_TEMPERATURE = 0.7
+
+# OpenAI API 呼び出しの期限・リトライ・流量制限（サーバープロセス全体）
+HINT_TIMEOUT_SECONDS = 10.0
+HINT_MAX_RETRIES = 2
+HINT_RATE_PER_SECOND = 5.0
+HINT_RATE_BURST = 10
+
+# 連続失敗時に API 呼び出しを止める回数と停止時間（秒）
+HINT_BREAKER_FAILURES = 5
+HINT_BREAKER_RESET_SECONDS = 30.0
+
+# 解説がなくヒントを作れない場合の定型ヒント
+HINT_FALLBACK_MESSAGE = "正解の選択肢の特徴を思い出しながら、問題文のキーワードをもう一度読み直してみましょう。"
+
+# ヒント生成を行うワーカースレッド数（サーバープロセス全体）
+HINT_MAX_WORKERS = 8
+
+# ヒント先読み（出題時・結果表示中に STEP 1 ヒントを生成しておく）
+HINT_PREFETCH_ENABLED = False
+HINT_PREFETCH_MAX_CONCURRENCY = 2
+HINT_PREFETCH_DAILY_BUDGET = 2000  # 1日あたりの先読みリクエスト上限（全プロセス合計）
+
+# ヒントキャッシュの上限件数と有効期限（秒）
+HINT_CACHE_MAX_ENTRIES = 100000
+HINT_CACHE_TTL_SECONDS = 30 * 24 * 60 * 60
+
+
+############################################################
+# 解答履歴の保存設定
+############################################################
+
+# この件数たまったらすぐに書き込む
+ANSWER_FLUSH_BATCH = 100
+
+# バッファを書き込む間隔（秒）
+ANSWER_FLUSH_INTERVAL_SECONDS = 1.0
+
+# 書き込み待ちのバッファ上限（超えた場合は古いイベントから捨てる）
+ANSWER_BUFFER_MAX = 10000
+
+
+############################################################
+# 難易度補正（解答実績による難易度）
+############################################################
+
+# 難易度の基準（サイドバーで選択）
+DIFFICULTY_MODE_LABEL = "label"
+DIFFICULTY_MODE_CALIBRATED = "calibrated"
+DIFFICULTY_MODE_OPTIONS = {
+    "問題の設定": DIFFICULTY_MODE_LABEL,
+    "解答実績": DIFFICULTY_MODE_CALIBRATED,
+}
+
+# CSV の難易度ごとの事前の正答率と、それを何回分の解答とみなすか
+CALIBRATION_PRIOR_ACCURACY = {"easy": 0.8, "normal": 0.6, "hard": 0.4}
+CALIBRATION_PRIOR_WEIGHT = 5.0
+
+# 補正を使い始める解答数（これ未満は CSV の難易度を使う）
+CALIBRATION_MIN_ATTEMPTS = 5
+
+# 解答時間のスコアが最大になる秒数
+CALIBRATION_LATENCY_REFERENCE = 30.0
+
+# 難易度スコアの重み（誤答率, ヒント使用率, 解答時間）と easy/normal・normal/hard の境界
+CALIBRATION_WEIGHTS = (0.6, 0.2, 0.2)
+CALIBRATION_BANDS = (0.35, 0.55)
+
+
+############################################################
+# 出題順（1人プレイ用の苦手優先）
+############################################################
+
+QUESTION_ORDER_RANDOM = "random"
+QUESTION_ORDER_ADAPTIVE = "adaptive"
+QUESTION_ORDER_OPTIONS = {
+    "ランダム": QUESTION_ORDER_RANDOM,
+    "苦手優先（復習あり）": QUESTION_ORDER_ADAPTIVE,
+}
+
+# 不正解の問題・ヒントを使って正解した問題を何問後に再出題するか
+SRS_WRONG_DELAY = 3
+SRS_HINT_DELAY = 5
+
+# 復習で正解した場合の再出題間隔の基準（正解するたびに倍）と、卒業までの回数
+SRS_BASE_INTERVAL = 4
+SRS_MAX_BOX = 3
+
+
+############################################################
+# ルーム（各自の端末で同時に解答するマルチプレイ）
+############################################################
+
+# プレイ方法（サイドバーで選択）
+PLAY_MODE_LOCAL = "local"
+PLAY_MODE_ROOM = "room"
+PLAY_MODE_OPTIONS = {
+    "この端末で交代": PLAY_MODE_LOCAL,
+    "ルーム（各自の端末）": PLAY_MODE_ROOM,
+}
+
+# 参加者の画面がルームの状態を読みに行く間隔（秒）
+ROOM_POLL_SECONDS = 1.0
+
+# サーバープロセス全体のルーム数・1ルームの参加者数の上限
+ROOM_MAX_ROOMS = 100
+ROOM_MAX_PLAYERS = 40
+
+# ルームコードの文字数と、操作がないルームを削除するまでの時間（秒）
+ROOM_CODE_LENGTH = 5
+ROOM_IDLE_TIMEOUT_SECONDS = 2 * 60 * 60
+
+# ランキングに表示する人数
+ROOM_RANKING_TOP = 10
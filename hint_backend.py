@@ -0,0 +1,311 @@
+"""
+AIヒント生成のバックエンド（OpenAI API 呼び出し）
+サーバープロセス内で1つのクライアント（コネクションプール）を共有し、
+リクエストごとの期限・指数バックオフ付きリトライ・トークンバケットによる流量制限・
+サーキットブレーカーをまとめて扱う
+openai パッケージの読み込みは重いため、最初にヒントを生成するときまで遅らせる
+"""
+
+import random
+import threading
+import time
+
+
+class HintBackendUnavailable(Exception):
+    """流量制限・サーキットブレーカー・期限切れにより、API を呼び出せない場合の例外"""
+
+
+############################################################
+# トークンバケット（流量制限）
+############################################################
+
+class TokenBucket:
+    """
+    一定の速度で補充されるトークンを消費して流量を制限する
+
+    Args:
+        rate (float): 1秒あたりの補充数
+        capacity (int): バケットの容量（瞬間的に許容するリクエスト数）
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=0.0):
+        """
+        トークンを1つ取得する（足りない場合は timeout 秒まで待つ）
+
+        Args:
+            timeout (float): 最大待機時間（秒）
+
+        Returns:
+            bool: 取得できたかどうか
+        """
+        give_up_at = time.monotonic() + max(0.0, timeout)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return True
+                wait = (1.0 - self._tokens) / self.rate
+            if now + wait > give_up_at:
+                return False
+            time.sleep(wait)
+
+
+############################################################
+# サーキットブレーカー
+############################################################
+
+class CircuitBreaker:
+    """
+    連続して失敗した場合に一定時間 API 呼び出しを止める
+
+    停止時間が過ぎると1件だけ試験的に通し、成功すれば再開、失敗すれば再び停止する。
+
+    Args:
+        failure_threshold (int): 停止するまでの連続失敗回数
+        reset_timeout (float): 停止時間（秒）
+    """
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        with self._lock:
+            return self._opened_at is not None
+
+    def allow(self):
+        """
+        API を呼び出してよいかどうか
+
+        Returns:
+            bool: 呼び出してよい場合は True
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+    def cancel_trial(self):
+        """API を呼び出さずに終わった場合に、成功・失敗を記録せずに試験枠だけを返す"""
+        with self._lock:
+            self._trial_running = False
+
+
+############################################################
+# ヒントバックエンド
+############################################################
+
+def _retryable_errors():
+    """リトライ対象の例外（レート制限・タイムアウト・接続エラー・サーバーエラー）"""
+    import openai
+
+    return (
+        openai.RateLimitError,
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.InternalServerError,
+    )
+
+
+class HintBackend:
+    """
+    OpenAI API 呼び出しをまとめたクラス（サーバープロセス内で共有する）
+
+    Args:
+        api_key (str): OpenAI APIキー
+        base_url (str | None): API のURL（None は OPENAI_BASE_URL 環境変数または既定値）
+        timeout (float): 1リクエストあたりの最大待ち時間（秒）
+        max_retries (int): 失敗時の最大リトライ回数
+        backoff_base (float): 初回リトライまでの待機時間（秒、以降は倍々に増やす）
+        backoff_max (float): リトライ待機時間の上限（秒）
+        rate (float): 1秒あたりに送信できるリクエスト数
+        burst (int): 瞬間的に送信できるリクエスト数
+        rate_limit_wait (float): 流量制限に当たった場合の最大待機時間（秒）
+        failure_threshold (int): サーキットブレーカーが停止するまでの連続失敗回数
+        reset_timeout (float): サーキットブレーカーの停止時間（秒）
+    """
+
+    def __init__(self, api_key, base_url=None, timeout=10.0, max_retries=2,
+                 backoff_base=0.5, backoff_max=4.0, rate=5.0, burst=10, rate_limit_wait=2.0,
+                 failure_threshold=5, reset_timeout=30.0):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.rate_limit_wait = rate_limit_wait
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self):
+        """OpenAI クライアント（最初に使うときに作成し、以降は共有する）"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from openai import OpenAI
+
+                    # リトライは自前で行うため、クライアント側のリトライは無効にする
+                    self._client = OpenAI(
+                        api_key=self.api_key, base_url=self.base_url, timeout=self.timeout, max_retries=0
+                    )
+        return self._client
+
+    def complete(self, prompt, params, deadline=None):
+        """
+        ヒントを生成する（リトライ付き）
+
+        Args:
+            prompt (str): プロンプト
+            params (dict): モデル名などの生成パラメータ
+            deadline (float | None): 打ち切る時刻（time.monotonic() 基準、None は無制限）
+
+        Returns:
+            str: 生成されたヒント
+
+        Raises:
+            HintBackendUnavailable: 流量制限・サーキットブレーカー・期限切れの場合
+            openai.OpenAIError: リトライしても失敗した場合
+        """
+        res = self._call(prompt, params, deadline, stream=False)
+        return res.choices[0].message.content
+
+    def stream(self, prompt, params, deadline=None):
+        """
+        ヒントを断片ごとに生成する（リトライは最初の断片を受け取る前のみ）
+
+        Args:
+            prompt (str): プロンプト
+            params (dict): モデル名などの生成パラメータ
+            deadline (float | None): 接続を打ち切る時刻（time.monotonic() 基準）
+
+        Yields:
+            str: ヒントの断片
+
+        Raises:
+            HintBackendUnavailable: 流量制限・サーキットブレーカー・期限切れの場合
+            openai.OpenAIError: リトライしても失敗した場合
+        """
+        # 成功・失敗は最後の断片を受け取るまでを1リクエストとして記録する
+        stream = self._call(prompt, params, deadline, stream=True)
+        try:
+            for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    yield delta
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            # 呼び出し側の中断（GeneratorExit など）は失敗として数えない
+            self.breaker.cancel_trial()
+            raise
+        else:
+            self.breaker.record_success()
+        finally:
+            stream.close()
+
+    def _call(self, prompt, params, deadline, stream):
+        # リトライを含めて1リクエストにつき成功・失敗を1回だけ記録する
+        # （stream の場合は成功を呼び出し側で記録する）
+        client = self.client
+        retryable_errors = _retryable_errors()
+        timeout = self._remaining(deadline)
+        if not self.breaker.allow():
+            raise HintBackendUnavailable("ヒント生成APIが一時的に利用できません")
+
+        attempt = 0
+        failed = False
+        try:
+            while True:
+                if not self.bucket.acquire(timeout=min(self.rate_limit_wait, timeout)):
+                    raise HintBackendUnavailable("ヒント生成のリクエストが混み合っています")
+                try:
+                    res = client.chat.completions.create(
+                        messages=[{"role": "user", "content": prompt}],
+                        stream=stream,
+                        timeout=self._remaining(deadline),
+                        **params,
+                    )
+                except retryable_errors as e:
+                    failed = True
+                    if attempt >= self.max_retries:
+                        raise
+                    delay = self._backoff(attempt, e)
+                    if delay >= self._remaining(deadline):
+                        raise HintBackendUnavailable("ヒント生成が制限時間内に完了しませんでした") from e
+                    time.sleep(delay)
+                    attempt += 1
+                    timeout = self._remaining(deadline)
+                    continue
+                break
+        except HintBackendUnavailable:
+            # API が失敗した後の打ち切りは失敗、呼び出す前の打ち切りは試験枠を返すだけ
+            if failed:
+                self.breaker.record_failure()
+            else:
+                self.breaker.cancel_trial()
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            self.breaker.cancel_trial()
+            raise
+
+        if not stream:
+            self.breaker.record_success()
+        return res
+
+    def _remaining(self, deadline):
+        if deadline is None:
+            return self.timeout
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise HintBackendUnavailable("ヒント生成が制限時間内に完了しませんでした")
+        return min(self.timeout, remaining)
+
+    def _backoff(self, attempt, error):
+        # 指数バックオフ（フルジッター）。429 の Retry-After が長い場合はそちらに従う
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        try:
+            delay = max(delay, float(retry_after))
+        except (TypeError, ValueError):
+            pass
+        return delay
@@ -0,0 +1,306 @@
+"""
+AIヒントのキャッシュ
+プロンプトとモデル設定のハッシュをキーに、生成済みヒントを SQLite に保存する
+同じプロセス内はメモリ上の LRU、プロセス間はディスク上の SQLite で共有する
+事前生成したヒント（JSON Lines のサイドカーファイル）の読み書きもここで行う
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+############################################################
+# キャッシュキー
+############################################################
+
+def make_hint_key(prompt, **params):
+    """
+    プロンプトとモデル設定からキャッシュキーを作成
+    
+    Args:
+        prompt (str): 生成に使用するプロンプト
+        **params: モデル名・max_tokens・temperature などの生成パラメータ
+        
+    Returns:
+        str: SHA-256 の16進文字列
+    """
+    payload = json.dumps({"prompt": prompt, "params": params}, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+############################################################
+# ヒントキャッシュ
+############################################################
+
+class HintCache:
+    """
+    SQLite をバックエンドにした LRU/TTL 付きヒントキャッシュ
+    
+    Args:
+        path (str): SQLite ファイルのパス
+        max_entries (int): ディスク上に保持する最大件数（超過分は最終参照が古い順に削除）
+        ttl_seconds (float | None): 有効期限（秒、None は無期限）
+        memory_entries (int): プロセス内 LRU に保持する件数
+    """
+
+    # 書き込み何回ごとに期限切れ・超過分の削除を行うか
+    EVICT_INTERVAL = 100
+
+    # メモリ上でヒットした最終参照時刻を、何件たまるか何秒たつごとにディスクへ書き戻すか
+    TOUCH_FLUSH_ENTRIES = 100
+    TOUCH_FLUSH_SECONDS = 5.0
+
+    def __init__(self, path, max_entries=10000, ttl_seconds=None, memory_entries=1024):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.memory_entries = memory_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._memory = OrderedDict()  # {key: (value, created_at)}
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._touched = {}  # {key: (最終参照時刻, ヒット回数)}（メモリ上のヒットでディスク未反映の分）
+        self._last_flush = time.time()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS hints (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                hit_count INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS hints_last_access ON hints (last_access)")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS budgets (
+                name TEXT PRIMARY KEY,
+                used INTEGER NOT NULL
+            )
+            """
+        )
+
+    def get(self, key):
+        """
+        キャッシュからヒントを取得
+        
+        Args:
+            key (str): キャッシュキー
+            
+        Returns:
+            str | None: ヒント（未登録・期限切れの場合は None）
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and not self._expired(entry[1], now):
+                self._memory.move_to_end(key)
+                self._touch(key, now)
+                self.hits += 1
+                return entry[0]
+
+            row = self._conn.execute(
+                "SELECT value, created_at FROM hints WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or self._expired(row[1], now):
+                self._memory.pop(key, None)
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE hints SET last_access = ?, hit_count = hit_count + 1 WHERE key = ?",
+                (now, key),
+            )
+            self._remember(key, row[0], row[1])
+            self.hits += 1
+            return row[0]
+
+    def contains(self, key):
+        """
+        有効なヒントが登録済みかどうか（ヒット/ミス回数・最終参照時刻は更新しない）
+        
+        Args:
+            key (str): キャッシュキー
+            
+        Returns:
+            bool: 登録済みかどうか
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and not self._expired(entry[1], now):
+                return True
+            row = self._conn.execute(
+                "SELECT created_at FROM hints WHERE key = ?", (key,)
+            ).fetchone()
+            return row is not None and not self._expired(row[0], now)
+
+    def consume_budget(self, name, limit):
+        """
+        予算を1つ消費する（プロセス間で共有）
+        
+        Args:
+            name (str): 予算の名前（日付を含めると日次予算になる）
+            limit (int): 上限
+            
+        Returns:
+            bool: 消費できたかどうか（上限に達している場合は False）
+        """
+        if limit <= 0:
+            return False
+        with self._lock:
+            cursor = self._conn.execute(
+                """
+                INSERT INTO budgets (name, used) VALUES (?, 1)
+                ON CONFLICT(name) DO UPDATE SET used = used + 1 WHERE used < ?
+                """,
+                (name, limit),
+            )
+            return cursor.rowcount > 0
+
+    def set(self, key, value):
+        """
+        ヒントをキャッシュに保存
+        
+        Args:
+            key (str): キャッシュキー
+            value (str): ヒント
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO hints (key, value, created_at, last_access) VALUES (?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET value = excluded.value,
+                    created_at = excluded.created_at, last_access = excluded.last_access
+                """,
+                (key, value, now, now),
+            )
+            self._remember(key, value, now)
+
+            self._writes += 1
+            if self._writes % self.EVICT_INTERVAL == 0:
+                self._evict(now)
+
+    def stats(self):
+        """
+        ヒット/ミス回数を取得
+        
+        Returns:
+            dict: {"hits": int, "misses": int, "hit_rate": float, "entries": int}
+        """
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM hints").fetchone()[0]
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total > 0 else 0.0,
+                "entries": entries,
+            }
+
+    def _expired(self, created_at, now):
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def _remember(self, key, value, created_at):
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _touch(self, key, now):
+        # メモリ上のヒットも削除順（last_access）に反映されるよう、まとめて書き戻す
+        _, count = self._touched.get(key, (now, 0))
+        self._touched[key] = (now, count + 1)
+        if len(self._touched) >= self.TOUCH_FLUSH_ENTRIES or now - self._last_flush >= self.TOUCH_FLUSH_SECONDS:
+            self._flush_touched(now)
+
+    def _flush_touched(self, now):
+        self._last_flush = now
+        if not self._touched:
+            return
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.executemany(
+                "UPDATE hints SET last_access = MAX(last_access, ?), hit_count = hit_count + ? WHERE key = ?",
+                [(accessed, count, key) for key, (accessed, count) in self._touched.items()],
+            )
+            self._conn.execute("COMMIT")
+        except sqlite3.Error:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._touched.clear()
+
+    def _evict(self, now):
+        self._flush_touched(now)
+        if self.ttl_seconds is not None:
+            self._conn.execute("DELETE FROM hints WHERE created_at < ?", (now - self.ttl_seconds,))
+        self._conn.execute(
+            """
+            DELETE FROM hints WHERE key IN (
+                SELECT key FROM hints ORDER BY last_access DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.max_entries,),
+        )
+
+
+############################################################
+# 事前生成ヒント（サイドカーファイル）
+############################################################
+
+def load_precomputed_hints(path):
+    """
+    事前生成ヒントのファイルを読み込む
+    
+    1行1件の JSON（{"key": ..., "hint": ...}）で、途中までしか書かれていない行は無視する。
+    
+    Args:
+        path (str): JSON Lines ファイルのパス
+        
+    Returns:
+        dict: {キャッシュキー: ヒント}
+    """
+    hints = {}
+    if not os.path.exists(path):
+        return hints
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("key") and record.get("hint"):
+                hints[record["key"]] = record["hint"]
+    return hints
+
+
+def append_precomputed_hint(f, key, hint, **meta):
+    """
+    事前生成ヒントを1件追記する（1件ごとに flush するため中断しても再開できる）
+    
+    Args:
+        f (TextIO): 追記モードで開いたファイル
+        key (str): キャッシュキー
+        hint (str): ヒント
+        **meta: 行番号・ヒント段階など、確認用に一緒に保存する情報
+    """
+    record = {"key": key, "hint": hint, **meta}
+    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    f.flush()
@@ -0,0 +1,193 @@
+"""
+AIヒントの生成方式（プロバイダー）
+OpenAI API を使うプロバイダーと、ネットワークを使わずに解説文からヒントを作る
+ローカルプロバイダーを同じインターフェースで切り替えられるようにする
+"""
+
+import re
+from hint_backend import HintBackend
+
+
+############################################################
+# プロンプト
+############################################################
+
+def build_hint_prompt(explanation, difficulty, step):
+    return f"""
+あなたはクイズのヒントだけを短く生成するAIです。
+以下の制約でヒントを生成してください。
+
+【解説】
+{explanation}
+
+【難易度】
+{difficulty}
+
+【ヒント段階】
+STEP {step}
+
+【条件】
+- 答えを直接示さない
+- 1〜2文で短く
+- 難易度に応じてヒントの強弱を調整
+"""
+
+
+############################################################
+# プロバイダー共通
+############################################################
+
+class HintProvider:
+    """
+    ヒント生成方式の共通インターフェース
+
+    Attributes:
+        name (str): 設定で指定する名前
+        cacheable (bool): 生成結果をヒントキャッシュに保存する価値があるか
+            （生成コストの高いプロバイダーのみ True）
+    """
+
+    name = ""
+    cacheable = False
+
+    def generate(self, explanation, difficulty, step, answer=None, deadline=None):
+        """
+        ヒントを生成する
+
+        Args:
+            explanation (str): 正解の選択肢の解説
+            difficulty (str): 難易度
+            step (int): ヒント段階
+            answer (str | None): 正解の選択肢（ヒントに含めないために使用）
+            deadline (float | None): 打ち切る時刻（time.monotonic() 基準、None は無制限）
+
+        Returns:
+            str: ヒント
+        """
+        raise NotImplementedError
+
+    def stream(self, explanation, difficulty, step, answer=None, deadline=None):
+        """
+        ヒントを断片ごとに生成する（既定では generate の結果を一度に返す）
+
+        Yields:
+            str: ヒントの断片
+        """
+        yield self.generate(explanation, difficulty, step, answer=answer, deadline=deadline)
+
+
+############################################################
+# OpenAI API
+############################################################
+
+class OpenAIHintProvider(HintProvider):
+    """
+    OpenAI API でヒントを生成する
+
+    Args:
+        backend (HintBackend): API 呼び出しのバックエンド
+        params (dict): モデル名・max_tokens・temperature などの生成パラメータ
+    """
+
+    name = "openai"
+    cacheable = True
+
+    def __init__(self, backend, params):
+        self.backend = backend
+        self.params = params
+
+    def generate(self, explanation, difficulty, step, answer=None, deadline=None):
+        prompt = build_hint_prompt(explanation, difficulty, step)
+        return self.backend.complete(prompt, self.params, deadline=deadline)
+
+    def stream(self, explanation, difficulty, step, answer=None, deadline=None):
+        prompt = build_hint_prompt(explanation, difficulty, step)
+        return self.backend.stream(prompt, self.params, deadline=deadline)
+
+
+############################################################
+# ローカル（ネットワーク不要）
+############################################################
+
+class LocalHintProvider(HintProvider):
+    """
+    正解の選択肢の解説文から文を抜き出し、正解の語句を伏せてヒントにする
+
+    同じ入力には常に同じヒントを返す。STEP 1 は正解の語句を含まない文を優先し、
+    STEP 2・難易度 easy では抜き出す文を増やしてヒントを強くする。
+
+    Args:
+        empty_message (str): 解説がない場合に返すヒント
+    """
+
+    name = "local"
+    cacheable = False
+
+    MASK = "○○"
+
+    # 文の区切り
+    _SENTENCE_END = re.compile(r"(?<=[。！？!?])")
+    # 正解の語句を部分ごとに伏せるための区切り
+    _ANSWER_SEPARATORS = re.compile(r"[\s・、,，/（）()「」『』]+")
+
+    def __init__(self, empty_message):
+        self.empty_message = empty_message
+
+    def generate(self, explanation, difficulty, step, answer=None, deadline=None):
+        sentences = [s.strip() for s in self._SENTENCE_END.split(explanation or "") if s.strip()]
+        if not sentences:
+            return self.empty_message
+
+        terms = self._answer_terms(answer)
+        masked = [self._mask(s, terms) for s in sentences]
+
+        # 正解の語句を含まない文 → 伏せ字にした文 の順に、必要な数だけ選ぶ
+        count = step + (1 if difficulty == "easy" else 0)
+        order = sorted(range(len(sentences)), key=lambda i: (masked[i] != sentences[i], i))
+        chosen = sorted(order[:count])
+        return "".join(masked[i] for i in chosen)
+
+    def _answer_terms(self, answer):
+        if not answer:
+            return []
+        parts = [answer] + [p for p in self._ANSWER_SEPARATORS.split(answer) if len(p) >= 2]
+        # 長い語句から先に伏せる（部分一致で伏せ残しが出ないように）
+        return sorted(set(parts), key=len, reverse=True)
+
+    def _mask(self, sentence, terms):
+        for term in terms:
+            sentence = sentence.replace(term, self.MASK)
+        return sentence
+
+
+############################################################
+# プロバイダーの選択
+############################################################
+
+def create_hint_provider(name, api_key, params, empty_message, **backend_options):
+    """
+    設定に応じてヒントのプロバイダーを作成
+
+    Args:
+        name (str): "openai" / "local" / "auto"（APIキーがあれば openai、なければ local）
+        api_key (str | None): OpenAI APIキー
+        params (dict): OpenAI の生成パラメータ
+        empty_message (str): ローカルプロバイダーで解説がない場合のヒント
+        **backend_options: HintBackend に渡す期限・リトライ・流量制限の設定
+
+    Returns:
+        HintProvider | None: プロバイダー（openai 指定で APIキーがない場合は None）
+
+    Raises:
+        ValueError: 未知のプロバイダー名の場合
+    """
+    if name == "auto":
+        name = "openai" if api_key else "local"
+
+    if name == "local":
+        return LocalHintProvider(empty_message)
+    if name == "openai":
+        if not api_key:
+            return None
+        return OpenAIHintProvider(HintBackend(api_key, **backend_options), params)
+    raise ValueError(f"未知のヒントプロバイダーです: {name}")
@@ -2,10 +2,10 @@
 アプリ起動時に一度だけ実行する初期化処理
 """
 
+import uuid
 import streamlit as st
 from dotenv import load_dotenv
 import constants as ct
-from utils import load_questions_csv
 
 
 ############################################################
@@ -23,8 +23,6 @@ def init_app():
     if "initialized" not in st.session_state:
         st.session_state.initialized = True
 
-        st.session_state.full_df = load_questions_csv()
-
         # 初期化データ
         st.session_state.current_question = None
         st.session_state.shuffled_options = []
@@ -34,7 +32,11 @@ def init_app():
         st.session_state.show_result = False
         st.session_state.question_number = 1
         st.session_state.hint_step = 1
-        st.session_state.asked_questions = {}  # フィルター条件ごとに出題済み問題を記録
+        st.session_state.deck = None  # シャッフル済みの行番号配列（山札）
+        st.session_state.deck_cursor = 0  # 次に引く山札の位置
+        st.session_state.deck_filter = None  # 山札を作成したフィルター条件
+        st.session_state.question_order = ct.QUESTION_ORDER_RANDOM  # 出題順（ランダム / 苦手優先）
+        st.session_state.scheduler = None  # 苦手優先の出題順のスケジューラー（1人プレイのみ）
         st.session_state.all_questions_done = False  # 全問出題完了フラグ
         st.session_state.no_questions_available = False  # 問題が存在しないフラグ
         st.session_state.game_started = False  # ゲーム開始フラグ
@@ -42,16 +44,29 @@ def init_app():
         # 追加推奨の初期化
         st.session_state.genre = "ランダム"
         st.session_state.difficulty = "ランダム"
+        st.session_state.difficulty_mode = ct.DIFFICULTY_MODE_LABEL  # 難易度の基準（CSVの設定 / 解答実績）
 
         # マルチプレイヤー設定
         st.session_state.player_count = 1  # デフォルトは1人
-        st.session_state.current_player = 0  # 現在の解答者インデックス（0=A, 1=B, 2=C, 3=D）
-        st.session_state.player_scores = {}  # {player_index: {"correct": 0, "total": 0, "points": 0.0}}
+        st.session_state.answer_mode = ct.ANSWER_MODE_SEQUENTIAL  # 解答方法（順番に / 全員同時に）
+        st.session_state.scoring = ct.SCORING_FLAT  # 得点の計算方法（正解で1点 / 早く答えるほど高得点）
+        st.session_state.current_player = 0  # 現在の解答者インデックス（0=A, 1=B, 2=C, ...）
+        st.session_state.player_scores = None  # Scoreboard（プレイヤーごとの正解数・解答数・得点と順位）
         st.session_state.hint_used = False  # 現在の問題でヒントを使用したかどうか
         st.session_state.player_hints_used = {}  # 各プレイヤーのヒント使用状態 {player_idx: bool}
         st.session_state.question_limit = None  # 問題数制限（Noneは無制限）
         st.session_state.time_limit = None  # 時間制限（秒、Noneは無制限）
-        st.session_state.question_start_time = None  # 問題開始時刻
+        st.session_state.question_start_time = None  # 問題開始時刻（time.monotonic() 基準）
+        st.session_state.question_deadline = None  # 解答期限（time.monotonic() 基準、Noneは無制限）
+        st.session_state.timeout_notice = None  # 時間切れになったプレイヤー名（次の描画で通知）
         st.session_state.game_finished = False  # ゲーム終了フラグ
         st.session_state.player_answers = {}  # {player_index: answer_index} 各プレイヤーの解答記録
-        st.session_state.all_players_answered = False  # 全員解答完了フラグ
\ No newline at end of file
+        st.session_state.player_latencies = {}  # {player_index: 秒} 各プレイヤーの解答時間
+        st.session_state.session_id = uuid.uuid4().hex  # 解答履歴のセッションID（New Game ごとに発行）
+        st.session_state.all_players_answered = False  # 全員解答完了フラグ
+
+        # ルーム（各自の端末で同時に解答するマルチプレイ）
+        st.session_state.play_mode = ct.PLAY_MODE_LOCAL  # プレイ方法（この端末で交代 / ルーム）
+        st.session_state.room_code = None  # 参加中のルームコード
+        st.session_state.room_player_id = uuid.uuid4().hex  # ルームでの参加者ID（ブラウザのセッションごと）
+        st.session_state.room_is_host = False  # ルームのホストかどうか
@@ -0,0 +1,130 @@
+"""
+問題バンク全体のAIヒントを事前生成するコマンド
+全問題の STEP 1・STEP 2 ヒントを生成し、事前生成ヒントファイル（JSON Lines）に追記する
+生成済みのヒントはスキップするため、中断しても同じコマンドで再開できる
+
+使い方:
+    python pregenerate_hints.py [--csv data/questions.csv] [--output data/hints.jsonl]
+                                [--concurrency 4] [--retries 3]
+"""
+
+import argparse
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import constants as ct
+import utils
+from hint_cache import append_precomputed_hint, load_precomputed_hints
+from question_bank import read_question_bank
+
+
+# 生成するヒント段階（get_hint は STEP 2 までしか進まない）
+HINT_STEPS = (1, 2)
+
+
+############################################################
+# ヒント生成（リトライ付き）
+############################################################
+
+def generate_with_retry(q, step, retries, base_delay):
+    """
+    指数バックオフ（ジッター付き）でリトライしながらヒントを生成
+
+    Args:
+        q (Question): 問題
+        step (int): ヒント段階
+        retries (int): 失敗時の最大リトライ回数
+        base_delay (float): 初回リトライまでの待機時間（秒）
+
+    Returns:
+        str: 生成されたヒント
+    """
+    for attempt in range(retries + 1):
+        try:
+            return utils.request_hint(q.correct_explanation, q.difficulty, step)
+        except ValueError:
+            # APIキー未設定はリトライしても解決しない
+            raise
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(base_delay * (2 ** attempt) * (0.5 + random.random()))
+
+
+############################################################
+# 事前生成
+############################################################
+
+def pregenerate(csv_path, output_path, concurrency, retries, base_delay):
+    """
+    未生成のヒントだけを並列に生成してファイルへ追記
+
+    Returns:
+        tuple[int, int]: (生成件数, 失敗件数)
+    """
+    if utils.hint_provider is None or utils.hint_provider.name != "openai":
+        raise ValueError("事前生成には OpenAI APIキーの設定が必要です（HINT_PROVIDER=local では実行できません）")
+
+    bank = read_question_bank(csv_path)
+    done = load_precomputed_hints(output_path)
+
+    # 生成対象（同じプロンプトは1回だけ）
+    jobs = {}
+    for row_id in range(len(bank)):
+        q = bank.question(row_id)
+        for step in HINT_STEPS:
+            key = utils.hint_cache_key(q.correct_explanation, q.difficulty, step)
+            if key not in done and key not in jobs:
+                jobs[key] = (q, step)
+
+    print(f"全{len(bank)}問 / 生成済み {len(done)}件 / 未生成 {len(jobs)}件")
+
+    generated = 0
+    failed = 0
+    with open(output_path, "a", encoding="utf-8") as f, \
+            ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {
+            executor.submit(generate_with_retry, q, step, retries, base_delay): key
+            for key, (q, step) in jobs.items()
+        }
+        for future in as_completed(futures):
+            key = futures[future]
+            q, step = jobs[key]
+            row_id = q.row_id
+            try:
+                hint = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"失敗: 行{row_id} STEP {step} - {e}", file=sys.stderr)
+                continue
+            if hint:
+                append_precomputed_hint(f, key, hint, row=row_id, step=step)
+                generated += 1
+                print(f"[{generated + failed}/{len(jobs)}] 行{row_id} STEP {step}")
+
+    return generated, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="全問題のAIヒントを事前生成します")
+    parser.add_argument("--csv", default=ct.QUESTIONS_CSV, help="問題CSVファイル")
+    parser.add_argument("--output", default=ct.PRECOMPUTED_HINTS_PATH, help="事前生成ヒントの出力先")
+    parser.add_argument("--concurrency", type=int, default=4, help="同時リクエスト数")
+    parser.add_argument("--retries", type=int, default=3, help="失敗時のリトライ回数")
+    parser.add_argument("--retry-delay", type=float, default=1.0, help="初回リトライまでの待機秒数")
+    args = parser.parse_args()
+
+    try:
+        generated, failed = pregenerate(
+            args.csv, args.output, max(1, args.concurrency), args.retries, args.retry_delay
+        )
+    except ValueError as e:
+        print(f"エラー: {e}", file=sys.stderr)
+        return 2
+    print(f"完了: 生成 {generated}件 / 失敗 {failed}件")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
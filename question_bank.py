@@ -0,0 +1,587 @@
+"""
+問題バンク（サーバープロセス内で共有する読み取り専用データ）
+CSVを一定行数ずつ読み込み、索引に使う列（正解・ジャンル・難易度）だけをコンパクトな配列で保持する
+問題文・選択肢・解説などの長いテキストはディスク上に置き、出題時に1問分だけ読み出す
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import random
+import struct
+import sys
+import tempfile
+from array import array
+import constants as ct
+
+
+# CSVに必須の列
+REQUIRED_COLUMNS = ["question", "option1", "option2", "option3", "option4",
+                    "correct_option", "genre", "difficulty", "option_explanations"]
+
+
+############################################################
+# 問題レコード
+############################################################
+
+class Question:
+    """
+    1問分の問題データ（出題時に問題バンクから取り出す）
+    
+    Attributes:
+        row_id (int): 問題バンク内の行番号
+        key (int): 問題文と選択肢から求めた問題キー（CSVの並び替え・追加で変わらない）
+        question (str): 問題文
+        options (tuple[str]): 選択肢4つ（CSVの option1〜option4 の順）
+        correct (int): 正解の選択肢インデックス（0始まり）
+        genre (str): ジャンル
+        difficulty (str): 難易度
+        explanations (tuple[str]): 選択肢ごとの解説（分割済み、解説なしの場合は空）
+    """
+
+    __slots__ = ("row_id", "key", "question", "options", "correct", "genre", "difficulty", "explanations")
+
+    def __init__(self, row_id, key, question, options, correct, genre, difficulty, explanations):
+        self.row_id = row_id
+        self.key = key
+        self.question = question
+        self.options = options
+        self.correct = correct
+        self.genre = genre
+        self.difficulty = difficulty
+        self.explanations = explanations
+
+    @property
+    def correct_explanation(self):
+        """正解の選択肢の解説（ヒント生成に使用）"""
+        if len(self.explanations) > self.correct:
+            return self.explanations[self.correct]
+        return "解説がありません"
+
+
+def question_key(question, options):
+    """
+    問題文と選択肢から問題キーを求める
+    
+    行番号はCSVの並び替え・途中への追加・削除でずれるため、回答履歴や難易度の集計は
+    このキーで保存する（SQLite の INTEGER に収まる符号付き64ビット整数）。
+    
+    Args:
+        question (str): 問題文
+        options (Iterable[str]): 選択肢4つ
+        
+    Returns:
+        int: 問題キー
+    """
+    text = "\x1f".join([question, *options]).encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(text, digest_size=8).digest(), "big", signed=True)
+
+
+############################################################
+# 問題バンク
+############################################################
+
+class QuestionTextStore:
+    """
+    問題文・選択肢・解説を1問1レコードとして一時ファイルに書き出し、メモリマップで読み出す
+    
+    メモリ上に保持するのは各レコードの開始位置（1問あたり8バイト）だけで、
+    テキスト本体はOSのページキャッシュに任せる。
+    """
+
+    def __init__(self):
+        self._file = tempfile.TemporaryFile()
+        self._offsets = array("q", [0])
+        self._map = None
+        self._base = 0
+
+    @classmethod
+    def from_mapping(cls, offsets, buffer, base):
+        """
+        コンパイル済み問題バンクのメモリマップから読み出し専用のストアを作成
+        
+        Args:
+            offsets (Sequence[int]): 各レコードの開始位置（問題数 + 1 個）
+            buffer (mmap.mmap): ファイル全体のメモリマップ
+            base (int): テキスト領域の開始位置
+            
+        Returns:
+            QuestionTextStore: テキストストア
+        """
+        store = cls.__new__(cls)
+        store._file = None
+        store._offsets = offsets
+        store._map = buffer
+        store._base = base
+        return store
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def append(self, question, options, explanations):
+        """
+        1問分のテキストを追加
+        
+        Args:
+            question (str): 問題文
+            options (list[str]): 選択肢4つ
+            explanations (str): 選択肢ごとの解説（"|" 区切りのまま）
+        """
+        record = json.dumps([question, options, explanations], ensure_ascii=False).encode("utf-8")
+        self._file.write(record)
+        self._offsets.append(self._offsets[-1] + len(record))
+
+    def finish(self):
+        """書き込みを終えて読み出し用にメモリマップする"""
+        self._file.flush()
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def get(self, row_id):
+        """
+        1問分のテキストを読み出す
+        
+        Args:
+            row_id (int): 行番号
+            
+        Returns:
+            tuple: (問題文, 選択肢のタプル, 選択肢ごとの解説のタプル)
+        """
+        start = self._base + self._offsets[row_id]
+        end = self._base + self._offsets[row_id + 1]
+        question, options, explanations = json.loads(self._map[start:end])
+        return question, tuple(options), tuple(explanations.split("|")) if explanations else ()
+
+    def write_to(self, f, block_size=1 << 24):
+        """
+        テキスト領域全体をファイルに書き出す（コンパイル用）
+        
+        Args:
+            f (BinaryIO): 書き込み先
+            block_size (int): 1回に書き込むバイト数
+        """
+        end = self._base + self._offsets[-1]
+        for start in range(self._base, end, block_size):
+            f.write(self._map[start:min(start + block_size, end)])
+
+
+class QuestionBank:
+    """
+    問題データと (ジャンル, 難易度) 索引をまとめたオブジェクト
+    
+    正解・ジャンル・難易度・問題キーは列ごとの配列（ジャンル・難易度は整数コード）として保持し、
+    問題文などのテキストは QuestionTextStore から出題時に読み出す。
+    索引は「ランダム」を含むすべての組み合わせについて、該当する行番号を
+    コンパクトな整数配列として保持する。全セッションで共有されるため変更しないこと。
+    """
+
+    def __init__(self, correct, genre_codes, difficulty_codes, question_keys, texts, genres, difficulties):
+        self.correct = correct
+        self.genre_codes = genre_codes
+        self.difficulty_codes = difficulty_codes
+        self.question_keys = question_keys
+        self.texts = texts
+        self.genres = genres
+        self.difficulties = difficulties
+        self.index = build_question_index(
+            (genres[code] for code in genre_codes),
+            (difficulties[code] for code in difficulty_codes),
+        )
+
+    @classmethod
+    def from_chunks(cls, chunks):
+        """
+        CSVを分割して読み込んだ DataFrame から問題バンクを作成
+        
+        チャンクごとに検証し、索引に使う列は配列へ、テキストは QuestionTextStore へ移す。
+        
+        Args:
+            chunks (Iterable[pd.DataFrame]): 一定行数ずつの問題データ
+            
+        Returns:
+            QuestionBank: 問題バンク
+            
+        Raises:
+            ValueError: 必須列の不足・正解番号の不正、ジャンル・難易度の種類が多すぎる、またはデータが空の場合
+        """
+        texts = QuestionTextStore()
+        correct = array("b")
+        genre_codes = array("h")
+        difficulty_codes = array("b")
+        question_keys = array("q")
+        genre_lookup = {}
+        difficulty_lookup = {}
+
+        first_row = 0
+        for chunk in chunks:
+            validate_chunk(chunk, first_row)
+            first_row += len(chunk)
+
+            correct.extend(int(v) - 1 for v in chunk["correct_option"].tolist())
+            _extend_codes(genre_codes, genre_lookup, chunk["genre"].tolist(), "genre")
+            _extend_codes(difficulty_codes, difficulty_lookup, chunk["difficulty"].tolist(), "difficulty")
+            for question, *options, explanations in zip(
+                chunk["question"].tolist(),
+                *(chunk[f"option{i}"].tolist() for i in range(1, 5)),
+                chunk["option_explanations"].tolist(),
+            ):
+                texts.append(question, options, explanations)
+                question_keys.append(question_key(question, options))
+
+        # データが空でないかチェック
+        if first_row == 0:
+            raise ValueError("CSVファイルに問題データが存在しません")
+        texts.finish()
+
+        # 出現順に振ったコードを名前順に振り直す（サイドバーの並び順のため）
+        genres, genre_codes = _sort_codes(genre_lookup, genre_codes)
+        difficulties, difficulty_codes = _sort_codes(difficulty_lookup, difficulty_codes)
+
+        return cls(correct, genre_codes, difficulty_codes, question_keys, texts, genres, difficulties)
+
+    def __len__(self):
+        return len(self.correct)
+
+    def candidates(self, genre, difficulty):
+        """
+        条件に該当する行番号の配列を取得
+        
+        Args:
+            genre (str): ジャンル（「ランダム」は全ジャンル）
+            difficulty (str): 難易度（「ランダム」は全難易度）
+            
+        Returns:
+            array: 行番号の配列（該当なしの場合は空配列）
+        """
+        return self.index.get((genre, difficulty), _EMPTY)
+
+    def new_deck(self, genre, difficulty):
+        """
+        条件に該当する行番号をシャッフルした山札を作成
+        
+        山札は先頭から順に引くだけで重複なく出題でき、1問あたり4バイトで済む。
+        
+        Args:
+            genre (str): ジャンル
+            difficulty (str): 難易度
+            
+        Returns:
+            array: シャッフル済みの行番号配列（セッションごとに独立したコピー）
+        """
+        deck = array("i", self.candidates(genre, difficulty))
+        random.shuffle(deck)
+        return deck
+
+    def question(self, row_id):
+        """
+        行番号に対応する問題レコードを取得
+        
+        Args:
+            row_id (int): 行番号
+            
+        Returns:
+            Question: 問題レコード
+        """
+        question, options, explanations = self.texts.get(row_id)
+        return Question(
+            row_id=row_id,
+            key=self.question_keys[row_id],
+            question=question,
+            options=options,
+            correct=self.correct[row_id],
+            genre=self.genres[self.genre_codes[row_id]],
+            difficulty=self.difficulties[self.difficulty_codes[row_id]],
+            explanations=explanations,
+        )
+
+
+def _extend_codes(codes, lookup, values, column):
+    # 値に出現順のコードを振って追加する（コードが配列の型に収まらない場合はエラー）
+    new_codes = [lookup.setdefault(v, len(lookup)) for v in values]
+    limit = 1 << (8 * codes.itemsize - 1)
+    if len(lookup) > limit:
+        raise ValueError(f"CSVファイルの {column} の種類が多すぎます（{limit}種類まで）: {len(lookup)}種類")
+    codes.extend(new_codes)
+
+
+def _sort_codes(lookup, codes):
+    names = sorted(lookup)
+    remap = array(codes.typecode, bytes(codes.itemsize * len(lookup)))
+    for code, name in enumerate(names):
+        remap[lookup[name]] = code
+    return names, array(codes.typecode, (remap[c] for c in codes))
+
+
+_EMPTY = array("i")
+
+
+############################################################
+# CSV読込
+############################################################
+
+def read_question_bank(path, chunk_rows=ct.QUESTIONS_CHUNK_ROWS):
+    """
+    CSVファイルを一定行数ずつ読み込み・検証して問題バンクを作成
+    
+    必須列以外は読み込まず、全行を1つの DataFrame に展開することもない。
+    
+    Args:
+        path (str): CSVファイルのパス
+        chunk_rows (int): 1回に読み込む行数
+        
+    Returns:
+        QuestionBank: 問題バンク
+        
+    Raises:
+        ValueError: ファイルが空・必須列の不足・正解番号の不正、またはデータが空の場合
+    """
+    # pandas の読み込みは重いため、CSVを解析する場合にだけ読み込む
+    # （コンパイル済み問題バンクを使う場合は不要）
+    import pandas as pd
+
+    try:
+        reader = pd.read_csv(
+            path,
+            encoding="utf-8-sig",
+            chunksize=chunk_rows,
+            usecols=lambda column: column in REQUIRED_COLUMNS,
+            dtype=str,
+            keep_default_na=False,
+        )
+    except pd.errors.EmptyDataError as e:
+        raise ValueError(f"{path} が空のファイルです") from e
+    with reader:
+        return QuestionBank.from_chunks(reader)
+
+
+def validate_chunk(chunk, first_row):
+    """
+    読み込んだ問題データの一部を検証
+    
+    Args:
+        chunk (pd.DataFrame): 問題データの一部
+        first_row (int): chunk の先頭の行番号（エラーメッセージ用）
+        
+    Raises:
+        ValueError: 必須列の不足、または正解番号が 1〜4 以外の行がある場合
+    """
+    # 必須列の存在チェック
+    missing_columns = [col for col in REQUIRED_COLUMNS if col not in chunk.columns]
+    
+    if missing_columns:
+        raise ValueError(f"CSVファイルに必要な列が不足しています: {', '.join(missing_columns)}")
+
+    # 正解番号のチェック（ヘッダー行を含めたCSV上の行番号で報告する）
+    for offset, value in enumerate(chunk["correct_option"].tolist()):
+        if value.strip() not in ("1", "2", "3", "4"):
+            line = first_row + offset + 2
+            raise ValueError(f"CSVファイルの{line}行目の correct_option が不正です（1〜4で指定してください）: {value}")
+
+
+############################################################
+# コンパイル済み問題バンク（バイナリ形式）
+############################################################
+
+# ファイル形式
+#   ヘッダー（固定長）
+#   正解番号      int8  × 問題数
+#   ジャンル      int16 × 問題数
+#   難易度        int8  × 問題数
+#   問題キー      int64 × 問題数
+#   テキスト位置  int64 × (問題数 + 1)
+#   名前表        JSON（{"genres": [...], "difficulties": [...]}）
+#   テキスト領域  1問1レコードの JSON（QuestionTextStore と同じ形式）
+# 各領域は8バイト境界から始まり、数値はコンパイルしたマシンのバイト順で保存する
+BANK_MAGIC = b"QBNK"
+BANK_VERSION = 2
+_BANK_HEADER = struct.Struct("<4sHBxQqQ8Q")
+_BYTEORDER_CODES = {"little": 0, "big": 1}
+
+
+def compile_question_bank(csv_path, output_path, chunk_rows=ct.QUESTIONS_CHUNK_ROWS):
+    """
+    問題CSVを検証し、バイナリ形式の問題バンクに変換する
+    
+    検証は read_question_bank と同じ（必須列・正解番号・データが空でないこと）。
+    書き込みは一時ファイルに行い、完了後に置き換える（アプリが読み込み中でも壊れない）。
+    
+    Args:
+        csv_path (str): 問題CSVファイルのパス
+        output_path (str): 出力先のパス
+        chunk_rows (int): 1回に読み込む行数
+        
+    Returns:
+        QuestionBank: 変換元の問題バンク
+        
+    Raises:
+        ValueError: ファイルが空・必須列の不足・正解番号の不正、またはデータが空の場合
+    """
+    stat = os.stat(csv_path)
+    bank = read_question_bank(csv_path, chunk_rows=chunk_rows)
+    count = len(bank)
+    texts = bank.texts
+
+    names = json.dumps(
+        {"genres": bank.genres, "difficulties": bank.difficulties}, ensure_ascii=False
+    ).encode("utf-8")
+    sections = [
+        bank.correct.tobytes(),
+        bank.genre_codes.tobytes(),
+        bank.difficulty_codes.tobytes(),
+        bank.question_keys.tobytes(),
+        texts._offsets.tobytes(),
+        names,
+    ]
+    offsets = []
+    position = _align(_BANK_HEADER.size)
+    for data in sections:
+        offsets.append(position)
+        position = _align(position + len(data))
+    text_offset = position
+
+    header = _BANK_HEADER.pack(
+        BANK_MAGIC, BANK_VERSION, _BYTEORDER_CODES[sys.byteorder], count,
+        stat.st_mtime_ns, stat.st_size,
+        *offsets[:5], offsets[5], len(names), text_offset,
+    )
+
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        for offset, data in zip(offsets, sections):
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(data)
+        f.write(b"\0" * (text_offset - f.tell()))
+        texts.write_to(f)
+    os.replace(tmp_path, output_path)
+    return bank
+
+
+def open_question_bank(path, source_path=None):
+    """
+    コンパイル済みの問題バンクをメモリマップで開く
+    
+    配列・テキストはファイル上のデータを直接参照するため、文字列は出題時まで作られず、
+    同じファイルを開いた複数のプロセスでOSのページキャッシュを共有できる。
+    
+    Args:
+        path (str): コンパイル済みファイルのパス
+        source_path (str | None): 変換元のCSV（指定した場合は更新時刻・サイズが一致するか確認する）
+        
+    Returns:
+        QuestionBank | None: 問題バンク（形式が異なる・CSVより古い・ファイルが壊れている場合は None）
+    """
+    with open(path, "rb") as f:
+        # 空のファイルは mmap できないため、ヘッダーに満たない場合は開く前に判定する
+        if os.fstat(f.fileno()).st_size < _BANK_HEADER.size:
+            return None
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    bank = _map_question_bank(buffer, source_path)
+    if bank is None:
+        buffer.close()
+    return bank
+
+
+def _map_question_bank(buffer, source_path):
+    (magic, version, byteorder, count, source_mtime_ns, source_size,
+     correct_at, genre_at, difficulty_at, keys_at, text_offsets_at, names_at, names_len,
+     text_at) = _BANK_HEADER.unpack_from(buffer, 0)
+    if magic != BANK_MAGIC or version != BANK_VERSION or byteorder != _BYTEORDER_CODES[sys.byteorder]:
+        return None
+    if source_path is not None:
+        stat = os.stat(source_path)
+        if stat.st_mtime_ns != source_mtime_ns or stat.st_size != source_size:
+            return None
+
+    # 書き込み途中で切れたファイルなどは、各領域がファイル内に収まっているかで判定する
+    size = len(buffer)
+    sections = (
+        (correct_at, count),
+        (genre_at, 2 * count),
+        (difficulty_at, count),
+        (keys_at, 8 * count),
+        (text_offsets_at, 8 * (count + 1)),
+        (names_at, names_len),
+        (text_at, 0),
+    )
+    if count == 0 or any(at < _BANK_HEADER.size or at % 8 or at + length > size for at, length in sections):
+        return None
+
+    view = memoryview(buffer)
+    text_offsets = view[text_offsets_at:text_offsets_at + 8 * (count + 1)].cast("q")
+    if text_offsets[0] != 0 or text_offsets[-1] > size - text_at:
+        return None
+    try:
+        names = json.loads(buffer[names_at:names_at + names_len])
+        genres, difficulties = names["genres"], names["difficulties"]
+    except (ValueError, TypeError, KeyError):
+        return None
+    genre_codes = view[genre_at:genre_at + 2 * count].cast("h")
+    difficulty_codes = view[difficulty_at:difficulty_at + count].cast("b")
+    if not (
+        isinstance(genres, list) and isinstance(difficulties, list)
+        and 0 <= min(genre_codes) and max(genre_codes) < len(genres)
+        and 0 <= min(difficulty_codes) and max(difficulty_codes) < len(difficulties)
+    ):
+        return None
+    return QuestionBank(
+        correct=view[correct_at:correct_at + count].cast("b"),
+        genre_codes=genre_codes,
+        difficulty_codes=difficulty_codes,
+        question_keys=view[keys_at:keys_at + 8 * count].cast("q"),
+        texts=QuestionTextStore.from_mapping(text_offsets, buffer, text_at),
+        genres=genres,
+        difficulties=difficulties,
+    )
+
+
+def load_question_bank(csv_path, compiled_path):
+    """
+    問題バンクを読み込む（CSVと一致するコンパイル済みファイルがあればそちらを使う）
+    
+    Args:
+        csv_path (str): 問題CSVファイルのパス
+        compiled_path (str): コンパイル済みファイルのパス
+        
+    Returns:
+        QuestionBank: 問題バンク
+        
+    Raises:
+        ValueError: CSVファイルが空・必須列の不足・正解番号の不正、またはデータが空の場合
+    """
+    if os.path.exists(compiled_path):
+        bank = open_question_bank(compiled_path, source_path=csv_path)
+        if bank is not None:
+            return bank
+    return read_question_bank(csv_path)
+
+
+def _align(position, boundary=8):
+    return (position + boundary - 1) // boundary * boundary
+
+
+def build_question_index(genres, difficulties):
+    """
+    (ジャンル, 難易度) → 行番号配列 の索引を作成
+    
+    「ランダム」を含む組み合わせ（ジャンルのみ・難易度のみ・全問題）も登録する。
+    
+    Args:
+        genres (Iterable[str]): 各行のジャンル
+        difficulties (Iterable[str]): 各行の難易度
+        
+    Returns:
+        dict: {(genre, difficulty): array("i")}
+    """
+    index = {}
+    for row_id, (genre, difficulty) in enumerate(zip(genres, difficulties)):
+        for key in (
+            (genre, difficulty),
+            (genre, ct.FILTER_RANDOM),
+            (ct.FILTER_RANDOM, difficulty),
+            (ct.FILTER_RANDOM, ct.FILTER_RANDOM),
+        ):
+            if key not in index:
+                index[key] = array("i")
+            index[key].append(row_id)
+    return index
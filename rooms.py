@@ -0,0 +1,394 @@
+"""
+ルーム（各自の端末で同時に解答するマルチプレイ）
+サーバープロセス内のハブがルームコードごとのゲーム状態を保持し、
+ホストが出題した問題に参加者が同時に解答する
+
+参加者の画面は一定間隔でルームの状態（スナップショット）を読むだけで、ロックは取らない。
+状態を変更する操作（参加・解答・結果表示など）はルームごとのロックで短時間だけ直列化し、
+変更のたびに新しいスナップショットに差し替える。
+"""
+
+import random
+import secrets
+import threading
+import time
+import uuid
+
+from scoreboard import Scoreboard
+
+
+# ルームの進行状態
+PHASE_WAITING = "waiting"  # 参加者の受付中（最初の問題の前）
+PHASE_QUESTION = "question"  # 解答受付中
+PHASE_RESULT = "result"  # 結果表示中
+PHASE_FINISHED = "finished"  # ゲーム終了
+
+# ルームコードに使う文字（読み間違えやすい 0/O・1/I は除く）
+ROOM_CODE_ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
+
+
+class RoomError(Exception):
+    """ルームに参加・解答できない場合の例外（メッセージは画面にそのまま表示する）"""
+
+
+############################################################
+# スナップショット
+############################################################
+
+class RoomSnapshot:
+    """
+    ある時点のルームの状態（読み取り専用、参加者の画面はこれだけを参照する）
+
+    Attributes:
+        version (int): 状態が変わるたびに増える番号
+        phase (str): 進行状態（PHASE_*）
+        round (int): 出題した問題数
+        question_id (int | None): 出題中の問題の行番号
+        option_order (tuple[int]): 全員に共通の選択肢の表示順（CSV上のインデックス）
+        deadline (float | None): 解答期限（time.monotonic() 基準、None は無制限）
+        answered (int): 現在の問題に解答済みの人数
+        player_count (int): 参加者数
+        ranking (tuple[tuple]): 上位の (順位, 名前, 正解数, 解答数, 得点, 参加者番号) の得点順
+        ranks (tuple[int]): 参加者番号ごとの順位（同点は同順位）
+        choice_counts (tuple[int]): 結果表示中の選択肢ごとの解答数（CSV上の順番）
+    """
+
+    __slots__ = (
+        "version", "phase", "round", "question_id", "option_order", "deadline",
+        "answered", "player_count", "ranking", "ranks", "choice_counts",
+    )
+
+    def __init__(self, version, phase, round, question_id, option_order, deadline,
+                 answered, player_count, ranking, ranks, choice_counts):
+        self.version = version
+        self.phase = phase
+        self.round = round
+        self.question_id = question_id
+        self.option_order = option_order
+        self.deadline = deadline
+        self.answered = answered
+        self.player_count = player_count
+        self.ranking = ranking
+        self.ranks = ranks
+        self.choice_counts = choice_counts
+
+    def replace(self, **changes):
+        values = {name: getattr(self, name) for name in self.__slots__}
+        values.update(changes)
+        values["version"] = self.version + 1
+        return RoomSnapshot(**values)
+
+
+############################################################
+# ルーム
+############################################################
+
+class Room:
+    """
+    1つのゲーム（ホスト1人と参加者）の状態
+
+    Args:
+        code (str): ルームコード
+        bank (QuestionBank): 問題バンク（全ルームで共有）
+        deck (array): シャッフル済みの行番号配列（このルームで出題する問題）
+        time_limit (float | None): 1問あたりの制限時間（秒、None は無制限）
+        question_limit (int | None): 出題する問題数（None は山札を出し切るまで）
+        max_players (int): 参加できる最大人数
+        score_answer (Callable | None): (正解かどうか, 解答時間, 制限時間) → 得点（None は正解で1点）
+        on_reveal (Callable | None): 結果表示時に (ルーム, 問題の行番号, 解答結果のリスト) を受け取る
+        ranking_top (int): スナップショットに含める上位の人数
+    """
+
+    def __init__(self, code, bank, deck, time_limit=None, question_limit=None, max_players=40,
+                 score_answer=None, on_reveal=None, ranking_top=10):
+        self.code = code
+        self.session_id = uuid.uuid4().hex
+        self.bank = bank
+        self.deck = deck
+        self.time_limit = time_limit
+        self.question_limit = question_limit
+        self.max_players = max_players
+        self.score_answer = score_answer or (lambda is_correct, latency, time_limit: 1.0 if is_correct else 0.0)
+        self.on_reveal = on_reveal
+        self.ranking_top = ranking_top
+        self.last_active = time.monotonic()
+
+        self._lock = threading.Lock()
+        self._cursor = 0
+        self._players = {}  # {参加者ID: 参加者番号}
+        self._names = []  # 参加者番号 → 名前
+        self._scores = Scoreboard()  # 参加者番号ごとの正解数・解答数・得点と順位
+        self._answers = {}  # {参加者ID: (選択肢, 解答時間)}（現在の問題のみ）
+        self._started_at = None
+        self.snapshot = RoomSnapshot(
+            version=0, phase=PHASE_WAITING, round=0, question_id=None, option_order=(),
+            deadline=None, answered=0, player_count=0, ranking=(), ranks=(), choice_counts=(),
+        )
+
+    def join(self, player_id, name):
+        """
+        参加者を追加する（同じ参加者IDで再参加した場合は元の番号を返す）
+
+        Args:
+            player_id (str): 参加者ID（セッションごとに一意）
+            name (str): 表示名（重複する場合は番号を付ける）
+
+        Returns:
+            int: 参加者番号
+
+        Raises:
+            RoomError: 満員・終了済みの場合
+        """
+        with self._lock:
+            if player_id in self._players:
+                return self._players[player_id]
+            if self.snapshot.phase == PHASE_FINISHED:
+                raise RoomError("このルームのゲームは終了しています")
+            if len(self._names) >= self.max_players:
+                raise RoomError(f"このルームは満員です（{self.max_players}人）")
+
+            name = name.strip() or f"参加者{len(self._names) + 1}"
+            taken = set(self._names)
+            unique = name
+            suffix = 2
+            while unique in taken:
+                unique = f"{name}({suffix})"
+                suffix += 1
+
+            index = self._scores.add_player()
+            self._players[player_id] = index
+            self._names.append(unique)
+            self._publish(player_count=len(self._names), **self._ranking())
+            return index
+
+    def player_index(self, player_id):
+        """参加者番号を取得（未参加の場合は None）"""
+        return self._players.get(player_id)
+
+    def player_name(self, index):
+        """参加者番号に対応する表示名"""
+        return self._names[index]
+
+    def player_score(self, index):
+        """
+        参加者のスコアを取得
+
+        Returns:
+            tuple[int, int, float]: (正解数, 解答数, 得点)
+        """
+        return self._scores.score(index)
+
+    def answer_of(self, player_id):
+        """
+        現在の問題への解答を取得
+
+        Returns:
+            tuple[int, float] | None: (選択肢（CSV上の順番）, 解答時間)（未解答の場合は None）
+        """
+        return self._answers.get(player_id)
+
+    def next_question(self):
+        """
+        次の問題を出題する（山札を出し切った・問題数に達した場合はゲーム終了）
+
+        Returns:
+            bool: 出題できたかどうか
+        """
+        with self._lock:
+            if self.snapshot.phase == PHASE_QUESTION:
+                return True
+            reached_limit = self.question_limit is not None and self.snapshot.round >= self.question_limit
+            if reached_limit or self._cursor >= len(self.deck):
+                self._publish(phase=PHASE_FINISHED, deadline=None)
+                return False
+
+            question_id = self.deck[self._cursor]
+            self._cursor += 1
+            option_order = list(range(4))
+            random.shuffle(option_order)
+
+            self._answers = {}
+            self._started_at = time.monotonic()
+            deadline = None if self.time_limit is None else self._started_at + self.time_limit
+            self._publish(
+                phase=PHASE_QUESTION, round=self.snapshot.round + 1, question_id=question_id,
+                option_order=tuple(option_order), deadline=deadline, answered=0, choice_counts=(),
+            )
+            return True
+
+    def submit(self, player_id, choice):
+        """
+        解答を受け付ける（1問につき1回、期限後は受け付けない）
+
+        Args:
+            player_id (str): 参加者ID
+            choice (int): 選んだ選択肢（CSV上の順番）
+
+        Returns:
+            bool: 受け付けたかどうか
+        """
+        snapshot = self.snapshot
+        if snapshot.phase != PHASE_QUESTION or player_id not in self._players:
+            return False
+        now = time.monotonic()
+        if snapshot.deadline is not None and now > snapshot.deadline:
+            return False
+
+        with self._lock:
+            # 結果表示と入れ違いになった解答・2回目の解答は無視する
+            current = self.snapshot
+            if current.phase != PHASE_QUESTION or current.round != snapshot.round or player_id in self._answers:
+                return False
+            self._answers[player_id] = (choice, now - self._started_at)
+            self._publish(answered=len(self._answers))
+        self.tick()
+        return True
+
+    def tick(self):
+        """
+        期限を過ぎた、または全員が解答した場合に結果を表示する（何度呼んでもよい）
+
+        Returns:
+            bool: 結果表示に切り替えたかどうか
+        """
+        snapshot = self.snapshot
+        if snapshot.phase != PHASE_QUESTION:
+            return False
+        expired = snapshot.deadline is not None and time.monotonic() > snapshot.deadline
+        everyone = snapshot.player_count > 0 and snapshot.answered >= snapshot.player_count
+        if not (expired or everyone):
+            return False
+        return self.reveal()
+
+    def reveal(self):
+        """
+        解答を締め切って採点し、結果表示に切り替える
+
+        Returns:
+            bool: 結果表示に切り替えたかどうか（既に結果表示中の場合は False）
+        """
+        with self._lock:
+            if self.snapshot.phase != PHASE_QUESTION:
+                return False
+            question_id = self.snapshot.question_id
+            correct_choice = self.bank.correct[question_id]
+            counts = [0, 0, 0, 0]
+            results = []
+            for player_id, index in self._players.items():
+                answer = self._answers.get(player_id)
+                choice, latency = answer if answer is not None else (-1, None)
+                is_correct = choice == correct_choice
+                points = self.score_answer(is_correct, latency, self.time_limit)
+                self._scores.record(index, is_correct, points)
+                if choice != -1:
+                    counts[choice] += 1
+                results.append((index, choice, is_correct, latency, points))
+            self._publish(phase=PHASE_RESULT, deadline=None, choice_counts=tuple(counts), **self._ranking())
+
+        if self.on_reveal is not None:
+            self.on_reveal(self, question_id, results)
+        return True
+
+    def finish(self):
+        """ゲームを終了する"""
+        with self._lock:
+            self._publish(phase=PHASE_FINISHED, deadline=None)
+
+    def _ranking(self):
+        ranking = tuple(
+            (rank, self._names[index], *self._scores.score(index), index)
+            for rank, index in self._scores.page(0, self.ranking_top)
+        )
+        ranks = tuple(self._scores.rank(index) for index in range(len(self._names)))
+        return {"ranking": ranking, "ranks": ranks}
+
+    def _publish(self, **changes):
+        # スナップショットは丸ごと差し替える（読み取り側はロック不要）
+        self.snapshot = self.snapshot.replace(**changes)
+        self.last_active = time.monotonic()
+
+
+############################################################
+# ルームハブ
+############################################################
+
+class RoomHub:
+    """
+    サーバープロセス内のルームをルームコードで管理する
+
+    Args:
+        max_rooms (int): 同時に存在できるルーム数
+        idle_timeout (float): 操作がないルームを削除するまでの時間（秒）
+        code_length (int): ルームコードの文字数
+    """
+
+    def __init__(self, max_rooms=100, idle_timeout=2 * 60 * 60, code_length=5):
+        self.max_rooms = max_rooms
+        self.idle_timeout = idle_timeout
+        self.code_length = code_length
+        self._rooms = {}
+        self._lock = threading.Lock()
+
+    def create(self, bank, deck, **room_options):
+        """
+        新しいルームを作成
+
+        Args:
+            bank (QuestionBank): 問題バンク
+            deck (array): このルームで出題する行番号の山札
+            **room_options: Room に渡す制限時間・問題数などの設定
+
+        Returns:
+            Room: 作成したルーム
+
+        Raises:
+            RoomError: ルーム数が上限に達している場合
+        """
+        with self._lock:
+            self._remove_idle(time.monotonic())
+            if len(self._rooms) >= self.max_rooms:
+                raise RoomError("ルームが混み合っています。しばらくしてから作成してください")
+            code = self._new_code()
+            room = Room(code, bank, deck, **room_options)
+            self._rooms[code] = room
+            return room
+
+    def get(self, code):
+        """
+        ルームを取得
+
+        Args:
+            code (str): ルームコード（大文字・小文字は区別しない）
+
+        Returns:
+            Room | None: ルーム（存在しない・期限切れの場合は None）
+        """
+        room = self._rooms.get((code or "").strip().upper())
+        if room is None or time.monotonic() - room.last_active > self.idle_timeout:
+            return None
+        return room
+
+    def close(self, code):
+        """ルームを削除する"""
+        with self._lock:
+            self._rooms.pop(code, None)
+
+    def stats(self):
+        """
+        ルームの利用状況を取得
+
+        Returns:
+            dict: {"rooms": int, "players": int}
+        """
+        rooms = list(self._rooms.values())
+        return {"rooms": len(rooms), "players": sum(room.snapshot.player_count for room in rooms)}
+
+    def _new_code(self):
+        while True:
+            code = "".join(secrets.choice(ROOM_CODE_ALPHABET) for _ in range(self.code_length))
+            if code not in self._rooms:
+                return code
+
+    def _remove_idle(self, now):
+        for code in [code for code, room in self._rooms.items() if now - room.last_active > self.idle_timeout]:
+            del self._rooms[code]
@@ -0,0 +1,143 @@
+"""
+出題順の調整（1人プレイ用の間隔反復）
+間違えた問題・ヒントを使った問題を、数問後にもう一度出題する
+復習待ちの問題は「次に出題する時期」をキーにしたヒープで管理し、次の1問を O(log n) で選ぶ
+"""
+
+from array import array
+
+
+class SpacedRepetitionScheduler:
+    """
+    未出題の山札と復習待ちのヒープを組み合わせて、次に出題する問題を決める
+
+    時間は「出題した問題数」で数える。復習待ちの問題は Leitner 方式の箱番号を持ち、
+    正解するたびに箱が1つ進んで次の出題までの間隔が倍になる。最後の箱で正解すると卒業する。
+    初めて出題した問題にヒントなしで正解した場合は、復習せずにそのまま卒業する。
+
+    ヒープの各要素は (出題時期, 箱番号, 行番号) を1つの64ビット整数に詰めて
+    array に保持するため、復習待ち1問あたり8バイトで済む。
+
+    Args:
+        deck (array): シャッフル済みの行番号配列（未出題の問題）
+        wrong_delay (int): 不正解の問題を何問後に再出題するか
+        hint_delay (int): ヒントを使って正解した問題を何問後に再出題するか
+        base_interval (int): 復習で正解した場合の間隔の基準（箱番号ごとに倍になる）
+        max_box (int): 卒業するまでの箱の数
+    """
+
+    _ROW_BITS = 27
+    _BOX_BITS = 4
+    _ROW_MASK = (1 << _ROW_BITS) - 1
+    _BOX_MASK = (1 << _BOX_BITS) - 1
+
+    def __init__(self, deck, wrong_delay=3, hint_delay=5, base_interval=4, max_box=3):
+        self.deck = deck
+        self.wrong_delay = wrong_delay
+        self.hint_delay = hint_delay
+        self.base_interval = base_interval
+        self.max_box = min(max_box, self._BOX_MASK)
+        self.clock = 0
+        self.cursor = 0
+        self._heap = array("q")
+        self._current = None  # (行番号, 箱番号、未出題だった場合は None)
+
+    def __len__(self):
+        """まだ出題する予定がある問題数（未出題 + 復習待ち）"""
+        return len(self.deck) - self.cursor + len(self._heap)
+
+    def next(self):
+        """
+        次に出題する問題を選ぶ
+
+        復習時期が来た問題を優先し、なければ未出題の問題を出す。
+        未出題の問題がなくなった場合は、復習時期を待たずに最も早い問題を出す。
+
+        Returns:
+            int | None: 行番号（出題できる問題がない場合は None）
+        """
+        if self._heap and (self._due(self._heap[0]) <= self.clock or self.cursor >= len(self.deck)):
+            key = self._pop()
+            self._current = (key & self._ROW_MASK, (key >> self._ROW_BITS) & self._BOX_MASK)
+        elif self.cursor < len(self.deck):
+            self._current = (self.deck[self.cursor], None)
+            self.cursor += 1
+        else:
+            self._current = None
+            return None
+        self.clock += 1
+        return self._current[0]
+
+    def peek(self):
+        """
+        次に出題される問題を取得（状態は変えない）
+
+        Returns:
+            int | None: 行番号（出題できる問題がない場合は None）
+        """
+        if self._heap and (self._due(self._heap[0]) <= self.clock or self.cursor >= len(self.deck)):
+            return self._heap[0] & self._ROW_MASK
+        if self.cursor < len(self.deck):
+            return self.deck[self.cursor]
+        return None
+
+    def record(self, row_id, is_correct, hint_used):
+        """
+        直前に出題した問題の結果を反映し、必要なら復習待ちに入れる
+
+        Args:
+            row_id (int): 行番号（直前に next で選ばれた問題）
+            is_correct (bool): 正解かどうか
+            hint_used (bool): ヒントを使用したかどうか
+        """
+        if self._current is None or self._current[0] != row_id:
+            return
+        box = self._current[1]
+        self._current = None
+
+        if not is_correct:
+            self._push(self.clock + self.wrong_delay, 0, row_id)
+        elif hint_used:
+            self._push(self.clock + self.hint_delay, box or 0, row_id)
+        elif box is not None:
+            box += 1
+            if box < self.max_box:
+                self._push(self.clock + self.base_interval * (2 ** box), box, row_id)
+
+    def _due(self, key):
+        return key >> (self._ROW_BITS + self._BOX_BITS)
+
+    def _push(self, due, box, row_id):
+        heap = self._heap
+        heap.append((due << (self._ROW_BITS + self._BOX_BITS)) | (box << self._ROW_BITS) | row_id)
+        # 末尾から親と比較して上へ移動
+        pos = len(heap) - 1
+        item = heap[pos]
+        while pos > 0:
+            parent = (pos - 1) >> 1
+            if heap[parent] <= item:
+                break
+            heap[pos] = heap[parent]
+            pos = parent
+        heap[pos] = item
+
+    def _pop(self):
+        heap = self._heap
+        top = heap[0]
+        last = heap.pop()
+        if heap:
+            # 末尾の要素を先頭に置き、子と比較して下へ移動
+            size = len(heap)
+            pos = 0
+            while True:
+                child = 2 * pos + 1
+                if child >= size:
+                    break
+                if child + 1 < size and heap[child + 1] < heap[child]:
+                    child += 1
+                if last <= heap[child]:
+                    break
+                heap[pos] = heap[child]
+                pos = child
+            heap[pos] = last
+        return top
@@ -0,0 +1,172 @@
+"""
+得点ランキング（マルチプレイヤー用）
+プレイヤーごとの正解数・解答数・得点を配列で保持し、得点が変わるたびに順位の索引を差分で更新する
+順位の取得と上位 K 人の一覧は、プレイヤー数によらずほぼ一定の時間で求められる
+"""
+
+import bisect
+from array import array
+
+
+class Scoreboard:
+    """
+    プレイヤーごとの成績と、得点順の順位を管理する
+
+    得点は resolution 倍した整数（以下「得点キー」）に変換し、得点キーごとの人数を
+    Fenwick 木（Binary Indexed Tree）で数える。これにより
+      - 順位（自分より得点が高い人数 + 1）は O(log M)
+      - 上位から offset 番目以降の limit 人は O(limit + 得点の種類 × log M)
+    で求められる（M は得点キーの最大値）。同点のプレイヤーはプレイヤー番号順に並べ、同じ順位とする。
+
+    Args:
+        size (int): 最初に登録するプレイヤー数（add_player で後から追加できる）
+        resolution (int): 得点を整数に変換する倍率（得点は小数点以下2桁まで扱う）
+    """
+
+    def __init__(self, size=0, resolution=100):
+        self.resolution = resolution
+        self.correct = array("i")
+        self.total = array("i")
+        self.points = array("d")
+        self._keys = array("q")  # プレイヤー番号 → 得点キー
+        self._members = {}  # {得点キー: その得点のプレイヤー番号（昇順）}
+        self._capacity = 64  # Fenwick 木で扱える得点キーの数（2のべき乗）
+        self._tree = array("i", bytes(4 * (self._capacity + 1)))
+        for _ in range(size):
+            self.add_player()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add_player(self):
+        """
+        プレイヤーを追加する（得点0）
+
+        Returns:
+            int: 追加したプレイヤーの番号
+        """
+        index = len(self._keys)
+        self.correct.append(0)
+        self.total.append(0)
+        self.points.append(0.0)
+        self._keys.append(0)
+        # 番号は増える一方なので、末尾に追加すれば昇順のまま
+        self._members.setdefault(0, []).append(index)
+        self._tree_add(0, 1)
+        return index
+
+    def record(self, index, is_correct, points):
+        """
+        1問分の結果を反映する
+
+        Args:
+            index (int): プレイヤー番号
+            is_correct (bool): 正解かどうか
+            points (float): 獲得点数
+        """
+        self.total[index] += 1
+        if is_correct:
+            self.correct[index] += 1
+        self.points[index] += points
+
+        old_key = self._keys[index]
+        new_key = round(self.points[index] * self.resolution)
+        if new_key == old_key:
+            return
+        members = self._members[old_key]
+        del members[bisect.bisect_left(members, index)]
+        if not members:
+            del self._members[old_key]
+        bisect.insort(self._members.setdefault(new_key, []), index)
+        self._keys[index] = new_key
+        if new_key >= self._capacity:
+            # 木に収まらない得点になった場合は、更新後の人数から作り直す
+            self._grow(new_key)
+        else:
+            self._tree_add(old_key, -1)
+            self._tree_add(new_key, 1)
+
+    def score(self, index):
+        """
+        プレイヤーの成績を取得
+
+        Returns:
+            tuple[int, int, float]: (正解数, 解答数, 得点)
+        """
+        return self.correct[index], self.total[index], self.points[index]
+
+    def rank(self, index):
+        """
+        プレイヤーの順位を取得（同点は同順位）
+
+        Returns:
+            int: 1始まりの順位
+        """
+        return len(self._keys) - self._prefix(self._keys[index]) + 1
+
+    def page(self, offset, limit):
+        """
+        得点順に offset 番目から limit 人を取得
+
+        Args:
+            offset (int): 先頭から何人飛ばすか
+            limit (int): 取得する人数
+
+        Returns:
+            list[tuple[int, int]]: (順位, プレイヤー番号) のリスト
+        """
+        size = len(self._keys)
+        entries = []
+        position = max(0, offset)
+        while len(entries) < limit and position < size:
+            # 上から position + 1 番目 = 下から size - position 番目の得点キー
+            key = self._find(size - position)
+            higher = size - self._prefix(key)  # この得点より高い人数
+            members = self._members[key]
+            start = position - higher
+            for index in members[start:start + limit - len(entries)]:
+                entries.append((higher + 1, index))
+            position = higher + len(members)
+        return entries
+
+    def _tree_add(self, key, delta):
+        i = key + 1
+        tree = self._tree
+        while i <= self._capacity:
+            tree[i] += delta
+            i += i & -i
+
+    def _prefix(self, key):
+        # 得点キーが key 以下の人数
+        total = 0
+        i = min(key + 1, self._capacity)
+        tree = self._tree
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def _find(self, k):
+        # 下から k 番目（1始まり）のプレイヤーの得点キー
+        pos = 0
+        step = self._capacity
+        tree = self._tree
+        while step:
+            if pos + step <= self._capacity and tree[pos + step] < k:
+                pos += step
+                k -= tree[pos]
+            step >>= 1
+        return pos
+
+    def _grow(self, key):
+        # 得点キーが収まるまで容量を倍にし、人数から木を作り直す（O(M)）
+        while self._capacity <= key:
+            self._capacity *= 2
+        tree = array("i", bytes(4 * (self._capacity + 1)))
+        for member_key, members in self._members.items():
+            tree[member_key + 1] += len(members)
+        for i in range(1, self._capacity + 1):
+            parent = i + (i & -i)
+            if parent <= self._capacity:
+                tree[parent] += tree[i]
+        self._tree = tree
@@ -0,0 +1,82 @@
+// ページ全体の翻訳を防止（JavaScriptによる強制）
+// 親ページで1回だけ実行し、以降は追加された要素だけを処理する
+// （translate="no" は子孫要素に継承されるため、全要素を走査する必要はない）
+(function () {
+    const root = document.documentElement;
+    if (window.__notranslateObserver) {
+        return;
+    }
+
+    // サイドバー、ボタン、セレクトボックスは個別にも指定する
+    const CRITICAL_SELECTOR = '[data-testid="stSidebar"], button, select, option, .stButton, .stSelectbox';
+
+    function protect(el) {
+        if (el.getAttribute('translate') !== 'no') {
+            el.setAttribute('translate', 'no');
+        }
+        if (!el.classList.contains('notranslate')) {
+            el.classList.add('notranslate');
+        }
+    }
+
+    // 言語属性を日本語に設定（ブラウザに「既に日本語」と認識させる）
+    function protectRoot() {
+        if (root.lang !== 'ja') {
+            root.lang = 'ja';
+        }
+        protect(root);
+        if (document.body) {
+            protect(document.body);
+        }
+    }
+
+    // 追加された要素はフレームごとにまとめて処理する
+    let pending = [];
+    let scheduled = false;
+
+    function flush() {
+        scheduled = false;
+        const nodes = pending;
+        pending = [];
+        protectRoot();
+        for (const node of nodes) {
+            if (!node.isConnected) {
+                continue;
+            }
+            if (node.matches(CRITICAL_SELECTOR)) {
+                protect(node);
+                node.setAttribute('lang', 'ja');
+            }
+            node.querySelectorAll(CRITICAL_SELECTOR).forEach(el => {
+                protect(el);
+                el.setAttribute('lang', 'ja');
+            });
+        }
+    }
+
+    function schedule() {
+        if (!scheduled) {
+            scheduled = true;
+            requestAnimationFrame(flush);
+        }
+    }
+
+    const observer = new MutationObserver(mutations => {
+        for (const mutation of mutations) {
+            for (const node of mutation.addedNodes) {
+                if (node.nodeType === Node.ELEMENT_NODE) {
+                    pending.push(node);
+                }
+            }
+        }
+        schedule();
+    });
+    // ルートの属性が書き換えられた場合と、要素が追加された場合のみ反応する
+    observer.observe(root, { attributes: true, attributeFilter: ['lang', 'translate', 'class'] });
+    observer.observe(document.body, { childList: true, subtree: true });
+    window.__notranslateObserver = observer;
+
+    // 既存の要素は最初に1回だけ処理する
+    pending.push(document.body);
+    flush();
+})();
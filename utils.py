@@ -1,11 +1,23 @@
 from dotenv import load_dotenv
 load_dotenv()
-import pandas as pd
 import random
+import atexit
 import os
-from openai import OpenAI
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import constants as ct
 import streamlit as st
+from question_bank import load_question_bank
+from answer_store import AnswerEvent, AnswerStore
+from calibration import DifficultyCalibrator
+from scheduler import SpacedRepetitionScheduler
+from rooms import RoomHub
+from scoreboard import Scoreboard
+from hint_cache import HintCache, make_hint_key, load_precomputed_hints
+from hint_backend import HintBackendUnavailable
+from hint_providers import LocalHintProvider, build_hint_prompt, create_hint_provider
 
 # OpenAI APIキーの取得（Streamlit Secrets優先、なければ環境変数）
 def get_openai_api_key():
@@ -24,23 +36,69 @@ def get_openai_api_key():
     # どちらも取得できない場合はNone
     return None
 
+# ヒント生成に使用するモデル設定（キャッシュキーにも含める）
+HINT_PARAMS = {
+    "model": ct.HINT_MODEL,
+    "max_tokens": ct.HINT_MAX_TOKENS,
+    "temperature": ct.HINT_TEMPERATURE,
+}
+
+# ヒントのプロバイダー（サーバープロセス内の全セッションで共有）
+# HINT_PROVIDER 環境変数で openai / local / auto を切り替えられる
+# OpenAI を使う場合は OPENAI_BASE_URL 環境変数でローカルの疑似サーバーに向けることもできる
 api_key = get_openai_api_key()
-if api_key:
-    client = OpenAI(api_key=api_key)
-else:
-    client = None  # ヒント機能使用時にエラーメッセージを表示
+hint_provider = create_hint_provider(
+    os.getenv("HINT_PROVIDER", ct.HINT_PROVIDER),
+    api_key,
+    HINT_PARAMS,
+    ct.HINT_FALLBACK_MESSAGE,
+    timeout=ct.HINT_TIMEOUT_SECONDS,
+    max_retries=ct.HINT_MAX_RETRIES,
+    rate=ct.HINT_RATE_PER_SECOND,
+    burst=ct.HINT_RATE_BURST,
+    failure_threshold=ct.HINT_BREAKER_FAILURES,
+    reset_timeout=ct.HINT_BREAKER_RESET_SECONDS,
+)  # None の場合はヒント機能使用時にエラーメッセージを表示
+
+# API を呼び出せない場合の代替ヒントに使用
+_local_provider = LocalHintProvider(ct.HINT_FALLBACK_MESSAGE)
 
 
 ############################################################
 # CSV読込
 ############################################################
 
+@st.cache_resource(show_spinner=False, max_entries=1)
+def _load_question_bank(path, mtime_ns, size):
+    """
+    問題データを読み込み・検証する（サーバープロセス内で共有）
+    
+    mtime と サイズ をキャッシュキーに含めるため、ファイルが更新された場合のみ再読込される。
+    CSVと一致するコンパイル済みファイル（ct.QUESTIONS_BANK）があれば、CSVを解析せずにそちらを開く。
+    返却される問題バンクは全セッションで共有されるため、読み取り専用として扱うこと。
+    
+    Args:
+        path (str): CSVファイルのパス
+        mtime_ns (int): ファイルの更新時刻（ナノ秒）
+        size (int): ファイルサイズ（バイト）
+        
+    Returns:
+        QuestionBank: 問題データと (ジャンル, 難易度) 索引
+        
+    Raises:
+        ValueError: 必須列の不足、またはデータが空の場合
+    """
+    return load_question_bank(path, ct.QUESTIONS_BANK)
+
+
 def load_questions_csv():
     """
     問題データのCSVファイルを読み込む
     
+    読込・検証はサーバープロセスごとに一度だけ行い、全セッションで同じデータを共有する。
+    
     Returns:
-        pd.DataFrame: 問題データ
+        QuestionBank: 問題データ（読み取り専用）
         
     Raises:
         FileNotFoundError: CSVファイルが存在しない場合
@@ -51,54 +109,90 @@ def load_questions_csv():
         st.stop()
     
     try:
-        df = pd.read_csv(ct.QUESTIONS_CSV, encoding="utf-8-sig")
-        
-        # 必須列の存在チェック
-        required_columns = ["question", "option1", "option2", "option3", "option4", 
-                        "correct_option", "genre", "difficulty", "option_explanations"]
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        
-        if missing_columns:
-            st.error(f"エラー: CSVファイルに必要な列が不足しています: {', '.join(missing_columns)}", 
-                    icon=":material/error:")
-            st.stop()
-        
-        # データが空でないかチェック
-        if len(df) == 0:
-            st.error("エラー: CSVファイルに問題データが存在しません", icon=":material/error:")
-            st.stop()
-        
-        return df
+        stat = os.stat(ct.QUESTIONS_CSV)
+        return _load_question_bank(ct.QUESTIONS_CSV, stat.st_mtime_ns, stat.st_size)
         
-    except pd.errors.EmptyDataError:
-        st.error(f"エラー: {ct.QUESTIONS_CSV} が空のファイルです", icon=":material/error:")
+    except ValueError as e:
+        st.error(f"エラー: {str(e)}", icon=":material/error:")
         st.stop()
     except Exception as e:
         st.error(f"エラー: CSVファイルの読み込みに失敗しました - {str(e)}", icon=":material/error:")
         st.stop()
 
 ############################################################
-# 次の問題を選択
+# 静的ファイル読込
 ############################################################
 
-def load_next_question(df, genre, difficulty):
-    st = __import__("streamlit").session_state
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _read_static_asset(path, mtime_ns):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
 
-    # フィルター条件のキーを作成
-    filter_key = f"{genre}_{difficulty}"
+def load_static_asset(name):
+    """
+    静的ファイル（CSS・JavaScript）を読み込む
+    
+    内容はファイルが更新された場合のみ再読込される。
+    
+    Args:
+        name (str): static ディレクトリ内のファイル名
+        
+    Returns:
+        tuple[int, str]: (更新時刻（ナノ秒、キャッシュ無効化用のバージョン）, ファイルの内容)
+    """
+    path = os.path.join(ct.STATIC_DIR, name)
+    mtime_ns = os.stat(path).st_mtime_ns
+    return mtime_ns, _read_static_asset(path, mtime_ns)
+
+
+############################################################
+# 次の問題を選択
+############################################################
+
+def build_deck(bank, genre, difficulty, difficulty_mode):
+    """
+    フィルター条件に一致する問題の山札を作成
     
-    # このフィルター条件の出題履歴を初期化（存在しない場合）
-    if filter_key not in st.asked_questions:
-        st.asked_questions[filter_key] = []
+    Args:
+        bank (QuestionBank): 問題データ
+        genre (str): ジャンル（"ランダム" は全ジャンル）
+        difficulty (str): 難易度（"ランダム" は全難易度）
+        difficulty_mode (str): 難易度の基準（CSVの設定 / 解答実績）
+        
+    Returns:
+        array: シャッフル済みの行番号配列
+    """
+    if difficulty_mode == ct.DIFFICULTY_MODE_CALIBRATED and difficulty != ct.FILTER_RANDOM:
+        # 解答実績で補正した難易度で絞り込む
+        return get_difficulty_calibrator(bank).new_deck(bank.candidates(genre, ct.FILTER_RANDOM), difficulty)
+    return bank.new_deck(genre, difficulty)
 
-    filtered = df.copy()
-    if genre != "ランダム":
-        filtered = filtered[filtered["genre"] == genre]
-    if difficulty != "ランダム":
-        filtered = filtered[filtered["difficulty"] == difficulty]
+
+def load_next_question(bank, genre, difficulty):
+    st = __import__("streamlit").session_state
+
+    # ゲーム開始時（またはフィルター変更時）に山札を作成
+    # 苦手優先の出題順は1人プレイのときのみ使う
+    question_order = st.question_order if st.player_count == 1 else ct.QUESTION_ORDER_RANDOM
+    filter_key = (genre, difficulty, st.difficulty_mode, question_order)
+    if st.deck is None or st.deck_filter != filter_key:
+        st.deck = build_deck(bank, genre, difficulty, st.difficulty_mode)
+        st.deck_cursor = 0
+        st.deck_filter = filter_key
+        if question_order == ct.QUESTION_ORDER_ADAPTIVE:
+            st.scheduler = SpacedRepetitionScheduler(
+                st.deck,
+                wrong_delay=ct.SRS_WRONG_DELAY,
+                hint_delay=ct.SRS_HINT_DELAY,
+                base_interval=ct.SRS_BASE_INTERVAL,
+                max_box=ct.SRS_MAX_BOX,
+            )
+        else:
+            st.scheduler = None
 
     # フィルター結果が0件の場合（問題が存在しない組み合わせ）
-    if len(filtered) == 0:
+    if len(st.deck) == 0:
         st.no_questions_available = True
         st.all_questions_done = False
         return
@@ -106,33 +200,28 @@ def load_next_question(df, genre, difficulty):
     # 問題が存在するのでフラグをリセット
     st.no_questions_available = False
 
-    # 元のインデックスを保持したまま、出題済み問題を除外
-    asked_indices = st.asked_questions[filter_key]
-    available_questions = filtered[~filtered.index.isin(asked_indices)]
-    
-    # 全問題出題済みの場合
-    if len(available_questions) == 0:
-        st.all_questions_done = True
-        return
-    
+    if st.scheduler is not None:
+        # 復習時期が来た問題 → 未出題の問題 の順に選ぶ（復習も含めて出し切ったら終了）
+        question_index = st.scheduler.next()
+        if question_index is None:
+            st.all_questions_done = True
+            return
+    else:
+        # 全問題出題済みの場合（山札を引き切った）
+        if st.deck_cursor >= len(st.deck):
+            st.all_questions_done = True
+            return
+
+        # 山札の先頭から1問引く（元の行番号を取得）
+        question_index = st.deck[st.deck_cursor]
+        st.deck_cursor += 1
+
     # 全問出題完了フラグをリセット
     st.all_questions_done = False
-    
-    # ランダムに1問選択（1回のsampleで問題とインデックスの両方を取得）
-    sampled = available_questions.sample(1)
-    q = sampled.iloc[0]
-    question_index = sampled.index[0]
-    
-    # 出題済みリストに追加（元のインデックスを記録）
-    st.asked_questions[filter_key].append(question_index)
+    q = bank.question(question_index)
 
     # 選択肢シャッフル（元のインデックスも保持）
-    options_with_indices = [
-        (q["option1"], 0),
-        (q["option2"], 1),
-        (q["option3"], 2),
-        (q["option4"], 3)
-    ]
+    options_with_indices = [(opt, i) for i, opt in enumerate(q.options)]
     random.shuffle(options_with_indices)
     
     # シャッフル後の選択肢と元のインデックスを分離
@@ -140,7 +229,10 @@ def load_next_question(df, genre, difficulty):
     shuffled_indices = [idx for _, idx in options_with_indices]
 
     # 正解インデックス
-    correct_index = options.index(q[f"option{int(q['correct_option'])}"])
+    correct_index = shuffled_indices.index(q.correct)
+
+    # 出題と同時に STEP 1 ヒントを先読み
+    prefetch_hint(q.correct_explanation, q.difficulty)
 
     st.current_question = q
     st.shuffled_options = options
@@ -156,53 +248,329 @@ def load_next_question(df, genre, difficulty):
 # AIヒント生成
 ############################################################
 
-def generate_hint(explanation, difficulty, step):
+@st.cache_resource(show_spinner=False)
+def get_hint_cache():
+    """
+    ヒントキャッシュを取得（サーバープロセス内で共有、ディスク経由でプロセス間も共有）
+    
+    Returns:
+        HintCache: ヒントキャッシュ
+    """
+    return HintCache(
+        ct.HINT_CACHE_PATH,
+        max_entries=ct.HINT_CACHE_MAX_ENTRIES,
+        ttl_seconds=ct.HINT_CACHE_TTL_SECONDS,
+    )
+
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def _load_precomputed_hints(path, mtime_ns, size):
+    return load_precomputed_hints(path)
+
+
+def get_precomputed_hints():
+    """
+    事前生成ヒントを取得（ファイルが更新された場合のみ再読込）
+    
+    Returns:
+        dict: {キャッシュキー: ヒント}（ファイルがない場合は空）
+    """
+    if not os.path.exists(ct.PRECOMPUTED_HINTS_PATH):
+        return {}
+    stat = os.stat(ct.PRECOMPUTED_HINTS_PATH)
+    return _load_precomputed_hints(ct.PRECOMPUTED_HINTS_PATH, stat.st_mtime_ns, stat.st_size)
+
+
+def hint_cache_key(explanation, difficulty, step):
+    """ヒントキャッシュ・事前生成ヒントのキー（OpenAI のプロンプトと生成パラメータから作成）"""
+    return make_hint_key(build_hint_prompt(explanation, difficulty, step), **HINT_PARAMS)
+
+
+def _require_provider():
     # OpenAI APIキーが設定されていない場合のエラー処理
-    if client is None:
+    if hint_provider is None:
         raise ValueError("OpenAI APIキーが設定されていません。Streamlit Secretsまたは.envファイルにOPENAI_API_KEYを設定してください。")
+    return hint_provider
+
+
+def request_hint(explanation, difficulty, step, answer=None, deadline=None):
+    """
+    プロバイダーにヒント生成を依頼する（キャッシュは参照しない）
+    
+    Args:
+        explanation (str): 正解の選択肢の解説
+        difficulty (str): 難易度
+        step (int): ヒント段階
+        answer (str | None): 正解の選択肢
+        deadline (float | None): 打ち切る時刻（time.monotonic() 基準、None は無制限）
+        
+    Returns:
+        str: 生成されたヒント
+        
+    Raises:
+        ValueError: OpenAI APIキーが設定されていない場合
+        HintBackendUnavailable: 流量制限・サーキットブレーカー・期限切れの場合
+        Exception: API呼び出しに失敗した場合
+    """
+    provider = _require_provider()
+
+    try:
+        return provider.generate(explanation, difficulty, step, answer=answer, deadline=deadline)
+    except HintBackendUnavailable:
+        raise
+    except Exception as e:
+        raise Exception(f"ヒント生成中にエラーが発生しました: {str(e)}")
+
+
+def _lookup_hint(cache_key):
+    """事前生成ヒント → ヒントキャッシュの順に生成済みのヒントを探す（なければ None）"""
+    hint = get_precomputed_hints().get(cache_key)
+    if hint is not None:
+        return hint
+    return get_hint_cache().get(cache_key)
+
+
+def _fallback_hint(explanation, difficulty, step, answer=None):
+    """
+    API を呼び出せない場合の代替ヒント
     
-    prompt = f"""
-あなたはクイズのヒントだけを短く生成するAIです。
-以下の制約でヒントを生成してください。
+    同じ問題の手前の段階のヒントが生成済みならそれを、なければローカル生成のヒントを返す。
+    """
+    for earlier_step in range(step - 1, 0, -1):
+        hint = _lookup_hint(hint_cache_key(explanation, difficulty, earlier_step))
+        if hint is not None:
+            return hint
+    return _local_provider.generate(explanation, difficulty, step, answer=answer)
+
 
-【解説】
-{explanation}
+def generate_hint(explanation, difficulty, step, answer=None):
+    cache_key = hint_cache_key(explanation, difficulty, step)
 
-【難易度】
-{difficulty}
+    # 事前生成済み・キャッシュ済みのヒントがあればそれを返す
+    hint = _lookup_hint(cache_key)
+    if hint is not None:
+        return hint
 
-【ヒント段階】
-STEP {step}
+    try:
+        hint = request_hint(explanation, difficulty, step, answer=answer)
+    except HintBackendUnavailable:
+        return _fallback_hint(explanation, difficulty, step, answer=answer)
+
+    if hint and hint_provider.cacheable:
+        get_hint_cache().set(cache_key, hint)
+    return hint
+
+
+############################################################
+# AIヒント生成（ストリーミング）
+############################################################
+
+# API呼び出しはスクリプト実行スレッドとは別のスレッドで行う
+_hint_executor = ThreadPoolExecutor(max_workers=ct.HINT_MAX_WORKERS, thread_name_prefix="hint")
+
+# ストリーム終了を表す目印
+_STREAM_END = object()
 
-【条件】
-- 答えを直接示さない
-- 1〜2文で短く
-- 難易度に応じてヒントの強弱を調整
-"""
 
+def _stream_hint_worker(stream, cache_key, cache, chunks, cancel, fallback):
+    """
+    ワーカースレッドでヒントをストリーミング生成し、受信した断片をキューへ渡す
+    
+    cancel が立った時点でストリームを閉じる。最後まで受信できたヒントのみキャッシュする。
+    API を呼び出せない場合は代替ヒントを渡す。
+    """
+    parts = []
     try:
-        res = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=50,
-            temperature=0.7,
-        )
-        return res.choices[0].message.content
+        try:
+            for delta in stream:
+                if cancel.is_set():
+                    return
+                parts.append(delta)
+                chunks.put(delta)
+        finally:
+            stream.close()
+
+        hint = "".join(parts)
+        if hint:
+            cache.set(cache_key, hint)
+    except HintBackendUnavailable:
+        if not parts:
+            chunks.put(fallback())
     except Exception as e:
-        raise Exception(f"ヒント生成中にエラーが発生しました: {str(e)}")
+        chunks.put(Exception(f"ヒント生成中にエラーが発生しました: {str(e)}"))
+    finally:
+        chunks.put(_STREAM_END)
+
+
+def stream_hint(explanation, difficulty, step, answer=None, deadline=None):
+    """
+    ヒントを断片ごとに返すジェネレーター
+    
+    生成済みのヒントやローカル生成のヒントは一度に返す。API で生成する場合は別スレッドで
+    ストリーミング生成し、届いた断片から順に返す。ジェネレーターが閉じられた場合
+    （解答ボタンが押されてスクリプトが中断された場合など）や、deadline を過ぎた場合は
+    生成を中止する。
+    
+    Args:
+        explanation (str): 正解の選択肢の解説
+        difficulty (str): 難易度
+        step (int): ヒント段階
+        answer (str | None): 正解の選択肢（ローカル生成で伏せ字にする）
+        deadline (float | None): 生成を打ち切る時刻（time.monotonic() 基準、None は無制限）
+        
+    Yields:
+        str: ヒントの断片
+        
+    Raises:
+        ValueError: OpenAI APIキーが設定されていない場合
+        Exception: API呼び出しに失敗した場合
+    """
+    cache_key = hint_cache_key(explanation, difficulty, step)
+
+    hint = _lookup_hint(cache_key)
+    if hint is not None:
+        yield hint
+        return
+
+    provider = _require_provider()
+    if not provider.cacheable:
+        # ローカル生成は十分速いのでその場で返す
+        yield provider.generate(explanation, difficulty, step, answer=answer)
+        return
+
+    chunks = queue.Queue()
+    cancel = threading.Event()
+    stream = provider.stream(explanation, difficulty, step, answer=answer, deadline=deadline)
+    _hint_executor.submit(
+        _stream_hint_worker, stream, cache_key, get_hint_cache(), chunks, cancel,
+        lambda: _fallback_hint(explanation, difficulty, step, answer=answer),
+    )
+
+    try:
+        while True:
+            timeout = None if deadline is None else deadline - time.monotonic()
+            if timeout is not None and timeout <= 0:
+                return
+            try:
+                item = chunks.get(timeout=timeout)
+            except queue.Empty:
+                return
+            if item is _STREAM_END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        cancel.set()
+
+
+############################################################
+# ヒント先読み
+############################################################
+
+# 先読みの同時実行数（上限に達している間の先読みは見送る）
+_prefetch_slots = threading.BoundedSemaphore(ct.HINT_PREFETCH_MAX_CONCURRENCY)
+_prefetch_lock = threading.Lock()
+_prefetch_inflight = set()
+
+
+def _prefetch_worker(explanation, difficulty, step, cache_key, cache):
+    try:
+        hint = request_hint(explanation, difficulty, step)
+        if hint:
+            cache.set(cache_key, hint)
+    except Exception:
+        # 先読みの失敗は無視する（Tips ボタン押下時に通常どおり生成される）
+        pass
+    finally:
+        with _prefetch_lock:
+            _prefetch_inflight.discard(cache_key)
+        _prefetch_slots.release()
+
+
+def prefetch_hint(explanation, difficulty, step=1):
+    """
+    ヒントをバックグラウンドで生成してキャッシュに入れておく
+    
+    先読みが無効・API を使わないプロバイダー・生成済み・生成中・同時実行数の上限・
+    日次予算の上限のいずれかに当たる場合は何もしない。
+    
+    Args:
+        explanation (str): 正解の選択肢の解説
+        difficulty (str): 難易度
+        step (int): ヒント段階
+        
+    Returns:
+        bool: 先読みを開始したかどうか
+    """
+    if not ct.HINT_PREFETCH_ENABLED or hint_provider is None or not hint_provider.cacheable:
+        return False
+
+    cache_key = hint_cache_key(explanation, difficulty, step)
+    cache = get_hint_cache()
+    if cache_key in get_precomputed_hints() or cache.contains(cache_key):
+        return False
+
+    with _prefetch_lock:
+        if cache_key in _prefetch_inflight:
+            return False
+        if not _prefetch_slots.acquire(blocking=False):
+            return False
+        budget_name = f"prefetch:{time.strftime('%Y-%m-%d')}"
+        if not cache.consume_budget(budget_name, ct.HINT_PREFETCH_DAILY_BUDGET):
+            _prefetch_slots.release()
+            return False
+        _prefetch_inflight.add(cache_key)
+
+    _hint_executor.submit(_prefetch_worker, explanation, difficulty, step, cache_key, cache)
+    return True
+
+
+def prefetch_upcoming_hint(bank):
+    """
+    山札の次の問題の STEP 1 ヒントを先読み（結果表示中に呼び出す）
+    
+    Args:
+        bank (QuestionBank): 問題バンク
+    """
+    st = __import__("streamlit").session_state
+
+    if st.scheduler is not None:
+        row_id = st.scheduler.peek()
+    elif st.deck is not None and st.deck_cursor < len(st.deck):
+        row_id = st.deck[st.deck_cursor]
+    else:
+        row_id = None
+    if row_id is None:
+        return
+    q = bank.question(row_id)
+    prefetch_hint(q.correct_explanation, q.difficulty)
 
 
 ############################################################
 # ヒント管理（段階制）
 ############################################################
 
-def get_hint(explanation, difficulty):
+def get_hint(explanation, difficulty, answer=None):
+    """
+    現在のヒント段階のヒントを断片ごとに返すイテレーターを取得し、段階を進める
+    
+    時間制限がある場合は、制限時間の終了時点で生成を打ち切る。
+    
+    Args:
+        explanation (str): 正解の選択肢の解説
+        difficulty (str): 難易度
+        answer (str | None): 正解の選択肢（ヒントに含めないために使用）
+        
+    Returns:
+        Iterator[str]: ヒントの断片
+    """
     st = __import__("streamlit").session_state
 
     if "hint_step" not in st:
         st.hint_step = 1
 
-    hint = generate_hint(explanation, difficulty, st.hint_step)
+    hint = stream_hint(explanation, difficulty, st.hint_step, answer=answer, deadline=st.question_deadline)
 
     if st.hint_step < 2:
         st.hint_step += 1
@@ -210,24 +578,196 @@ def get_hint(explanation, difficulty):
     return hint
 
 
+############################################################
+# 時間制限
+############################################################
+
+def start_question_timer():
+    """
+    現在の解答者（全員同時に解答する場合は全員）の解答時間を計り始める
+    
+    期限は time.monotonic() 基準で記録する（時間制限なしの場合は None）。
+    """
+    st = __import__("streamlit").session_state
+
+    st.question_start_time = time.monotonic()
+    if st.time_limit is None:
+        st.question_deadline = None
+    else:
+        st.question_deadline = st.question_start_time + st.time_limit
+
+
+def get_elapsed_time():
+    """
+    現在の解答者（全員同時に解答する場合は全員）が解答を始めてからの経過時間を取得
+    
+    Returns:
+        float | None: 経過秒数（計測していない場合は None）
+    """
+    st = __import__("streamlit").session_state
+
+    if st.question_start_time is None:
+        return None
+    return time.monotonic() - st.question_start_time
+
+
+def get_remaining_time():
+    """
+    現在の解答者の残り時間を取得
+    
+    Returns:
+        float | None: 残り秒数（時間制限なしの場合は None）
+    """
+    st = __import__("streamlit").session_state
+
+    if st.question_deadline is None:
+        return None
+    return st.question_deadline - time.monotonic()
+
+
+def is_simultaneous():
+    """
+    全員同時に解答するかどうか（この端末での2人以上のプレイのみ）
+    
+    Returns:
+        bool: 全員同時に解答する場合は True
+    """
+    st = __import__("streamlit").session_state
+
+    return st.player_count > 1 and st.answer_mode == ct.ANSWER_MODE_SIMULTANEOUS
+
+
+def handle_time_up():
+    """
+    期限を過ぎていれば現在の解答者を時間切れ（解答 -1）にして次へ進める
+    
+    最後のプレイヤーなら結果表示へ、それ以外は次のプレイヤーの計測を始める。
+    全員同時に解答する場合は、未解答のプレイヤー全員を時間切れにして結果表示へ進む。
+    時間切れになったプレイヤー名は timeout_notice に記録する（次の描画で通知）。
+    
+    Returns:
+        bool: 時間切れの処理を行ったかどうか
+    """
+    st = __import__("streamlit").session_state
+
+    remaining = get_remaining_time()
+    if remaining is None or remaining > 0 or st.all_players_answered:
+        return False
+
+    if is_simultaneous():
+        timed_out = [i for i in range(st.player_count) if i not in st.player_answers]
+        for i in timed_out:
+            st.player_answers[i] = -1
+        st.timeout_notice = "・".join(get_player_name(i) for i in timed_out[:5]) or None
+        if len(timed_out) > 5:
+            st.timeout_notice += f" ほか{len(timed_out) - 5}人"
+        st.all_players_answered = True
+        st.show_result = True
+        st.question_deadline = None
+        return True
+
+    player = st.current_player
+    st.player_answers[player] = -1
+    st.timeout_notice = get_player_name(player)
+
+    # 最後のプレイヤーなら結果表示、それ以外は次のプレイヤーへ
+    if player == st.player_count - 1:
+        st.all_players_answered = True
+        st.show_result = True
+        st.question_deadline = None
+    else:
+        st.current_player += 1
+        start_question_timer()
+    return True
+
+
 ############################################################
 # スコア計算（マルチプレイヤー用）
 ############################################################
 
-def calculate_points(is_correct, hint_used):
+def calculate_points(is_correct, hint_used, latency=None, time_window=None):
     """
     正解時の得点を計算
     
+    time_window を指定した場合は、解答時間に応じて得点を減らす
+    （0秒で満点、time_window 秒以降は TIME_WEIGHT_MIN_RATIO 倍）。
+    
     Args:
         is_correct (bool): 正解かどうか
         hint_used (bool): ヒントを使用したかどうか
+        latency (float | None): 解答までの時間（秒）
+        time_window (float | None): 得点が最小になる秒数（None は解答時間によらない）
         
     Returns:
         float: 獲得点数（正解かつヒント使用: 0.5点、正解かつヒント未使用: 1点、不正解: 0点）
     """
     if not is_correct:
         return 0.0
-    return 0.5 if hint_used else 1.0
+    points = 0.5 if hint_used else 1.0
+    if time_window is not None and latency is not None:
+        ratio = min(1.0, max(0.0, latency) / time_window)
+        points *= 1.0 - (1.0 - ct.TIME_WEIGHT_MIN_RATIO) * ratio
+    return round(points, 2)
+
+
+def get_scoring_window():
+    """
+    早く答えるほど高得点にする場合の基準時間を取得
+    
+    Returns:
+        float | None: 得点が最小になる秒数（制限時間、なければ基準時間。解答時間によらない場合は None）
+    """
+    st = __import__("streamlit").session_state
+
+    if st.scoring != ct.SCORING_TIME_WEIGHTED:
+        return None
+    return st.time_limit or ct.TIME_WEIGHT_REFERENCE_SECONDS
+
+
+def get_player_points(player_index, is_correct, hint_used):
+    """
+    プレイヤーの現在の問題の得点を計算（解答時間は player_latencies から取得）
+    
+    Args:
+        player_index (int): プレイヤーのインデックス
+        is_correct (bool): 正解かどうか
+        hint_used (bool): ヒントを使用したかどうか
+        
+    Returns:
+        float: 獲得点数
+    """
+    st = __import__("streamlit").session_state
+
+    return calculate_points(is_correct, hint_used, st.player_latencies.get(player_index), get_scoring_window())
+
+
+def get_player_name(player_index):
+    """
+    プレイヤーの表示名を取得
+    
+    Args:
+        player_index (int): プレイヤーのインデックス
+        
+    Returns:
+        str: A〜Z（27人目以降は P27, P28, ...）
+    """
+    if player_index < len(ct.PLAYER_NAMES):
+        return ct.PLAYER_NAMES[player_index]
+    return f"P{player_index + 1}"
+
+
+def get_scoreboard():
+    """
+    現在のゲームのスコアボードを取得（プレイヤー数が変わった場合は作り直す）
+    
+    Returns:
+        Scoreboard: 全プレイヤーの正解数・解答数・得点と順位
+    """
+    st = __import__("streamlit").session_state
+
+    if st.player_scores is None or len(st.player_scores) != st.player_count:
+        st.player_scores = Scoreboard(st.player_count)
+    return st.player_scores
 
 
 def update_player_score(player_index, is_correct, hint_used):
@@ -235,21 +775,180 @@ def update_player_score(player_index, is_correct, hint_used):
     プレイヤーのスコアを更新
     
     Args:
-        player_index (int): プレイヤーのインデックス（0=A, 1=B, 2=C, 3=D）
+        player_index (int): プレイヤーのインデックス（0=A, 1=B, 2=C, ...）
+        is_correct (bool): 正解かどうか
+        hint_used (bool): ヒントを使用したかどうか
+    """
+    points = get_player_points(player_index, is_correct, hint_used)
+    get_scoreboard().record(player_index, is_correct, points)
+
+
+@st.cache_resource(show_spinner=False)
+def get_answer_store():
+    """
+    解答履歴のストアを取得（サーバープロセス内で共有）
+    
+    Returns:
+        AnswerStore: 解答履歴のストア（プロセス終了時にバッファを書き込む）
+    """
+    store = AnswerStore(
+        ct.ANSWER_STORE_PATH,
+        batch_size=ct.ANSWER_FLUSH_BATCH,
+        flush_interval=ct.ANSWER_FLUSH_INTERVAL_SECONDS,
+        max_buffer=ct.ANSWER_BUFFER_MAX,
+    )
+    atexit.register(store.close)
+    return store
+
+
+def record_player_answer(calibrator, q, player_index, answer_index, is_correct, hint_used):
+    """
+    プレイヤーの解答を解答履歴と難易度補正に記録する（書き込みはバックグラウンドで行う）
+    
+    Args:
+        calibrator (DifficultyCalibrator): 出題中の問題バンクの難易度補正
+        q (Question): 出題した問題
+        player_index (int): プレイヤーのインデックス
+        answer_index (int): 選んだ選択肢（シャッフル後の位置、時間切れ・未解答は -1）
         is_correct (bool): 正解かどうか
         hint_used (bool): ヒントを使用したかどうか
     """
     st = __import__("streamlit").session_state
+
+    # 選択肢はCSV上の順番で記録する（シャッフルに依存しない集計のため）
+    choice = st.shuffled_indices[answer_index] if answer_index != -1 else -1
+    get_answer_store().record(AnswerEvent(
+        session_id=st.session_id,
+        player=player_index,
+        question_id=q.row_id,
+        question_key=q.key,
+        choice=choice,
+        is_correct=is_correct,
+        hint_used=hint_used,
+        latency=st.player_latencies.get(player_index),
+        points=get_player_points(player_index, is_correct, hint_used),
+    ))
+    calibrator.update(q.row_id, is_correct, hint_used, st.player_latencies.get(player_index))
+
+    # 苦手優先の出題順では、間違えた問題・ヒントを使った問題を復習待ちに入れる
+    if st.scheduler is not None:
+        st.scheduler.record(q.row_id, is_correct, hint_used)
+
+
+############################################################
+# ルーム（各自の端末で同時に解答するマルチプレイ）
+############################################################
+
+@st.cache_resource(show_spinner=False)
+def get_room_hub():
+    """
+    ルームのハブを取得（サーバープロセス内の全セッションで共有）
+    
+    Returns:
+        RoomHub: ルームコードごとのゲーム状態
+    """
+    return RoomHub(
+        max_rooms=ct.ROOM_MAX_ROOMS,
+        idle_timeout=ct.ROOM_IDLE_TIMEOUT_SECONDS,
+        code_length=ct.ROOM_CODE_LENGTH,
+    )
+
+
+def _record_room_answers(room, question_id, results):
+    # ルームの結果表示時に、参加者全員の解答を解答履歴と難易度補正に反映する
+    store = get_answer_store()
+    calibrator = get_difficulty_calibrator(room.bank)
+    for player_index, choice, is_correct, latency, points in results:
+        store.record(AnswerEvent(
+            session_id=f"room:{room.session_id}",
+            player=player_index,
+            question_id=question_id,
+            question_key=room.bank.question_keys[question_id],
+            choice=choice,
+            is_correct=is_correct,
+            hint_used=False,
+            latency=latency,
+            points=points,
+        ))
+        calibrator.update(question_id, is_correct, False, latency)
+
+
+def create_room(bank, genre, difficulty):
+    """
+    サイドバーの設定でルームを作成
     
-    if player_index not in st.player_scores:
-        st.player_scores[player_index] = {"correct": 0, "total": 0, "points": 0.0}
+    Args:
+        bank (QuestionBank): 問題データ
+        genre (str): ジャンル
+        difficulty (str): 難易度
+        
+    Returns:
+        Room: 作成したルーム
+        
+    Raises:
+        RoomError: ルーム数が上限に達している場合
+    """
+    st = __import__("streamlit").session_state
+
+    time_window = get_scoring_window()
+    return get_room_hub().create(
+        bank,
+        build_deck(bank, genre, difficulty, st.difficulty_mode),
+        time_limit=st.time_limit,
+        question_limit=st.question_limit,
+        max_players=ct.ROOM_MAX_PLAYERS,
+        ranking_top=ct.ROOM_RANKING_TOP,
+        # ルームではヒントを使わない
+        score_answer=lambda is_correct, latency, time_limit: calculate_points(is_correct, False, latency, time_window),
+        on_reveal=_record_room_answers,
+    )
+
+
+############################################################
+# 難易度補正
+############################################################
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def _load_difficulty_calibrator(_bank, mtime_ns, size):
+    """
+    問題バンクに対応する難易度補正を作成（サーバープロセス内で共有）
     
-    points = calculate_points(is_correct, hint_used)
-    st.player_scores[player_index]["total"] += 1
-    st.player_scores[player_index]["points"] += points
+    保存済みの集計テーブルから1回だけ初期化し、以降は解答ごとに更新する。
+    集計は問題キーで保存されているため、CSVの並び替え・追加で行番号が変わっても
+    同じ問題に対応づけられる（現在の問題バンクにない問題の集計は使わない）。
+    問題CSVが更新された場合は作り直す。
+    """
+    labels = [_bank.difficulties[code] for code in _bank.difficulty_codes]
+    calibrator = DifficultyCalibrator(
+        labels,
+        ct.CALIBRATION_PRIOR_ACCURACY,
+        prior_weight=ct.CALIBRATION_PRIOR_WEIGHT,
+        min_attempts=ct.CALIBRATION_MIN_ATTEMPTS,
+        latency_reference=ct.CALIBRATION_LATENCY_REFERENCE,
+        weights=ct.CALIBRATION_WEIGHTS,
+        bands=ct.CALIBRATION_BANDS,
+    )
+    counts = {row[0]: row[1:] for row in get_answer_store().question_counts()}
+    if counts:
+        for row_id, key in enumerate(_bank.question_keys):
+            values = counts.get(key)
+            if values is not None:
+                calibrator.load(row_id, *values)
+    return calibrator
+
+
+def get_difficulty_calibrator(bank):
+    """
+    難易度補正を取得
     
-    if is_correct:
-        st.player_scores[player_index]["correct"] += 1
+    Args:
+        bank (QuestionBank): 問題データ
+        
+    Returns:
+        DifficultyCalibrator: 難易度補正（全セッションで共有）
+    """
+    stat = os.stat(ct.QUESTIONS_CSV)
+    return _load_difficulty_calibrator(bank, stat.st_mtime_ns, stat.st_size)
 
 
 def get_next_player(current_player, player_count):